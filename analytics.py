@@ -0,0 +1,395 @@
+import argparse
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from cart_manager import ADDED, CLEARED, DELETED, REMOVED, REPRICED, RESTORED
+from metrics import RollingHistogram
+
+# Columns of each table: name and little-endian dtype. Every column is its
+# own append-only file, <table>.<column>, holding raw values.
+TABLES = {
+    'orders': (('time', '<f8'), ('started', '<f8'), ('total', '<i8'), ('units', '<i4')),
+    'lines': (('time', '<f8'), ('order', '<i8'), ('item', '<i4'), ('quantity', '<i4')),
+    'events': (('time', '<f8'), ('kind', 'i1'), ('item', '<i4'), ('total', '<i8')),
+}
+
+# Session event kinds, stored by index. 'start' is the first item put in
+# an empty cart, 'order' a checkout. New kinds go at the end, so stored
+# codes keep their meaning.
+EVENT_KINDS = ('start', ADDED, REMOVED, DELETED, CLEARED, RESTORED, 'order', REPRICED)
+EVENT_CODES = {kind: code for code, kind in enumerate(EVENT_KINDS)}
+
+ITEMS_FILE = 'items.txt'
+
+_STOP = object()
+
+
+def column_path(directory, table, column):
+    return os.path.join(directory, f"{table}.{column}")
+
+
+class ColumnStore:
+    """Append-only columnar store of one kiosk's orders, order lines and session events.
+
+    Each column is a file of raw fixed-size values, so appending a row
+    appends a few bytes to each file, and reading maps the files as
+    NumPy arrays without parsing. Item names are stored once, in
+    items.txt, and referred to by their line number. A crash between
+    the columns of a row, or in the middle of a value, leaves some
+    columns longer; opening the store cuts them back to the shortest
+    whole number of rows.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        items_path = os.path.join(directory, ITEMS_FILE)
+        self.items = []
+        if os.path.exists(items_path):
+            with open(items_path, encoding='utf-8') as file:
+                self.items = [line.rstrip('\n') for line in file]
+        self.item_codes = {item: code for code, item in enumerate(self.items)}
+        self.items_file = open(items_path, 'a', encoding='utf-8')
+
+        self.rows = {}
+        self.files = {}
+        for table, columns in TABLES.items():
+            sizes = {}
+            for column, dtype in columns:
+                path = column_path(directory, table, column)
+                sizes[path] = os.path.getsize(path) // np.dtype(dtype).itemsize if os.path.exists(path) else 0
+            self.rows[table] = min(sizes.values())
+            for (column, dtype), path in zip(columns, sizes):
+                size = self.rows[table] * np.dtype(dtype).itemsize
+                if os.path.exists(path) and os.path.getsize(path) != size:
+                    os.truncate(path, size)
+                self.files[table, column] = open(path, 'ab')
+
+    def item_code(self, item):
+        """The code of an item name, adding it to items.txt on first sight."""
+        code = self.item_codes.get(item)
+        if code is None:
+            code = self.item_codes[item] = len(self.items)
+            self.items.append(item)
+            # Written through at once, so no flushed column refers to an unwritten name
+            self.items_file.write(item + '\n')
+            self.items_file.flush()
+        return code
+
+    def append(self, table, **columns):
+        """Append rows to a table: one equally long sequence of values per column; return the first row index."""
+        first = self.rows[table]
+        # Converted before anything is written, so a bad value leaves no partial row
+        values = [np.asarray(columns[column], dtype=dtype) for column, dtype in TABLES[table]]
+        for (column, _), column_values in zip(TABLES[table], values):
+            self.files[table, column].write(column_values.tobytes())
+        self.rows[table] += values[0].size
+        return first
+
+    def flush(self):
+        for file in self.files.values():
+            file.flush()
+
+    def close(self):
+        self.flush()
+        self.items_file.close()
+        for file in self.files.values():
+            file.close()
+
+
+class OrderAnalytics:
+    """Records completed orders and session events into a ColumnStore, off the render loop.
+
+    record_order() and the cart listeners installed by watch() only
+    queue a record; a writer thread appends them and flushes the column
+    files every flush_interval seconds. Analytics is not fsynced: the
+    order journal is what protects orders from a crash.
+    """
+
+    def __init__(self, directory, flush_interval=1.0):
+        self.store = ColumnStore(directory)
+        self.flush_interval = flush_interval
+        self.orders = 0
+        self.events = 0
+        self.append_us = RollingHistogram(1024)
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="order-analytics", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Write everything queued so far and stop the writer."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def watch(self, cart):
+        """Record a CartManager's changes as session events, plus a start event when an empty cart gets an item."""
+        was_empty = [not cart]
+
+        def listener(event):
+            now = time.time()
+            if was_empty[0] and cart:
+                self._queue.put(('event', now, 'start', None, event.total))
+            was_empty[0] = not cart
+            self._queue.put(('event', now, event.kind, event.item, event.total))
+        cart.subscribe(listener)
+
+    def record_order(self, order):
+        """Record a completed order (a dict with items, total, time and started)."""
+        self._queue.put(('order', order))
+
+    def _write(self, record):
+        store = self.store
+        if record[0] == 'order':
+            order = record[1]
+            items = order['items']
+            started = order.get('started')
+            row = store.append('orders', time=[order['time']],
+                               started=[started if started is not None else np.nan],
+                               total=[order['total']], units=[sum(items.values())])
+            store.append('lines', time=[order['time']] * len(items), order=[row] * len(items),
+                         item=[store.item_code(item) for item in items], quantity=list(items.values()))
+            store.append('events', time=[order['time']], kind=[EVENT_CODES['order']], item=[-1],
+                         total=[order['total']])
+            self.orders += 1
+        else:
+            _, now, kind, item, total = record
+            store.append('events', time=[now], kind=[EVENT_CODES[kind]],
+                         item=[store.item_code(item) if item is not None else -1], total=[total])
+        self.events += 1
+
+    def _run(self):
+        last_flush = time.perf_counter()
+        while True:
+            timeout = max(0.0, self.flush_interval - (time.perf_counter() - last_flush))
+            try:
+                record = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                record = None
+            if record is _STOP:
+                break
+            if record is not None:
+                start = time.perf_counter()
+                try:
+                    self._write(record)
+                except (KeyError, TypeError, ValueError) as error:
+                    # A malformed record must not stop the writer
+                    print(f"Analytics skipped a {record[0]} record: {error!r}")
+                else:
+                    self.append_us.add((time.perf_counter() - start) * 1e6)
+            if time.perf_counter() - last_flush >= self.flush_interval:
+                self.store.flush()
+                last_flush = time.perf_counter()
+        self.store.close()
+
+    def stats(self):
+        """Flat counters, for metrics export."""
+        return {
+            'analytics_orders': self.orders,
+            'analytics_events': self.events,
+            'analytics_append_us_p99': self.append_us.summary()['p99'],
+        }
+
+
+def read_column(directory, table, column, rows):
+    """The first rows values of a column file, memory-mapped read-only."""
+    dtype = dict(TABLES[table])[column]
+    if rows == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(column_path(directory, table, column), dtype=dtype, mode='r', shape=(rows,))
+
+
+def find_stores(paths):
+    """Kiosk store directories: each path is a store, or a directory of stores (e.g. one per kiosk)."""
+    stores = []
+    for path in paths:
+        if os.path.exists(column_path(path, 'orders', 'time')):
+            stores.append(path)
+        elif os.path.isdir(path):
+            stores.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                          if os.path.exists(column_path(os.path.join(path, name), 'orders', 'time')))
+    return stores
+
+
+class Tables:
+    """The tables of several kiosk stores, for vectorized queries.
+
+    Each column is the kiosks' memory-mapped columns concatenated, with
+    a 'kiosk' column added (an index into kiosks). Item codes are mapped
+    to one shared list of names, items; lines' 'order' column indexes
+    the combined orders table.
+    """
+
+    def __init__(self, directories):
+        self.kiosks = [os.path.basename(os.path.normpath(directory)) for directory in directories]
+        codes = {}
+        parts = {table: {column: [] for column, _ in columns} for table, columns in TABLES.items()}
+        kiosk_parts = {table: [] for table in TABLES}
+        order_offset = 0
+        for kiosk, directory in enumerate(directories):
+            items_path = os.path.join(directory, ITEMS_FILE)
+            names = []
+            if os.path.exists(items_path):
+                with open(items_path, encoding='utf-8') as file:
+                    names = [line.rstrip('\n') for line in file]
+            for name in names:
+                codes.setdefault(name, len(codes))
+            # Local item code -> shared code; -1 (no item) stays -1
+            remap = np.array([codes[name] for name in names] + [-1], dtype=np.int32)
+
+            for table, columns in TABLES.items():
+                rows = min(os.path.getsize(column_path(directory, table, column)) // np.dtype(dtype).itemsize
+                           if os.path.exists(column_path(directory, table, column)) else 0
+                           for column, dtype in columns)
+                for column, _ in columns:
+                    values = read_column(directory, table, column, rows)
+                    if column == 'item':
+                        values = remap[values]
+                    elif table == 'lines' and column == 'order':
+                        values = values + order_offset
+                    parts[table][column].append(values)
+                kiosk_parts[table].append(np.full(rows, kiosk, dtype=np.int16))
+            order_offset += len(parts['orders']['time'][-1])
+        self.items = list(codes)
+
+        for table, columns in parts.items():
+            data = {column: np.concatenate(values) if values else np.empty(0, dtype=dict(TABLES[table])[column])
+                    for column, values in columns.items()}
+            data['kiosk'] = np.concatenate(kiosk_parts[table]) if kiosk_parts[table] else np.empty(0, np.int16)
+            setattr(self, table, data)
+
+    def select(self, table, since=None, until=None, kiosk=None):
+        """A table's columns, filtered to rows with since <= time < until and, if given, one kiosk's name."""
+        data = getattr(self, table)
+        mask = np.ones(len(data['time']), dtype=bool)
+        if since is not None:
+            mask &= data['time'] >= since
+        if until is not None:
+            mask &= data['time'] < until
+        if kiosk is not None:
+            mask &= data['kiosk'] == (self.kiosks.index(kiosk) if kiosk in self.kiosks else -1)
+        if mask.all():
+            return data
+        return {column: values[mask] for column, values in data.items()}
+
+
+def local_hours(times, utc_offset):
+    """Hour of day, 0-23, of epoch times at a UTC offset in seconds."""
+    return ((times + utc_offset) // 3600 % 24).astype(np.intp)
+
+
+def item_popularity_by_hour(tables, utc_offset=0, **where):
+    """Units sold per item and hour of day: an (items, 24) array."""
+    lines = tables.select('lines', **where)
+    index = lines['item'].astype(np.intp) * 24 + local_hours(lines['time'], utc_offset)
+    counts = np.bincount(index, weights=lines['quantity'], minlength=len(tables.items) * 24)
+    return counts.reshape(len(tables.items), 24)
+
+
+def basket_stats(tables, **where):
+    """Order count, mean and median basket value in cents, and mean units per order, per kiosk."""
+    orders = tables.select('orders', **where)
+    count = np.bincount(orders['kiosk'], minlength=len(tables.kiosks))
+    value = np.bincount(orders['kiosk'], weights=orders['total'], minlength=len(tables.kiosks))
+    units = np.bincount(orders['kiosk'], weights=orders['units'], minlength=len(tables.kiosks))
+    rows = []
+    for kiosk, name in enumerate(tables.kiosks):
+        if count[kiosk]:
+            totals = orders['total'][orders['kiosk'] == kiosk] if len(tables.kiosks) > 1 else orders['total']
+            rows.append({'kiosk': name, 'orders': int(count[kiosk]),
+                         'mean_basket': float(value[kiosk] / count[kiosk]), 'median_basket': float(np.median(totals)),
+                         'mean_units': float(units[kiosk] / count[kiosk])})
+    return rows
+
+
+def checkout_times(tables, **where):
+    """Seconds from a session's first item to its checkout: count, mean, p50, p90 and p99."""
+    orders = tables.select('orders', **where)
+    seconds = orders['time'] - orders['started']
+    seconds = seconds[np.isfinite(seconds)]
+    if not len(seconds):
+        return {'sessions': 0}
+    p50, p90, p99 = (float(value) for value in np.percentile(seconds, [50, 90, 99]))
+    return {'sessions': len(seconds), 'mean_s': float(seconds.mean()), 'p50_s': p50, 'p90_s': p90, 'p99_s': p99}
+
+
+def session_stats(tables, **where):
+    """Sessions started, orders placed, conversion, and cart events by kind."""
+    events = tables.select('events', **where)
+    counts = np.bincount(events['kind'].astype(np.intp), minlength=len(EVENT_KINDS))
+    stats = {kind: int(count) for kind, count in zip(EVENT_KINDS, counts)}
+    stats['conversion'] = stats['order'] / stats['start'] if stats['start'] else 0.0
+    return stats
+
+
+def parse_date(text):
+    """Local midnight of a YYYY-MM-DD date, in epoch seconds."""
+    return time.mktime(time.strptime(text, '%Y-%m-%d'))
+
+
+def print_rows(rows):
+    if not rows:
+        print("No orders.")
+        return
+    columns = list(rows[0])
+    cells = [[f"{row[column]:.2f}" if isinstance(row[column], float) else str(row[column]) for column in columns]
+             for row in rows]
+    widths = [max(len(column), *(len(line[i]) for line in cells)) for i, column in enumerate(columns)]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for line in cells:
+        print("  ".join(cell.ljust(width) for cell, width in zip(line, widths)))
+
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("stores", nargs="+", help="kiosk store directories, or directories of them")
+    common.add_argument("--since", type=parse_date, metavar="YYYY-MM-DD")
+    common.add_argument("--until", type=parse_date, metavar="YYYY-MM-DD", help="first day not included")
+    common.add_argument("--kiosk", help="only this kiosk's orders")
+    common.add_argument("--timing", action="store_true", help="print load and query times")
+
+    parser = argparse.ArgumentParser(description="Aggregate queries over the kiosks' order analytics stores")
+    subparsers = parser.add_subparsers(dest="query", required=True)
+    popular = subparsers.add_parser("popular", parents=[common], help="units sold per item and hour of day")
+    popular.add_argument("--top", type=int, default=10, help="items to show")
+    popular.add_argument("--utc-offset", type=float, default=time.localtime().tm_gmtoff / 3600,
+                         help="hours from UTC of the local time (default: this machine's)")
+    subparsers.add_parser("basket", parents=[common], help="basket value and size per kiosk")
+    subparsers.add_parser("checkout", parents=[common], help="time from first item to checkout")
+    subparsers.add_parser("sessions", parents=[common], help="sessions started, orders and cart events")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    tables = Tables(find_stores(args.stores))
+    loaded = time.perf_counter()
+    where = dict(since=args.since, until=args.until, kiosk=args.kiosk)
+
+    if args.query == 'popular':
+        counts = item_popularity_by_hour(tables, args.utc_offset * 3600, **where)
+        rows = []
+        for item in np.argsort(-counts.sum(axis=1), kind='stable')[:args.top]:
+            row = {'item': tables.items[item], 'units': int(counts[item].sum())}
+            row['peak_hour'] = int(counts[item].argmax())
+            row.update({f"{hour:02d}h": int(counts[item, hour]) for hour in range(24) if counts[:, hour].any()})
+            rows.append(row)
+        print_rows(rows)
+    elif args.query == 'basket':
+        print_rows(basket_stats(tables, **where))
+    elif args.query == 'checkout':
+        print_rows([checkout_times(tables, **where)])
+    else:
+        print_rows([session_stats(tables, **where)])
+
+    if args.timing:
+        print(f"{len(tables.kiosks)} kiosks, {len(tables.orders['time'])} orders, "
+              f"{len(tables.lines['time'])} lines: loaded in {(loaded - start) * 1000:.1f} ms, "
+              f"queried in {(time.perf_counter() - loaded) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1110 @@
+import argparse
+import time
+
+import numpy as np
+
+RESOLUTIONS = [(640, 480), (1280, 720)]
+
+
+def summarize(times_ms):
+    """Mean and tail latencies of a list of per-call times in milliseconds."""
+    times = np.asarray(times_ms)
+    return {
+        'mean': float(times.mean()),
+        'p50': float(np.percentile(times, 50)),
+        'p95': float(np.percentile(times, 95)),
+        'p99': float(np.percentile(times, 99)),
+    }
+
+
+def print_table(rows, columns):
+    """Print a list of dicts as an aligned text table."""
+    widths = [max(len(column), *(len(format_cell(row[column])) for row in rows)) for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(format_cell(row[column]).ljust(width) for column, width in zip(columns, widths)))
+
+
+def format_cell(value):
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
+
+
+def bench_sinks(args):
+    """Compare display sinks at 640x480 and 1280x720."""
+    from tkinter import Tk, Label
+    from display_sink import SINKS, create_sink
+
+    root = Tk()
+    label = Label(root)
+    label.pack()
+
+    rows = []
+    for width, height in RESOLUTIONS:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(2)]
+        for name in args.sinks or SINKS:
+            sink = create_sink(name, label)
+            times = []
+            for i in range(args.warmup + args.frames):
+                start = time.perf_counter()
+                sink.show(frames[i % 2])
+                root.update_idletasks()
+                if i >= args.warmup:
+                    times.append((time.perf_counter() - start) * 1000)
+            sink.close()
+            rows.append({'sink': name, 'resolution': f"{width}x{height}", **summarize(times)})
+
+    root.destroy()
+    print_table(rows, ['sink', 'resolution', 'mean', 'p50', 'p95', 'p99'])
+
+
+def read_clip(path, limit=None):
+    """Read a recorded clip into a list of unmirrored RGB frames."""
+    import cv2
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"Could not open clip '{path}'")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frames = []
+    while limit is None or len(frames) < limit:
+        success, frame = cap.read()
+        if not success:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    cap.release()
+    return frames, fps
+
+
+def bench_roi(args):
+    """Compare adaptive ROI tracking against full-frame inference on recorded clips."""
+    from hand_tracking import HandTracker, INDEX_FINGER_TIP
+    from roi_tracking import AdaptiveTracker
+
+    rows = []
+    for clip in args.clips:
+        frames, fps = read_clip(clip, args.limit)
+        h, w = frames[0].shape[:2]
+
+        reference = HandTracker()
+        start = time.perf_counter()
+        expected = [reference.detect_landmarks(frame) for frame in frames]
+        full_seconds = time.perf_counter() - start
+        reference.close()
+
+        detector = HandTracker()
+        tracker = AdaptiveTracker(detector.detect_landmarks, full_frame_interval=args.full_frame_interval,
+                                  skip_frames=args.skip_frames, padding=args.padding, scale=args.scale)
+        start = time.perf_counter()
+        actual = [tracker.process(frame) for frame in frames]
+        adaptive_seconds = time.perf_counter() - start
+        detector.close()
+
+        errors = []
+        disagreements = 0
+        for want, got in zip(expected, actual):
+            if bool(want) != bool(got):
+                disagreements += 1
+            elif want:
+                delta = (want[0][INDEX_FINGER_TIP, :2] - got[0][INDEX_FINGER_TIP, :2]) * (w, h)
+                errors.append(float(np.hypot(*delta)))
+
+        calls = tracker.full_calls + tracker.roi_calls
+        rows.append({
+            'clip': clip,
+            'frames': len(frames),
+            'full_ms/frame': full_seconds * 1000 / len(frames),
+            'adaptive_ms/frame': adaptive_seconds * 1000 / len(frames),
+            'calls/s@clip_fps': calls / len(frames) * fps,
+            'tip_err_px_mean': float(np.mean(errors)) if errors else 0.0,
+            'tip_err_px_p95': float(np.percentile(errors, 95)) if errors else 0.0,
+            'detect_mismatch': disagreements,
+        })
+
+    print_table(rows, list(rows[0]))
+
+
+def bench_scenarios(args):
+    """FPS and per-frame latency of the full state machine on canned scenarios and clips."""
+    from headless import SCENARIOS, HeadlessRunner, run_scenario
+
+    rows = []
+    for name in args.scenarios or sorted(SCENARIOS):
+        session, latencies, seconds = run_scenario(name, fps=args.fps)
+        rows.append({'run': name, 'frames': len(latencies), 'fps': len(latencies) / seconds,
+                     **summarize(latencies), 'orders': session.orders_completed,
+                     'final_screen': session.current_screen})
+
+    if args.sources:
+        from frame_source import open_source
+        from hand_tracking import HandTracker
+        from menu_loader import DEFAULT_MENU, compile_menu
+        from session import OrderingSession
+
+        for spec in args.sources:
+            tracker = HandTracker()
+            source = open_source(spec)
+            runner = HeadlessRunner(OrderingSession(compile_menu(DEFAULT_MENU)), source,
+                                    detect=tracker.detect_landmarks)
+            start = time.perf_counter()
+            latencies = runner.run(args.limit)
+            seconds = time.perf_counter() - start
+            source.close()
+            tracker.close()
+            rows.append({'run': spec, 'frames': len(latencies), 'fps': len(latencies) / seconds,
+                         **summarize(latencies), 'orders': runner.session.orders_completed,
+                         'final_screen': runner.session.current_screen})
+
+    print_table(rows, list(rows[0]))
+
+
+def synthetic_menu(size):
+    """A compiled menu of size made-up items with varied prices."""
+    from menu_loader import compile_menu
+
+    return compile_menu({f"Item {i:04d}": 1.0 + (i % 40) * 0.25 for i in range(size)})
+
+
+def bench_menus(args):
+    """Per-frame, re-layout and page-flip cost of the add items screen for growing menus."""
+    from frame_source import synthetic_hand
+    from frame_path import FramePath
+    from headless import FrameClock
+    from session import OrderingSession
+
+    shape = (480, 640, 3)
+    frame_path = FramePath(mirror=True)
+    background = np.full(shape, 40, dtype=np.uint8)
+    rows = []
+    for size in args.sizes:
+        clock = FrameClock()
+        session = OrderingSession(synthetic_menu(size), clock=clock)
+        session.current_screen = session.SCREENS['ADD_ITEMS']
+        session.refresh_overlay(shape)
+
+        # A hand sweeping down the + buttons; the clock stands still, so no
+        # dwell completes and every frame is hover and composite only
+        ys = np.linspace(80, 380, 30).astype(int)
+        frame_times = []
+        for i in range(args.warmup + args.frames):
+            hands = frame_path.mirror_landmarks([synthetic_hand(640 - 325, ys[i % len(ys)], shape)])
+            frame = background.copy()
+            start = time.perf_counter()
+            session.step(frame, hands)
+            if i >= args.warmup:
+                frame_times.append((time.perf_counter() - start) * 1000)
+
+        # Adding an item on the current page changes the cart, which re-lays
+        # out and redraws the page
+        relayout_times = []
+        page_times = []
+        for i in range(args.relayouts):
+            start = time.perf_counter()
+            session.perform_action(session.layout.buttons[0].action)
+            session.refresh_overlay(shape)
+            relayout_times.append((time.perf_counter() - start) * 1000)
+
+            button = session.layout.by_id.get('next_page') or session.layout.by_id.get('prev_page')
+            if button is not None:
+                start = time.perf_counter()
+                session.perform_action(button.action)
+                session.refresh_overlay(shape)
+                page_times.append((time.perf_counter() - start) * 1000)
+
+        frame_summary = summarize(frame_times)
+        relayout_summary = summarize(relayout_times)
+        rows.append({
+            'items': size,
+            'pages': -(-size // session.menu_rows_per_page(shape)),
+            'buttons': len(session.layout.buttons),
+            'frame_mean': frame_summary['mean'],
+            'frame_p95': frame_summary['p95'],
+            'relayout_mean': relayout_summary['mean'],
+            'relayout_p95': relayout_summary['p95'],
+            'page_flip_mean': summarize(page_times)['mean'] if page_times else 0.0,
+        })
+
+    print_table(rows, list(rows[0]))
+
+
+def naive_cart_summary(cart, menu):
+    """The old way: rebuild the summary text and total from the whole cart."""
+    cart_text = ""
+    total = 0
+    for item, quantity in cart.items():
+        price = menu.price(item) * quantity
+        total += price
+        cart_text += f"{item} x{quantity}: ${price / 100:.2f}\n"
+    return cart_text, total
+
+
+def bench_cart(args):
+    """Add/remove throughput of the cart engine against recomputing the summary on every read."""
+    from cart_manager import CartManager
+
+    rows = []
+    for size in args.sizes:
+        menu = synthetic_menu(size)
+        names = [item.name for item in menu.items]
+        rng = np.random.default_rng(0)
+        picks = [names[i] for i in rng.integers(0, size, args.ops)]
+        removes = rng.random(args.ops) < 0.4
+
+        # Each operation is followed by reads_per_op summary reads, as frames
+        # and the side panel would do between cart changes
+        cart = CartManager(menu)
+        for name in names:
+            cart.add_item(name)
+        events = []
+        cart.subscribe(events.append)
+        start = time.perf_counter()
+        for item, remove in zip(picks, removes):
+            if remove:
+                cart.remove_item(item)
+            else:
+                cart.add_item(item)
+            for _ in range(args.reads_per_op):
+                cart.get_cart_summary()
+        engine_seconds = time.perf_counter() - start
+
+        naive = {name: 1 for name in names}
+        start = time.perf_counter()
+        for item, remove in zip(picks, removes):
+            if remove:
+                if item in naive:
+                    if naive[item] > 1:
+                        naive[item] -= 1
+                    else:
+                        del naive[item]
+            else:
+                naive[item] = naive.get(item, 0) + 1
+            for _ in range(args.reads_per_op):
+                naive_cart_summary(naive, menu)
+        naive_seconds = time.perf_counter() - start
+
+        assert cart.total == naive_cart_summary(naive, menu)[1]
+        rows.append({
+            'cart_items': size,
+            'ops': args.ops,
+            'events': len(events),
+            'engine_ops/s': args.ops / engine_seconds,
+            'naive_ops/s': args.ops / naive_seconds,
+            'engine_us/op': engine_seconds * 1e6 / args.ops,
+            'naive_us/op': naive_seconds * 1e6 / args.ops,
+        })
+
+    print_table(rows, list(rows[0]))
+
+
+def bench_journal(args):
+    """Frame time with and without the order journal, and the journal's own write latency."""
+    import tempfile
+
+    from headless import FrameClock
+    from journal import OrderJournal, segment_paths
+    from session import OrderingSession
+
+    shape = (480, 640, 3)
+    background = np.full(shape, 40, dtype=np.uint8)
+    rows = []
+    for interval in [None] + args.fsync_intervals:
+        clock = FrameClock()
+        session = OrderingSession(synthetic_menu(50), clock=clock)
+        names = [item.name for item in session.menu.items]
+        rng = np.random.default_rng(0)
+        with tempfile.TemporaryDirectory() as directory:
+            journal = None
+            if interval is not None:
+                journal = OrderJournal(directory, interval, args.segment_bytes)
+                journal.watch(session.cart)
+                journal.start()
+
+            times = []
+            for _ in range(args.frames):
+                frame = background.copy()
+                start = time.perf_counter()
+                for i in rng.integers(0, len(names), args.ops_per_frame):
+                    if rng.random() < 0.4:
+                        session.cart.remove_item(names[i])
+                    else:
+                        session.cart.add_item(names[i])
+                session.step(frame, [])
+                times.append((time.perf_counter() - start) * 1000)
+                clock.tick()
+
+            row = {'journal': 'off' if interval is None else f"fsync {interval}s", **summarize(times)}
+            if journal is not None:
+                journal.stop()
+                stats = journal.stats()
+                recovered = OrderJournal(directory).cart == dict(session.cart.items())
+                row.update({
+                    'records': stats['journal_records'],
+                    'fsyncs': stats['journal_fsyncs'],
+                    'segments': len(segment_paths(directory)),
+                    'enqueue_us_p99': stats['journal_enqueue_us_p99'],
+                    'commit_ms_p50': stats['journal_commit_ms_p50'],
+                    'commit_ms_p99': stats['journal_commit_ms_p99'],
+                    'replay_ok': recovered,
+                })
+            rows.append(row)
+
+    columns = ['journal', 'mean', 'p50', 'p95', 'p99', 'records', 'fsyncs', 'segments',
+               'enqueue_us_p99', 'commit_ms_p50', 'commit_ms_p99', 'replay_ok']
+    print_table([{column: row.get(column, '') for column in columns} for row in rows], columns)
+
+
+def bench_pos(args):
+    """Load test of the POS submitter against the local stub endpoint.
+
+    The 'rejected' run starts from a spool of orders in files of ten, one
+    of which the stub refuses with 400; the rest must still drain.
+    """
+    import json
+    import os
+    import tempfile
+    import uuid
+
+    from pos_client import OrderSubmitter
+    from pos_stub import StubPOSServer
+
+    rows = []
+    for label, rate, failure_rate, outage in [('steady', args.rate, 0.0, 0.0), ('burst', 0.0, 0.0, 0.0),
+                                              ('flaky', args.rate, args.failure_rate, 0.0),
+                                              ('outage', args.rate, 0.0, args.outage),
+                                              ('rejected', 0.0, 0.0, 0.0)]:
+        server = StubPOSServer(latency=args.latency, failure_rate=failure_rate).start()
+        with tempfile.TemporaryDirectory() as spool:
+            expected = args.orders
+            if label == 'rejected':
+                for i in range(0, args.orders, 10):
+                    orders = [{'order_id': uuid.uuid4().hex, 'items': {'Burger': 1}, 'total': 201,
+                               'time': time.time()} for _ in range(min(10, args.orders - i))]
+                    with open(os.path.join(spool, f"{i:09d}-000000.json"), 'w') as file:
+                        json.dump(orders, file)
+                    if i == args.orders // 2:
+                        server.reject_ids.add(orders[0]['order_id'])
+                        expected -= len(orders)
+            submitter = OrderSubmitter(server.url, spool, queue_size=args.queue_size, max_batch=args.max_batch,
+                                       connections=args.connections, spool_interval=0.5)
+            submitter.start()
+            server.down = outage > 0
+            start = time.perf_counter()
+            for i in range(args.orders if label != 'rejected' else 0):
+                if rate:
+                    delay = start + i / rate - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                if server.down and time.perf_counter() - start >= outage:
+                    server.down = False
+                submitter.submit({'order_id': uuid.uuid4().hex, 'items': {'Burger': 1}, 'total': 201,
+                                  'time': time.time()})
+            server.down = False
+            while len(server.order_ids) < expected and time.perf_counter() - start < args.timeout:
+                time.sleep(0.01)
+            seconds = time.perf_counter() - start
+            submitter.stop()
+        server.shutdown()
+        server.server_close()
+
+        stats = submitter.stats()
+        rows.append({
+            'run': label,
+            'orders': args.orders,
+            'delivered': len(server.order_ids),
+            'orders/s': len(server.order_ids) / seconds,
+            'p50_ms': stats['pos_latency_ms_p50'],
+            'p99_ms': stats['pos_latency_ms_p99'],
+            'mean_batch': stats['pos_mean_batch'],
+            'requests': server.requests,
+            'connections': stats['pos_connections_opened'],
+            'retries': stats['pos_retries'],
+            'rejected': stats['pos_rejected'],
+            'spooled_left': stats['pos_spilled'],
+            'duplicates': server.duplicates,
+        })
+
+    print_table(rows, list(rows[0]))
+
+
+def bench_gestures(args):
+    """Per-frame cost of gesture analysis and dwell selection on synthetic and recorded landmark streams."""
+    from frame_source import HAND_POSES, load_landmark_stream, synthetic_hand
+    from gestures import GestureEngine, hand_poses
+    from menu_loader import DEFAULT_MENU, compile_menu
+    from session import OrderingSession
+
+    shape = (480, 640, 3)
+    layout = OrderingSession(compile_menu(DEFAULT_MENU)).layout_home_screen(shape)
+
+    # A hand drifting across the home buttons with changing poses, plus
+    # frames with no hand and with two hands
+    rng = np.random.default_rng(0)
+    poses = list(HAND_POSES.values())
+    synthetic = []
+    for i in range(args.frames):
+        x, y = 200 + 150 * np.sin(i / 40), 235 + 130 * np.sin(i / 97)
+        hand = synthetic_hand(x + rng.normal(0, 2), y + rng.normal(0, 2), shape, template=poses[(i // 90) % 3])
+        synthetic.append([] if i % 50 == 0 else [hand] if i % 7 else [hand, hand])
+    streams = [('synthetic', synthetic)] + [(path, load_landmark_stream(path)) for path in args.recordings]
+
+    rows = []
+    for name, stream in streams:
+        engine = GestureEngine()
+        pose_times, update_times = [], []
+        selects = 0
+        for i, hands in enumerate(stream):
+            start = time.perf_counter()
+            hand_poses(hands, shape)
+            pose_times.append((time.perf_counter() - start) * 1e6)
+
+            start = time.perf_counter()
+            _, button = engine.update(hands, shape, layout, i / args.fps)
+            update_times.append((time.perf_counter() - start) * 1e6)
+            selects += button is not None
+
+        poses_summary = summarize(pose_times)
+        update_summary = summarize(update_times)
+        rows.append({'stream': name, 'frames': len(stream), 'selects': selects,
+                     'poses_us_p50': poses_summary['p50'], 'poses_us_p99': poses_summary['p99'],
+                     'engine_us_p50': update_summary['p50'], 'engine_us_p99': update_summary['p99']})
+
+    print_table(rows, list(rows[0]))
+
+
+def synthetic_cursor_trace(seconds, fps, noise, shape=(480, 640), seed=0):
+    """A fingertip moving between random targets with pauses: (times, true points, noisy points)."""
+    rng = np.random.default_rng(seed)
+    h, w = shape
+    times, truth = [], []
+    t, position = 0.0, np.array([w / 2, h / 2])
+    while t < seconds:
+        target = rng.uniform((40, 40), (w - 40, h - 40))
+        # Minimum-jerk reach, then a dwell on the target
+        duration = rng.uniform(0.3, 0.8)
+        for u in np.arange(0, duration, 1 / fps) / duration:
+            times.append(t)
+            truth.append(position + (target - position) * (10 * u ** 3 - 15 * u ** 4 + 6 * u ** 5))
+            t += 1 / fps
+        position = target
+        for _ in range(int(rng.uniform(0.4, 1.0) * fps)):
+            times.append(t)
+            truth.append(position)
+            t += 1 / fps
+    truth = np.array(truth)
+    return np.array(times), truth, truth + rng.normal(0, noise, truth.shape)
+
+
+def recorded_cursor_trace(path, fps, shape=(480, 640)):
+    """Pointer trace of a landmark recording: (times, smoothed reference, raw points) of frames with a hand."""
+    from frame_source import load_landmark_stream
+    from hand_tracking import INDEX_FINGER_TIP
+
+    h, w = shape
+    times, points = [], []
+    for i, hands in enumerate(load_landmark_stream(path)):
+        if hands:
+            times.append(i / fps)
+            points.append(hands[-1][INDEX_FINGER_TIP, :2] * (w, h))
+    points = np.array(points).reshape(-1, 2)
+    # Without ground truth, a centered (zero-lag) moving average stands in for it
+    return np.array(times), moving_average(points, 5), points
+
+
+def moving_average(points, window):
+    """Centered moving average of an (n, 2) trace, shrinking the window at the ends."""
+    kernel = np.ones(window)
+    counts = np.convolve(np.ones(len(points)), kernel, mode='same')
+    return np.stack([np.convolve(points[:, k], kernel, mode='same') / counts for k in range(2)], axis=1)
+
+
+def evaluate_cursor(times, reference, output, latency):
+    """Jitter, lag and error of a cursor trace shown latency seconds after capture.
+
+    jitter is the RMS of the output's residual against its own moving
+    average while the reference rests (under 30 px/s), which is what the
+    user sees as a shaking cursor during a dwell; lag is the delay, in ms, that best
+    aligns the output with the reference (negative means it runs ahead);
+    error is the RMS distance from where the pointer really is when the
+    frame is displayed.
+    """
+    def at(t):
+        return np.stack([np.interp(t, times, reference[:, k]) for k in range(2)], axis=1)
+
+    def rms(delta):
+        return float(np.sqrt(np.mean(np.sum(delta ** 2, axis=1))))
+
+    speed = np.linalg.norm(np.gradient(reference, times, axis=0), axis=1)
+    still = speed < 30
+    jitter = rms((output - moving_average(output, 7))[still]) if still.any() else 0.0
+    shifts = np.arange(-0.1, 0.3, 0.002)
+    errors = [rms(output - at(times + latency - shift)) for shift in shifts]
+    return {'jitter_px': jitter, 'lag_ms': float(shifts[int(np.argmin(errors))] * 1000),
+            'error_px': rms(output - at(times + latency))}
+
+
+def bench_cursor(args):
+    """Jitter and lag of the cursor filters on synthetic and recorded fingertip traces."""
+    from config import CURSOR
+    from cursor_filter import create_cursor_filter
+
+    latency = args.latency_ms / 1000
+    traces = [('synthetic', synthetic_cursor_trace(args.seconds, args.fps, args.noise))]
+    traces += [(path, recorded_cursor_trace(path, args.fps)) for path in args.recordings]
+    variants = [('raw', None)] + [(f"{name}{'+predict' if predict else ''}", dict(CURSOR, FILTER=name, PREDICT=predict))
+                                  for name in ('one_euro', 'kalman') for predict in (False, True)]
+
+    rows = []
+    for trace_name, (times, reference, measured) in traces:
+        for name, settings in variants:
+            cursor = create_cursor_filter(settings) if settings else None
+            output, update_times = [], []
+            for t, point in zip(times, measured):
+                start = time.perf_counter()
+                output.append(cursor(point, t, latency) if cursor else point)
+                update_times.append((time.perf_counter() - start) * 1e6)
+            row = {'trace': trace_name, 'filter': name}
+            row.update(evaluate_cursor(times, reference, np.array(output, dtype=float), latency))
+            row['us_p50'] = summarize(update_times)['p50']
+            rows.append(row)
+
+    print_table(rows, list(rows[0]))
+
+
+def power_footage(kind, fps, shape=(480, 640, 3), seed=0):
+    """Replayable synthetic footage: (frames, per-frame ground-truth hands, frame at which a hand arrives).
+
+    'idle' is an empty scene with sensor noise, 'busy' a hand moving
+    across it the whole time, and 'arrival' the empty scene for 3.1
+    seconds before the hand walks in. The footage loops every two seconds.
+    """
+    import cv2
+    from frame_source import synthetic_hand
+
+    rng = np.random.default_rng(seed)
+    h, w = shape[:2]
+    background = np.zeros(shape, dtype=np.uint8)
+    background[:] = (70, 90, 110)
+    cv2.rectangle(background, (w // 4, h // 3), (w // 2, h), (120, 100, 80), -1)
+    loop = int(2 * fps)
+    frames, hands = [], []
+    for i in range(loop):
+        frame = np.clip(background + rng.normal(0, 2, shape), 0, 255).astype(np.uint8)
+        x, y = w / 2 + w / 4 * np.sin(2 * np.pi * i / loop), h / 2 + h / 8 * np.cos(4 * np.pi * i / loop)
+        hand = synthetic_hand(x, y, shape)
+        busy = frame.copy()
+        cv2.circle(busy, (int(x), int(y + h * 0.1)), int(h * 0.08), (200, 160, 140), -1)
+        frames.append((frame, busy))
+        hands.append([hand])
+    arrival = {'idle': None, 'busy': 0, 'arrival': int(3.1 * fps)}[kind]
+    return frames, hands, arrival
+
+
+def bench_power(args):
+    """CPU use of always-on vs motion-gated inference on replayed idle, busy and arrival footage."""
+    from presence import MotionDetector, PresenceScheduler
+
+    if args.mediapipe:
+        from hand_tracking import HandTracker
+        tracker = HandTracker()
+        tracker.warm_up()
+    print(f"Hand model: {'MediaPipe' if args.mediapipe else f'stand-in burning {args.inference_ms:g} ms of CPU'}")
+
+    rows = []
+    for kind in ('idle', 'busy', 'arrival'):
+        frames, truth, arrival = power_footage(kind, args.fps)
+        for gated in (False, True):
+            presence = PresenceScheduler(MotionDetector(), args.idle_after, idle_fps=args.idle_fps) if gated else None
+            inferred = shown = 0
+            wake_ms = None
+            start_wall, start_cpu = time.perf_counter(), time.process_time()
+            deadline = start_wall
+            while True:
+                now = time.perf_counter()
+                if now - start_wall >= args.seconds:
+                    break
+                # The footage plays in real time, whatever rate frames are taken at
+                index = int((now - start_wall) * args.fps)
+                present = arrival is not None and index >= arrival
+                frame = frames[index % len(frames)][1 if present else 0]
+
+                hands = []
+                if presence is None or presence.wants_inference(frame, now):
+                    inferred += 1
+                    if args.mediapipe:
+                        hands = tracker.detect_landmarks(frame)
+                    else:
+                        busy_until = time.process_time() + args.inference_ms / 1000
+                        while time.process_time() < busy_until:
+                            pass
+                        hands = truth[index % len(truth)] if present else []
+                if presence is not None:
+                    presence.observe(hands, now)
+                if hands and wake_ms is None and arrival:
+                    wake_ms = (now - start_wall - arrival / args.fps) * 1000
+                shown += 1
+
+                fps = presence.idle_fps if presence is not None and presence.idle else args.fps
+                deadline = max(deadline + 1 / fps, time.perf_counter())
+                time.sleep(max(0.0, deadline - time.perf_counter()))
+
+            wall = time.perf_counter() - start_wall
+            rows.append({'footage': kind, 'mode': 'motion-gated' if gated else 'always-on',
+                         'cpu_percent': (time.process_time() - start_cpu) / wall * 100,
+                         'shown_fps': shown / wall, 'inferences': inferred,
+                         'wake_ms': wake_ms if wake_ms is not None else '-'})
+
+    print_table(rows, list(rows[0]))
+
+
+def stream_client(url, received, stop, kbps=None):
+    """Read an MJPEG stream, counting JPEGs into received[0]; kbps caps the read rate, like a slow link."""
+    import urllib.request
+
+    with urllib.request.urlopen(url, timeout=2.0) as response:
+        buffer = b''
+        while not stop.is_set():
+            chunk = response.read1(4096 if kbps else 65536)
+            buffer += chunk
+            end = buffer.rfind(b'\xff\xd9')
+            if end >= 0:
+                received[0] += buffer.count(b'\xff\xd9', 0, end + 2)
+                buffer = buffer[end + 2:]
+            if kbps:
+                time.sleep(len(chunk) * 8 / 1000 / kbps)
+
+
+def bench_stream(args):
+    """Render-loop cost, encode time and bandwidth of MJPEG streaming, with fast and slow clients."""
+    import threading
+
+    import cv2
+
+    from metrics import RollingHistogram
+    from mjpeg_stream import MJPEGStreamer
+
+    # A menu-like screen whose cursor moves for moving_frames out of every 30
+    base = np.full((args.height, args.width, 3), 40, dtype=np.uint8)
+    for row in range(4):
+        for col in range(3):
+            cv2.rectangle(base, (40 + col * 200, 40 + row * 100), (200 + col * 200, 120 + row * 100),
+                          (70 + 40 * col, 120, 200 - 30 * row), -1)
+    frame = base.copy()
+
+    rows = []
+    for clients in ('none', 'fast', 'fast+slow'):
+        streamer = MJPEGStreamer(port=0, quality=args.quality, encoders=args.encoders)
+        streamer.start()
+        stop = threading.Event()
+        counts, readers = [], []
+        for kbps in {'none': [], 'fast': [None], 'fast+slow': [None, args.slow_kbps]}[clients]:
+            counts.append([0])
+            readers.append(threading.Thread(target=stream_client, daemon=True,
+                                            args=(streamer.url + 'stream', counts[-1], stop, kbps)))
+            readers[-1].start()
+        while streamer.clients < len(readers):
+            time.sleep(0.01)
+
+        publish_ms = RollingHistogram(4096)
+        frames = int(args.seconds * args.fps)
+        deadline = time.perf_counter()
+        for i in range(frames):
+            if i % 30 < args.moving_frames:
+                np.copyto(frame, base)
+                x = 40 + (i * 7) % (args.width - 80)
+                cv2.circle(frame, (x, args.height // 2), 15, (255, 255, 255), -1)
+            start = time.perf_counter()
+            streamer.publish(frame)
+            publish_ms.add((time.perf_counter() - start) * 1000)
+            deadline = max(deadline + 1 / args.fps, time.perf_counter())
+            time.sleep(max(0.0, deadline - time.perf_counter()))
+
+        stats = streamer.stats()
+        stop.set()
+        streamer.close()
+        publish = publish_ms.summary()
+        rows.append({'clients': clients, 'publish_p50': publish['p50'], 'publish_p99': publish['p99'],
+                     'encoded': stats['stream_encoded'], 'unchanged': stats['stream_unchanged'],
+                     'busy_drops': stats['stream_busy_drops'], 'encode_p50': stats['stream_encode_ms_p50'],
+                     'kbps': stats['stream_kbps'], 'client_drops': stats['stream_client_drops'],
+                     'received': '/'.join(str(count[0]) for count in counts) or '-'})
+
+    print(f"{frames} frames at {args.fps:g} FPS, {args.width}x{args.height}, "
+          f"{args.moving_frames} of every 30 changed, slow client {args.slow_kbps:g} kbit/s")
+    print_table(rows, list(rows[0]))
+
+
+def detector_footage(frames, shape=(480, 640, 3)):
+    """Synthetic footage of a drawn pointing hand moving across a dark frame, for runs without a clip."""
+    from frame_source import synthetic_hand
+    from hand_tracking import draw_hand_landmarks
+
+    h, w = shape[:2]
+    footage = []
+    for i in range(frames):
+        t = i / 30
+        hand = synthetic_hand(w * (0.5 + 0.3 * np.sin(t)), h * (0.45 + 0.2 * np.sin(1.7 * t)), shape, 0.3)
+        frame = np.full(shape, 30, dtype=np.uint8)
+        draw_hand_landmarks(frame, hand, rgb=True)
+        footage.append(frame)
+    return footage
+
+
+def bench_detectors(args):
+    """Throughput, latency and landmark agreement of the hand detection backends on one clip."""
+    from config import DETECTOR
+    from detectors import create_detector
+    from hand_tracking import INDEX_FINGER_TIP
+    from metrics import RollingHistogram
+
+    if args.clip:
+        frames, _ = read_clip(args.clip, args.limit)
+    else:
+        frames = detector_footage(args.limit or 300)
+    h, w = frames[0].shape[:2]
+    print(f"{len(frames)} frames of {args.clip or 'synthetic footage'}, {w}x{h}")
+
+    # 'onnx:opencv' picks the ONNX backend's engine
+    results = {}
+    for spec in args.backends.split(','):
+        backend, _, engine = spec.partition(':')
+        settings = dict(DETECTOR, ONNX_ENGINE=engine or DETECTOR['ONNX_ENGINE'])
+        try:
+            detector = create_detector(settings, backend, max_num_hands=args.max_hands)
+            detector.warm_up(frames[0].shape)
+        except Exception as error:
+            print(f"{spec}: skipped ({type(error).__name__}: {error})")
+            continue
+        latency = RollingHistogram(len(frames))
+        detections = []
+        start = time.perf_counter()
+        for frame in frames:
+            frame_start = time.perf_counter()
+            detections.append(detector.detect(frame))
+            latency.add((time.perf_counter() - frame_start) * 1000)
+        results[spec] = (detections, latency.summary(), time.perf_counter() - start)
+        detector.close()
+    if not results:
+        return
+
+    # Agreement is measured against the first backend that ran
+    reference = next(iter(results))
+    rows = []
+    for spec, (detections, latency, seconds) in results.items():
+        scores = [score for _, frame_scores in detections for score in frame_scores]
+        agree = 0
+        errors, tip_errors = [], []
+        for (want, _), (got, _) in zip(results[reference][0], detections):
+            agree += bool(want) == bool(got)
+            if want and got:
+                delta = (want[0][:, :2] - got[0][:, :2]) * (w, h)
+                distances = np.hypot(delta[:, 0], delta[:, 1])
+                errors.append(float(distances.mean()))
+                tip_errors.append(float(distances[INDEX_FINGER_TIP]))
+        rows.append({
+            'backend': spec,
+            'fps': len(frames) / seconds,
+            'ms_p50': latency['p50'],
+            'ms_p95': latency['p95'],
+            'ms_p99': latency['p99'],
+            'detected_%': 100 * sum(bool(hands) for hands, _ in detections) / len(frames),
+            'score_mean': float(np.mean(scores)) if scores else 0.0,
+            f'agree_%_vs_{reference}': 100 * agree / len(frames),
+            'err_px_mean': float(np.mean(errors)) if errors else 0.0,
+            'tip_err_px_p95': float(np.percentile(tip_errors, 95)) if tip_errors else 0.0,
+        })
+    print_table(rows, list(rows[0]))
+
+
+def multi_hand_stream(count, frames, shape, miss=0.05, noise=2.0, seed=0):
+    """Synthetic landmark stream of count hands, each pointing around its own lane of a wide frame.
+
+    Hands are listed in a random order each frame, as detectors list
+    them, and each is missed with probability miss. Returns the
+    per-frame hands and the true hand number of each.
+    """
+    from frame_source import synthetic_hand
+
+    rng = np.random.default_rng(seed)
+    h, w = shape[:2]
+    lane = w / count
+    stream, truth = [], []
+    for i in range(frames):
+        hands, numbers = [], []
+        for number in rng.permutation(count):
+            if rng.random() < miss:
+                continue
+            t = i / 30 + number
+            x = lane * (number + 0.5 + 0.3 * np.sin(t * 0.9)) + rng.normal(0, noise)
+            y = h * (0.5 + 0.25 * np.sin(t * 0.6)) + rng.normal(0, noise)
+            hands.append(synthetic_hand(x, y, shape))
+            numbers.append(int(number))
+        stream.append(hands)
+        truth.append(numbers)
+    return stream, truth
+
+
+def bench_hands(args):
+    """Per-frame cost of multi-user tracking against the number of hands, on synthetic landmark streams."""
+    from config import CURSOR
+    from cursor_filter import create_cursor_filter
+    from gestures import GestureEngine
+    from headless import FrameClock
+    from menu_loader import DEFAULT_MENU, compile_menu
+    from multi_user import HandIdentities, MultiUserSession
+
+    rows = []
+    for count in range(1, args.max_hands + 1):
+        # One 640-pixel lane per hand
+        shape = (480, args.lane_width * count, 3)
+        stream, truth = multi_hand_stream(count, args.frames, shape, args.miss)
+
+        # Identity assignment alone, and how often a hand's id changes
+        identities = HandIdentities(count)
+        assign_times = []
+        last_id = {}
+        switches = 0
+        for i, (hands, numbers) in enumerate(zip(stream, truth)):
+            start = time.perf_counter()
+            ids = identities.update(hands, i / args.fps, shape[0] / shape[1])
+            assign_times.append((time.perf_counter() - start) * 1e6)
+            for number, hand_id in zip(numbers, ids):
+                switches += number in last_id and hand_id != last_id[number]
+                last_id[number] = hand_id
+
+        # Identities, lanes, gestures, hit tests and drawing of every lane
+        clock = FrameClock(args.fps)
+        session = MultiUserSession(compile_menu(DEFAULT_MENU), count, clock,
+                                   make_gestures=lambda: GestureEngine(cursor=create_cursor_filter(CURSOR)))
+        frame = np.zeros(shape, dtype=np.uint8)
+        step_times = []
+        for hands in stream:
+            frame.fill(40)
+            start = time.perf_counter()
+            session.step(frame, hands)
+            step_times.append((time.perf_counter() - start) * 1000)
+            clock.tick()
+
+        assign = summarize(assign_times)
+        step = summarize(step_times)
+        rows.append({'hands': count, 'frame': f"{shape[1]}x{shape[0]}", 'assign_us_p50': assign['p50'],
+                     'assign_us_p99': assign['p99'], 'step_ms_p50': step['p50'], 'step_ms_p99': step['p99'],
+                     'step_ms_per_hand': step['p50'] / count, 'id_switches': switches,
+                     'orders': session.orders_completed})
+
+    print_table(rows, list(rows[0]))
+
+
+def synthetic_order_year(store, orders_per_day, items, start, days=365, seed=0):
+    """Append a year of synthetic orders, lines and session events to an analytics.ColumnStore."""
+    from analytics import EVENT_CODES
+
+    rng = np.random.default_rng(seed)
+    count = orders_per_day * days
+    # Orders cluster around lunch and dinner
+    hours = np.where(rng.random(count) < 0.55, rng.normal(12.5, 1.2, count), rng.normal(19, 1.5, count))
+    times = np.sort(start + rng.integers(0, days, count) * 86400 + np.clip(hours, 7, 23) * 3600)
+    durations = rng.gamma(3.0, 15.0, count)
+    units_per_line = rng.integers(1, 4, (count, 3))
+    line_counts = rng.integers(1, 4, count)
+    mask = np.arange(3) < line_counts[:, None]
+    line_order = np.repeat(np.arange(count), line_counts)
+    line_items = np.minimum(rng.zipf(1.5, len(line_order)) - 1, len(items) - 1)
+    line_quantity = units_per_line[mask]
+    prices = rng.integers(300, 1500, len(items))
+    line_totals = prices[line_items] * line_quantity
+    totals = np.bincount(line_order, weights=line_totals, minlength=count).astype(np.int64)
+
+    for item in items:
+        store.item_code(item)
+    first = store.append('orders', time=times, started=times - durations, total=totals,
+                         units=np.bincount(line_order, weights=line_quantity, minlength=count))
+    store.append('lines', time=times[line_order], order=first + line_order, item=line_items, quantity=line_quantity)
+    store.append('events', time=np.concatenate([times - durations, times]),
+                 kind=np.repeat([EVENT_CODES['start'], EVENT_CODES['order']], count), item=np.full(2 * count, -1),
+                 total=np.concatenate([np.zeros(count, dtype=np.int64), totals]))
+
+
+def bench_analytics(args):
+    """Load and aggregate query times of the order analytics store over a year of synthetic orders."""
+    import tempfile
+
+    from analytics import (ColumnStore, OrderAnalytics, Tables, basket_stats, checkout_times, find_stores,
+                           item_popularity_by_hour, session_stats)
+
+    items = [f"item{i:03d}" for i in range(args.items)]
+    start = time.mktime((2025, 1, 1, 0, 0, 0, 0, 0, -1))
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for kiosk in range(args.kiosks):
+            store = ColumnStore(f"{directory}/kiosk{kiosk:02d}")
+            synthetic_order_year(store, args.orders_per_day, items, start, seed=kiosk)
+            store.close()
+
+        # What the kiosk pays to record an order: queueing on the render thread, appending on the writer
+        recorder = OrderAnalytics(f"{directory}/kiosk{args.kiosks:02d}")
+        recorder.start()
+        enqueue_us = []
+        for i in range(1000):
+            order = {'items': {items[i % len(items)]: 1, items[0]: 2}, 'total': 1234, 'time': start + i,
+                     'started': start + i - 30}
+            begin = time.perf_counter()
+            recorder.record_order(order)
+            enqueue_us.append((time.perf_counter() - begin) * 1e6)
+        recorder.stop()
+        print(f"Recording an order: enqueue p99 {summarize(enqueue_us)['p99']:.1f} us, "
+              f"append p99 {recorder.stats()['analytics_append_us_p99']:.1f} us")
+
+        begin = time.perf_counter()
+        tables = Tables(find_stores([directory]))
+        rows.append({'step': 'load (memory map)', 'ms': (time.perf_counter() - begin) * 1000})
+        print(f"{len(tables.kiosks)} kiosks, {len(tables.orders['time'])} orders, {len(tables.lines['time'])} lines, "
+              f"{len(tables.events['time'])} events")
+
+        june = dict(since=time.mktime((2025, 6, 1, 0, 0, 0, 0, 0, -1)),
+                    until=time.mktime((2025, 7, 1, 0, 0, 0, 0, 0, -1)))
+        queries = [
+            ('popularity by hour', lambda: item_popularity_by_hour(tables)),
+            ('popularity by hour, June', lambda: item_popularity_by_hour(tables, **june)),
+            ('basket per kiosk', lambda: basket_stats(tables)),
+            ('basket, one kiosk', lambda: basket_stats(tables, kiosk='kiosk00')),
+            ('time to checkout', lambda: checkout_times(tables)),
+            ('sessions', lambda: session_stats(tables)),
+        ]
+        for name, query in queries:
+            times = []
+            for _ in range(args.repeat):
+                begin = time.perf_counter()
+                query()
+                times.append((time.perf_counter() - begin) * 1000)
+            rows.append({'step': name, 'ms': float(np.median(times))})
+        del tables
+
+    print_table(rows, ['step', 'ms'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Touchless Tray benchmarks (times in ms)")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    sinks = subparsers.add_parser("sinks", help="compare display sinks")
+    sinks.add_argument("--frames", type=int, default=300)
+    sinks.add_argument("--warmup", type=int, default=10)
+    sinks.add_argument("--sinks", nargs="*", help="sink names to compare (default: all)")
+    sinks.set_defaults(func=bench_sinks)
+
+    roi = subparsers.add_parser("roi", help="adaptive ROI tracking vs full-frame inference on clips")
+    roi.add_argument("clips", nargs="+", help="recorded video files")
+    roi.add_argument("--limit", type=int, help="frames to read per clip")
+    roi.add_argument("--full-frame-interval", type=int, default=30)
+    roi.add_argument("--skip-frames", type=int, default=1)
+    roi.add_argument("--padding", type=float, default=0.3)
+    roi.add_argument("--scale", type=float, default=1.0)
+    roi.set_defaults(func=bench_roi)
+
+    scenarios = subparsers.add_parser("scenarios", help="headless FPS and latency of canned scenarios")
+    scenarios.add_argument("--scenarios", nargs="*", help="scenario names (default: all)")
+    scenarios.add_argument("--fps", type=float, default=30.0, help="simulated camera frame rate")
+    scenarios.add_argument("--sources", nargs="*", help="also run these clips/recordings through the detector")
+    scenarios.add_argument("--limit", type=int, help="frames to run per source")
+    scenarios.set_defaults(func=bench_scenarios)
+
+    menus = subparsers.add_parser("menus", help="add items screen cost for growing menus")
+    menus.add_argument("--sizes", type=int, nargs="*", default=[10, 100, 1000], help="menu sizes")
+    menus.add_argument("--frames", type=int, default=300)
+    menus.add_argument("--warmup", type=int, default=30)
+    menus.add_argument("--relayouts", type=int, default=50)
+    menus.set_defaults(func=bench_menus)
+
+    cart = subparsers.add_parser("cart", help="cart engine add/remove throughput for large carts")
+    cart.add_argument("--sizes", type=int, nargs="*", default=[10, 100, 1000], help="distinct items in the cart")
+    cart.add_argument("--ops", type=int, default=20000, help="add/remove operations per cart")
+    cart.add_argument("--reads-per-op", type=int, default=5, help="summary reads after each operation")
+    cart.set_defaults(func=bench_cart)
+
+    journal = subparsers.add_parser("journal", help="order journal write latency and its effect on frame time")
+    journal.add_argument("--frames", type=int, default=600)
+    journal.add_argument("--ops-per-frame", type=int, default=5, help="cart changes per frame")
+    journal.add_argument("--fsync-intervals", type=float, nargs="*", default=[0.0, 0.05, 0.2])
+    journal.add_argument("--segment-bytes", type=int, default=64 << 10)
+    journal.set_defaults(func=bench_journal)
+
+    pos = subparsers.add_parser("pos", help="POS submission load test against a local stub endpoint")
+    pos.add_argument("--orders", type=int, default=2000)
+    pos.add_argument("--rate", type=float, default=500.0, help="orders per second (bursts ignore it)")
+    pos.add_argument("--latency", type=float, default=0.005, help="stub response time in seconds")
+    pos.add_argument("--failure-rate", type=float, default=0.2, help="share of 503s in the flaky run")
+    pos.add_argument("--outage", type=float, default=1.0, help="seconds the stub is down in the outage run")
+    pos.add_argument("--connections", type=int, default=4)
+    pos.add_argument("--max-batch", type=int, default=16)
+    pos.add_argument("--queue-size", type=int, default=256)
+    pos.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for delivery per run")
+    pos.set_defaults(func=bench_pos)
+
+    gestures = subparsers.add_parser("gestures", help="gesture engine cost per frame on landmark streams")
+    gestures.add_argument("recordings", nargs="*", help=".npz landmark recordings (see headless.py --record)")
+    gestures.add_argument("--frames", type=int, default=3000, help="frames of the synthetic stream")
+    gestures.add_argument("--fps", type=float, default=30.0, help="frame rate of the streams")
+    gestures.set_defaults(func=bench_gestures)
+
+    cursor = subparsers.add_parser("cursor", help="jitter and lag of the cursor filters on fingertip traces")
+    cursor.add_argument("recordings", nargs="*", help=".npz landmark recordings (see headless.py --record)")
+    cursor.add_argument("--seconds", type=float, default=60.0, help="length of the synthetic trace")
+    cursor.add_argument("--fps", type=float, default=30.0, help="frame rate of the traces")
+    cursor.add_argument("--noise", type=float, default=3.0, help="landmark jitter of the synthetic trace in pixels")
+    cursor.add_argument("--latency-ms", type=float, default=60.0, help="capture-to-display latency to compensate")
+    cursor.set_defaults(func=bench_cursor)
+
+    power = subparsers.add_parser("power", help="CPU use of always-on vs motion-gated inference on idle/busy footage")
+    power.add_argument("--seconds", type=float, default=10.0, help="length of each run")
+    power.add_argument("--fps", type=float, default=30.0, help="full frame rate")
+    power.add_argument("--idle-fps", type=float, default=5.0, help="attract mode frame rate")
+    power.add_argument("--idle-after", type=float, default=2.0, help="seconds without a hand before idling")
+    power.add_argument("--inference-ms", type=float, default=20.0, help="CPU ms the stand-in hand model burns per frame")
+    power.add_argument("--mediapipe", action="store_true", help="run the real hand model instead of the stand-in")
+    power.set_defaults(func=bench_power)
+
+    stream = subparsers.add_parser("stream", help="MJPEG streaming cost in the render loop, with fast and slow clients")
+    stream.add_argument("--seconds", type=float, default=5.0)
+    stream.add_argument("--fps", type=float, default=30.0)
+    stream.add_argument("--width", type=int, default=640)
+    stream.add_argument("--height", type=int, default=480)
+    stream.add_argument("--moving-frames", type=int, default=20, help="frames out of every 30 that change")
+    stream.add_argument("--slow-kbps", type=float, default=300.0, help="read rate of the slow client")
+    stream.add_argument("--quality", type=int, default=80)
+    stream.add_argument("--encoders", type=int, default=2)
+    stream.set_defaults(func=bench_stream)
+
+    detectors = subparsers.add_parser("detectors", help="throughput, latency and landmark agreement of the "
+                                                        "hand detection backends on one clip")
+    detectors.add_argument("clip", nargs="?", help="recorded clip (default: synthetic footage)")
+    detectors.add_argument("--backends", default="mediapipe,onnx,mock",
+                           help="comma-separated backends; the first one that runs is the reference "
+                                "(onnx:opencv or onnx:onnxruntime picks the ONNX engine)")
+    detectors.add_argument("--limit", type=int, default=300, help="frames to use")
+    detectors.add_argument("--max-hands", type=int, default=1)
+    detectors.set_defaults(func=bench_detectors)
+
+    hands = subparsers.add_parser("hands", help="multi-user tracking cost against hand count on synthetic streams")
+    hands.add_argument("--max-hands", type=int, default=4)
+    hands.add_argument("--frames", type=int, default=900)
+    hands.add_argument("--fps", type=float, default=30.0)
+    hands.add_argument("--lane-width", type=int, default=640, help="frame width per hand")
+    hands.add_argument("--miss", type=float, default=0.05, help="chance a hand is missed in a frame")
+    hands.set_defaults(func=bench_hands)
+
+    analytics = subparsers.add_parser("analytics", help="order analytics store load and query times over a "
+                                                        "synthetic year of orders")
+    analytics.add_argument("--kiosks", type=int, default=8)
+    analytics.add_argument("--orders-per-day", type=int, default=500)
+    analytics.add_argument("--items", type=int, default=100)
+    analytics.add_argument("--repeat", type=int, default=5)
+    analytics.set_defaults(func=bench_analytics)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
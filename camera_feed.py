@@ -1,24 +1,29 @@
 import cv2
-import mediapipe as mp
-import time
+from frame_source import open_source
 from hand_tracking import HandTracker
 
 class CameraFeed:
-    def __init__(self, cart_manager):
+    def __init__(self, cart_manager, source='camera'):
         self.cart_manager = cart_manager
-        self.cap = cv2.VideoCapture(0)
+        self.source = open_source(source, loop=True)
         self.hand_tracker = HandTracker()
 
     def start_camera_loop(self, label):
         """Continuously update the camera feed."""
         def update():
-            ret, frame = self.cap.read()
-            if ret:
-                frame = cv2.flip(frame, 1)
+            source_frame = self.source.read()
+            if source_frame is not None:
+                frame = cv2.flip(cv2.cvtColor(source_frame.rgb, cv2.COLOR_RGB2BGR), 1)
+                self.source.release(source_frame)
                 index_finger_pos = self.hand_tracker.detect_hand(frame)
                 self.cart_manager.process_gesture(index_finger_pos)
                 cv2.imshow("Camera Feed", frame)
-            
+
             label.after(10, update)
 
         update()
+
+    def close(self):
+        """Release the frame source and the hand tracker."""
+        self.source.close()
+        self.hand_tracker.close()
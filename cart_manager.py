@@ -1,32 +1,149 @@
+from collections import namedtuple
+
+from menu_loader import format_price
+
+# Cart change kinds
+ADDED = 'added'
+REMOVED = 'removed'
+DELETED = 'deleted'
+CLEARED = 'cleared'
+REPRICED = 'repriced'
+RESTORED = 'restored'
+
+# A cart change: its kind, the item (None for whole-cart changes), the item's
+# new quantity, and the cart's new total in cents
+CartEvent = namedtuple('CartEvent', ['kind', 'item', 'quantity', 'total'])
+
+
 class CartManager:
+    """The cart of one ordering session, priced from a menu_loader.CompiledMenu.
+
+    Quantities live in cart, item -> quantity, in the order items were
+    first added. The total in integer cents and each item's summary line
+    are updated with each change, not recomputed. Every change bumps
+    version and is sent as a CartEvent to the subscribed listeners, so
+    displays redraw only when the cart really changed. The joined
+    summary text is cached per version.
+    """
+
     def __init__(self, menu):
         self.menu = menu
         self.cart = {}
+        self.total = 0
+        self.version = 0
+        self.listeners = []
+        self._line_text = {}
+        self._lines = ()
+        self._text = ""
+        self._lines_version = 0
+        self._text_version = 0
+
+    def subscribe(self, listener):
+        """Call listener(event) after every change."""
+        self.listeners.append(listener)
+
+    def _line(self, item, quantity):
+        return f"{item} x{quantity}: {format_price(self.menu.price(item) * quantity)}\n"
+
+    def _changed(self, kind, item=None):
+        if item is not None:
+            quantity = self.cart.get(item)
+            if quantity is None:
+                self._line_text.pop(item, None)
+            else:
+                self._line_text[item] = self._line(item, quantity)
+        self.version += 1
+        event = CartEvent(kind, item, self.cart.get(item, 0), self.total)
+        for listener in self.listeners:
+            listener(event)
+
+    def __len__(self):
+        return len(self.cart)
+
+    def __contains__(self, item):
+        return item in self.cart
+
+    def __iter__(self):
+        return iter(self.cart)
+
+    def items(self):
+        """(item, quantity) pairs."""
+        return self.cart.items()
+
+    def quantity(self, item):
+        return self.cart.get(item, 0)
 
     def add_item(self, item):
-        """Add an item to the cart."""
-        if item in self.cart:
-            self.cart[item] += 1
-        else:
-            self.cart[item] = 1
+        """Add one of an item to the cart; items not on the menu are ignored."""
+        if item not in self.menu:
+            return False
+        self.cart[item] = self.cart.get(item, 0) + 1
+        self.total += self.menu.price(item)
+        self._changed(ADDED, item)
+        return True
 
     def remove_item(self, item):
-        """Remove an item from the cart."""
-        if item in self.cart:
-            if self.cart[item] > 1:
-                self.cart[item] -= 1
-            else:
-                del self.cart[item]
+        """Remove one of an item from the cart."""
+        if item not in self.cart:
+            return False
+        if self.cart[item] > 1:
+            self.cart[item] -= 1
+        else:
+            del self.cart[item]
+        self.total -= self.menu.price(item)
+        self._changed(REMOVED, item)
+        return True
+
+    def delete_item(self, item):
+        """Remove every one of an item from the cart."""
+        if item not in self.cart:
+            return False
+        self.total -= self.menu.price(item) * self.cart.pop(item)
+        self._changed(DELETED, item)
+        return True
+
+    def clear(self):
+        """Empty the cart."""
+        if not self.cart:
+            return
+        self.cart.clear()
+        self._line_text.clear()
+        self.total = 0
+        self._changed(CLEARED)
+
+    def restore(self, quantities):
+        """Replace the cart with saved item quantities, skipping items not on the menu."""
+        self.cart = {item: quantity for item, quantity in quantities.items() if item in self.menu and quantity > 0}
+        self.total = sum(self.menu.price(item) * quantity for item, quantity in self.cart.items())
+        self._line_text = {item: self._line(item, quantity) for item, quantity in self.cart.items()}
+        self._changed(RESTORED)
+
+    def set_menu(self, menu):
+        """Price the cart from a new menu, dropping items it no longer has; return the dropped items."""
+        removed = [item for item in self.cart if item not in menu]
+        for item in removed:
+            del self.cart[item]
+        self.menu = menu
+        self.total = sum(menu.price(item) * quantity for item, quantity in self.cart.items())
+        self._line_text = {item: self._line(item, quantity) for item, quantity in self.cart.items()}
+        if removed or self.cart:
+            self._changed(REPRICED)
+        return removed
+
+    def lines(self):
+        """(item, quantity, line total in cents) per cart item, cached until the next change."""
+        if self._lines_version != self.version:
+            self._lines = tuple((item, quantity, self.menu.price(item) * quantity)
+                                for item, quantity in self.cart.items())
+            self._lines_version = self.version
+        return self._lines
 
     def get_cart_summary(self):
-        """Return cart items and total price."""
-        cart_text = ""
-        total = 0
-        for item, quantity in self.cart.items():
-            price = self.menu.get(item, 0) * quantity
-            total += price
-            cart_text += f"{item} x{quantity}: ${price:.2f}\n"
-        return cart_text, total
+        """Return the cart text and the total in cents; the text is cached until the next change."""
+        if self._text_version != self.version:
+            self._text = "".join(self._line_text.values())
+            self._text_version = self.version
+        return self._text, self.total
 
     def process_gesture(self, index_finger_pos):
         """Processes gestures based on index finger position."""
@@ -6,3 +6,137 @@ COLORS = {
     'TEXT': (236, 240, 241),  # White
     'HOVER': (39, 174, 96)  # Darker Green
 }
+
+# Menu file and hot reload
+MENU = {
+    'PATH': 'menu.json',
+    'RELOAD_INTERVAL': 1.0  # Seconds between checks of the menu file's mtime
+}
+
+# Order journal (None disables it)
+JOURNAL = {
+    'DIRECTORY': 'journal',
+    'FSYNC_INTERVAL': 0.2,  # Seconds between group commits
+    'SEGMENT_BYTES': 1 << 20,  # Segment size before rotation
+    'KEEP_SEGMENTS': None  # Newest segments to keep (None keeps all)
+}
+
+# Columnar store of completed orders and session events for sales stats
+# (query with analytics.py; DIRECTORY None disables it)
+ANALYTICS = {
+    'DIRECTORY': 'analytics',  # One subdirectory per kiosk
+    'KIOSK': None,  # This kiosk's subdirectory (None: the host name)
+    'FLUSH_INTERVAL': 1.0  # Seconds between writes to disk
+}
+
+# Kitchen/POS order submission (URL None disables it)
+POS = {
+    'URL': None,  # e.g. 'http://127.0.0.1:8099/orders' for pos_stub.py
+    'SPOOL_DIRECTORY': 'pos_spool',  # Undeliverable orders wait here
+    'QUEUE_SIZE': 256,  # Orders waiting in memory before spilling to disk
+    'MAX_BATCH': 16,  # Orders per request
+    'CONNECTIONS': 2,  # Pooled keep-alive connections
+    'MAX_RETRIES': 4  # Retries before a batch is spilled
+}
+
+# Frame pipeline settings
+PIPELINE = {
+    'TARGET_FPS': 60,
+    'STATS_INTERVAL': 5.0  # Seconds between pipeline counter reports
+}
+
+# Display settings
+DISPLAY = {
+    'SINK': 'ppm',  # One of display_sink.SINKS: 'pil', 'paste', 'ppm', 'opencv', 'mjpeg'
+    'SIZE': (640, 480)  # Width, height frames are shown at, whatever the capture size (None: capture size)
+}
+
+# Idle power saving: motion-gated inference and a low-FPS attract mode
+PRESENCE = {
+    'ENABLED': True,
+    'IDLE_AFTER': 10.0,  # Seconds without a hand before the attract mode
+    'IDLE_FPS': 5,  # Frame rate in attract mode
+    'HOLD': 1.0,  # Seconds a hand keeps inference running without motion
+    'MOTION_SIZE': (64, 48),  # Frame size the motion detector compares
+    'MOTION_THRESHOLD': 15,  # Grey levels a pixel must change by
+    'MOTION_FRACTION': 0.01  # Share of changed pixels that counts as motion
+}
+
+# Adaptive quality (--adaptive-quality): steps through LEVELS to hold the
+# capture-to-display budget
+QUALITY = {
+    'BUDGET_MS': 60.0,  # Capture-to-display time to hold (p90)
+    'WINDOW': 30,  # Frames measured before each decision
+    'HEADROOM': 0.6,  # Step up once p90 is under this share of the budget
+    'UPGRADE_WAIT': 5.0,  # Seconds at a level before stepping up (doubles after a failed upgrade, up to 60)
+    'UPGRADE_RESET': 120.0,  # Seconds without a step down after which the wait is back to UPGRADE_WAIT
+    'BUFFER_SIZE': 1,  # Driver frame buffer; 1 keeps only the newest frame
+    'START_LEVEL': 1,
+    # Best to cheapest: capture width, height and FOURCC, inference scale,
+    # model complexity, tracking confidence, target FPS
+    'LEVELS': [
+        (1280, 720, 'MJPG', 0.5, 1, 0.7, 30),
+        (640, 480, 'MJPG', 1.0, 1, 0.7, 30),
+        (640, 480, 'MJPG', 0.75, 0, 0.7, 30),
+        (640, 480, 'YUYV', 0.5, 0, 0.5, 24),
+        (320, 240, 'YUYV', 1.0, 0, 0.5, 15)
+    ]
+}
+
+# MJPEG streaming of the rendered display (--display mjpeg or --stream)
+STREAM = {
+    'HOST': '127.0.0.1',  # '0.0.0.0' to serve other machines
+    'PORT': 8090,
+    'QUALITY': 80,  # JPEG quality
+    'ENCODERS': 2  # JPEG encoder threads
+}
+
+# Hand detection backend (see detectors.py; compare backends with benchmark.py detectors)
+DETECTOR = {
+    'BACKEND': 'mediapipe',  # 'mediapipe', 'onnx' or 'mock'
+    'ONNX_MODEL': 'models/hand_landmark.onnx',  # ONNX export of MediaPipe's hand landmark model (fp16/int8 work too)
+    'ONNX_ENGINE': 'auto',  # 'onnxruntime', 'opencv' (OpenCV DNN) or 'auto' (ONNX Runtime if installed)
+    'ONNX_LAYOUT': None,  # 'NCHW' or 'NHWC'; None reads it from the model, or assumes NCHW under OpenCV
+    'ONNX_OUTPUTS': None,  # (landmarks, score) output names of the landmark model; None picks them by name and size
+    'PALM_MODEL': 'models/palm_detection.onnx',  # ONNX export of MediaPipe's palm detection model; None: landmarks only
+    'THREADS': 1,  # ONNX Runtime threads per detector
+    'ROI_PADDING': 0.5,  # Crop padding around the previous frame's hand, as a fraction of its size
+    'MOCK_STREAM': None,  # .npz landmark recording the mock replays; None follows the frame's intensity centroid
+    'MOCK_COST_MS': 0.0  # CPU time the mock burns per call
+}
+
+# Several customers side by side at one wide-angle camera (main.py --users N);
+# widen DISPLAY['SIZE'] to about 640 pixels per customer
+MULTI_USER = {
+    'MAX_DISTANCE': 0.15,  # Largest centroid move between frames, in frame widths, that keeps a hand's identity
+    'FORGET_AFTER': 1.0  # Seconds a hand may be missing before its identity ends and its lane is freed
+}
+
+# Adaptive (ROI-cropped) hand tracking settings
+TRACKING = {
+    'FULL_FRAME_INTERVAL': 30,  # Inferences between full-frame searches
+    'SKIP_FRAMES': 1,  # Frames interpolated between inferences
+    'ROI_PADDING': 0.3,  # Crop padding as a fraction of the hand size
+    'ROI_SCALE': 1.0  # Downscale factor applied to the crop
+}
+
+# Cursor smoothing and latency compensation, tuned per kiosk
+# (see benchmark.py cursor for evaluating settings on recorded traces)
+CURSOR = {
+    'FILTER': 'one_euro',  # 'one_euro', 'kalman' or None for the raw fingertip
+    'PREDICT': True,  # Lead the cursor by the measured capture-to-display latency
+    'MAX_LEAD': 0.1,  # Seconds of latency compensated at most
+    'PREDICT_SPEED': 200.0,  # Pixels/s at which half the lead applies; slower hands get less
+    'RESET_AFTER': 0.3,  # Seconds without a hand before the filter forgets its history
+    'MIN_CUTOFF': 1.0,  # One Euro: cutoff in Hz while the hand rests
+    'BETA': 0.03,  # One Euro: cutoff increase per pixel/s of speed
+    'D_CUTOFF': 3.0,  # One Euro: cutoff in Hz for the speed estimate
+    'ACCELERATION_NOISE': 100000.0,  # Kalman: unmodelled acceleration, pixels^2/s^3
+    'MEASUREMENT_NOISE': 5.0  # Kalman: landmark jitter in pixels
+}
+
+# Frame timing instrumentation
+METRICS = {
+    'HISTOGRAM_SIZE': 256,  # Recent samples kept per stage
+    'EXPORT_INTERVAL': 10.0  # Seconds between metrics file writes
+}
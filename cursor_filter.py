@@ -0,0 +1,160 @@
+import math
+
+
+def smoothing_factor(cutoff, dt):
+    """Exponential smoothing factor of a first-order low-pass filter at cutoff Hz."""
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    """One Euro filter (Casiez et al., CHI 2012) for a 2D pointer in pixels.
+
+    A low-pass filter whose cutoff rises with speed: min_cutoff Hz while
+    the pointer rests, which removes jitter, plus beta Hz per pixel per
+    second of (d_cutoff-smoothed) speed, which removes lag while it
+    moves. velocity is the smoothed speed in pixels per second.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.03, d_cutoff=3.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.position = None
+        self.velocity = (0.0, 0.0)
+        self.time = 0.0
+
+    def update(self, point, now):
+        """Filter a new measurement taken at now seconds; return the smoothed (x, y)."""
+        if self.position is None:
+            self.position = (float(point[0]), float(point[1]))
+            self.time = now
+            return self.position
+        dt = now - self.time
+        if dt <= 0:
+            return self.position
+        (x, y), (vx, vy) = self.position, self.velocity
+
+        a = smoothing_factor(self.d_cutoff, dt)
+        vx += a * ((point[0] - x) / dt - vx)
+        vy += a * ((point[1] - y) / dt - vy)
+
+        a = smoothing_factor(self.min_cutoff + self.beta * math.hypot(vx, vy), dt)
+        self.position = (x + a * (point[0] - x), y + a * (point[1] - y))
+        self.velocity = (vx, vy)
+        self.time = now
+        return self.position
+
+
+class ConstantVelocityKalman:
+    """Kalman filter with a constant-velocity motion model, per axis, for a 2D pointer.
+
+    acceleration_noise is the spectral density of the unmodelled
+    acceleration (pixels^2/s^3): higher follows direction changes
+    sooner, lower smooths more. measurement_noise is the landmark
+    jitter's standard deviation in pixels. Both axes share one
+    covariance, since they see the same model and measurement times.
+    """
+
+    def __init__(self, acceleration_noise=100000.0, measurement_noise=5.0):
+        self.acceleration_noise = acceleration_noise
+        self.measurement_noise = measurement_noise
+        self.reset()
+
+    def reset(self):
+        self.position = None
+        self.velocity = (0.0, 0.0)
+        self.time = 0.0
+
+    def update(self, point, now):
+        """Fold in a new measurement taken at now seconds; return the filtered (x, y)."""
+        r = self.measurement_noise ** 2
+        if self.position is None:
+            self.position = (float(point[0]), float(point[1]))
+            self.velocity = (0.0, 0.0)
+            # Position as good as one measurement; velocity unknown
+            self.covariance = (r, 0.0, 1e6)
+            self.time = now
+            return self.position
+        dt = max(now - self.time, 0.0)
+        (x, y), (vx, vy) = self.position, self.velocity
+        p00, p01, p11 = self.covariance
+
+        # Predict
+        q = self.acceleration_noise
+        x, y = x + vx * dt, y + vy * dt
+        p00 += 2 * dt * p01 + dt * dt * p11 + q * dt ** 3 / 3
+        p01 += dt * p11 + q * dt * dt / 2
+        p11 += q * dt
+
+        # Correct
+        k0 = p00 / (p00 + r)
+        k1 = p01 / (p00 + r)
+        ex, ey = point[0] - x, point[1] - y
+        self.position = (x + k0 * ex, y + k0 * ey)
+        self.velocity = (vx + k1 * ex, vy + k1 * ey)
+        self.covariance = ((1 - k0) * p00, (1 - k0) * p01, p11 - k1 * p01)
+        self.time = now
+        return self.position
+
+
+# Smoothing filters by name
+FILTERS = {'one_euro': OneEuroFilter, 'kalman': ConstantVelocityKalman}
+
+
+class CursorFilter:
+    """Smooths the pointer and leads it by the capture-to-display latency.
+
+    smoother is a OneEuroFilter or ConstantVelocityKalman. With predict
+    set, the smoothed position is extrapolated along the filter's
+    velocity by the measured latency, capped at max_lead seconds, so
+    the cursor is drawn where the hand is when the frame is shown
+    rather than where it was when it was captured. The lead fades in
+    with speed, reaching half at predict_speed pixels per second, so a
+    resting hand's velocity noise does not shake the cursor. A pointer
+    missing for more than reset_after seconds starts over without
+    history.
+    """
+
+    def __init__(self, smoother, predict=True, max_lead=0.1, predict_speed=200.0, reset_after=0.3):
+        self.smoother = smoother
+        self.predict = predict
+        self.max_lead = max_lead
+        self.predict_speed = predict_speed
+        self.reset_after = reset_after
+
+    def reset(self):
+        self.smoother.reset()
+
+    def __call__(self, point, now, latency=0.0, shape=None):
+        """Filtered pointer (x, y) in whole pixels, clipped to shape if given."""
+        if self.smoother.position is not None and now - self.smoother.time > self.reset_after:
+            self.smoother.reset()
+        x, y = self.smoother.update(point, now)
+        if self.predict:
+            vx, vy = self.smoother.velocity
+            speed2 = vx * vx + vy * vy
+            lead = min(max(latency, 0.0), self.max_lead) * speed2 / (speed2 + self.predict_speed ** 2 or 1.0)
+            x, y = x + vx * lead, y + vy * lead
+        if shape is not None:
+            x = min(max(x, 0), shape[1] - 1)
+            y = min(max(y, 0), shape[0] - 1)
+        return int(round(x)), int(round(y))
+
+
+def create_cursor_filter(settings):
+    """A CursorFilter from a config.CURSOR-style dict, or None when FILTER is None."""
+    name = settings['FILTER']
+    if name is None:
+        return None
+    if name == 'one_euro':
+        smoother = OneEuroFilter(settings['MIN_CUTOFF'], settings['BETA'], settings['D_CUTOFF'])
+    elif name == 'kalman':
+        smoother = ConstantVelocityKalman(settings['ACCELERATION_NOISE'], settings['MEASUREMENT_NOISE'])
+    else:
+        raise ValueError(f"Unknown cursor filter {name!r}; expected one of {sorted(FILTERS)}")
+    return CursorFilter(smoother, settings['PREDICT'], settings['MAX_LEAD'], settings['PREDICT_SPEED'],
+                        settings['RESET_AFTER'])
@@ -0,0 +1,382 @@
+import math
+import os
+import time
+
+import cv2
+import numpy as np
+
+from frame_source import load_landmark_stream, synthetic_hand
+from hand_tracking import HandDetector, HandTracker, NUM_LANDMARKS
+
+# Landmarks a hand's direction is measured between, as MediaPipe does
+WRIST = 0
+MIDDLE_FINGER_MCP = 9
+
+# SSD strides of MediaPipe's palm detection exports: 192x192 (lite/full)
+# and the older 256x256 model. The one whose anchor count matches the
+# model's output is used.
+PALM_STRIDES = ((8, 16, 16, 16), (8, 16, 32, 32, 32))
+
+
+class OnnxModel:
+    """One ONNX model on ONNX Runtime or OpenCV DNN, fed from a reused float32 blob.
+
+    engine is 'onnxruntime', 'opencv' or 'auto', which prefers ONNX
+    Runtime when it is installed. layout is the input layout, 'NCHW' or
+    'NHWC'; None reads it from the model under ONNX Runtime and assumes
+    NCHW under OpenCV. run() returns the outputs by name.
+    """
+
+    def __init__(self, path, engine='auto', threads=1, layout=None, input_size=224):
+        if engine == 'auto':
+            try:
+                import onnxruntime  # noqa: F401
+                engine = 'onnxruntime'
+            except ImportError:
+                engine = 'opencv'
+
+        if engine == 'onnxruntime':
+            import onnxruntime
+            session_options = onnxruntime.SessionOptions()
+            session_options.intra_op_num_threads = threads
+            session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self.session = onnxruntime.InferenceSession(path, session_options, providers=['CPUExecutionProvider'])
+            model_input = self.session.get_inputs()[0]
+            self.input_name = model_input.name
+            self.output_names = [output.name for output in self.session.get_outputs()]
+            if layout is None:
+                layout = 'NCHW' if model_input.shape[1] == 3 else 'NHWC'
+            size = model_input.shape[2] if layout == 'NCHW' else model_input.shape[1]
+            if isinstance(size, int):
+                input_size = size
+        elif engine == 'opencv':
+            self.net = cv2.dnn.readNetFromONNX(path)
+            self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+            self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+            self.output_names = list(self.net.getUnconnectedOutLayersNames())
+            layout = layout or 'NCHW'
+        else:
+            raise ValueError(f"Unknown ONNX engine {engine!r}; expected 'onnxruntime', 'opencv' or 'auto'")
+
+        self.engine = engine
+        self.layout = layout
+        self.input_size = input_size
+        self.crop = np.empty((input_size, input_size, 3), dtype=np.uint8)
+        blob_shape = (1, 3, input_size, input_size) if layout == 'NCHW' else (1, input_size, input_size, 3)
+        self.blob = np.empty(blob_shape, dtype=np.float32)
+
+    def load_crop(self):
+        """Copy the crop buffer into the blob as RGB in [0, 1]."""
+        pixels = self.crop.transpose(2, 0, 1) if self.layout == 'NCHW' else self.crop
+        np.multiply(pixels, 1 / 255, out=self.blob[0], casting='unsafe')
+
+    def run(self):
+        """Run the model on the blob; return {output name: float32 array}."""
+        if self.engine == 'onnxruntime':
+            outputs = self.session.run(None, {self.input_name: self.blob})
+        else:
+            self.net.setInput(self.blob)
+            outputs = self.net.forward(self.output_names)
+        return {name: np.asarray(output, dtype=np.float32) for name, output in zip(self.output_names, outputs)}
+
+
+def crop_transform(roi, size):
+    """Affine (2, 3) matrix taking frame pixels into a size x size crop of a rotated square ROI.
+
+    roi is (centre x, centre y, side, rotation): pixels, and radians
+    clockwise, so a hand pointing rotation away from straight up is
+    upright in the crop.
+    """
+    cx, cy, side, rotation = roi
+    scale = size / side
+    cos, sin = math.cos(rotation) * scale, math.sin(rotation) * scale
+    return np.float32([[cos, sin, size / 2 - cos * cx - sin * cy],
+                       [-sin, cos, size / 2 + sin * cx - cos * cy]])
+
+
+def crop_to_frame(points, roi, size):
+    """Map (n, 2) crop pixel coordinates back into frame pixels."""
+    cx, cy, side, rotation = roi
+    scale = side / size
+    cos, sin = math.cos(rotation), math.sin(rotation)
+    x, y = (points[:, 0] - size / 2) * scale, (points[:, 1] - size / 2) * scale
+    return np.stack([cx + cos * x - sin * y, cy + sin * x + cos * y], axis=1)
+
+
+def hand_rotation(start, end):
+    """Clockwise angle in radians from straight up to the direction start -> end (pixel coordinates)."""
+    return math.atan2(end[0] - start[0], start[1] - end[1])
+
+
+def palm_anchors(size, count):
+    """(count, 2) normalized anchor centres of a palm detection model with size x size input."""
+    for strides in PALM_STRIDES:
+        anchors = []
+        for stride in sorted(set(strides)):
+            cells = math.ceil(size / stride)
+            per_cell = 2 * strides.count(stride)
+            y, x = np.mgrid[0:cells, 0:cells]
+            centres = np.stack([(x.ravel() + 0.5) / cells, (y.ravel() + 0.5) / cells], axis=1)
+            anchors.append(np.repeat(centres, per_cell, axis=0))
+        anchors = np.concatenate(anchors).astype(np.float32)
+        if len(anchors) == count:
+            return anchors
+    raise ValueError(f"Palm model has {count} anchors; no known anchor layout for {size}x{size} input gives that")
+
+
+class PalmDetector:
+    """First stage of MediaPipe's hand pipeline: finds palms and turns each into a hand crop.
+
+    Runs an ONNX export of MediaPipe's palm detection model (input RGB
+    in [0, 1], as palm_detection_lite/full take) on the frame
+    letterboxed to its square input. Each palm box scoring at least
+    min_score, after non-maximum suppression, becomes a rotated square
+    ROI around the whole hand: rotated so the wrist -> middle finger
+    line points up, shifted half a box towards the fingers and scaled
+    2.6 times, as MediaPipe's own graph does.
+    """
+
+    def __init__(self, model_path, engine='auto', threads=1, layout=None, iou_threshold=0.3):
+        self.model = OnnxModel(model_path, engine, threads, layout, input_size=192)
+        self.iou_threshold = iou_threshold
+        self.anchors = None
+
+    def detect(self, rgb, max_hands, min_score=0.5):
+        """Return up to max_hands hand ROIs (centre x, centre y, side, rotation) in frame pixels, best first."""
+        h, w = rgb.shape[:2]
+        size = self.model.input_size
+        letterbox = (w / 2, h / 2, max(w, h), 0.0)
+        cv2.warpAffine(rgb, crop_transform(letterbox, size), (size, size), dst=self.model.crop,
+                       flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT)
+        self.model.load_crop()
+
+        # Boxes and keypoints are (1, anchors, 18), scores (1, anchors, 1)
+        boxes = scores = None
+        for output in self.model.run().values():
+            if output.shape[-1] == 18 and boxes is None:
+                boxes = output.reshape(-1, 18)
+            elif output.shape[-1] == 1 and output.size > 1 and scores is None:
+                scores = output.ravel()
+        if boxes is None or scores is None:
+            raise ValueError("The palm model has no (anchors, 18) box output and (anchors, 1) score output")
+        if self.anchors is None:
+            self.anchors = palm_anchors(size, len(scores))
+
+        scores = 1 / (1 + np.exp(-np.clip(scores, -100, 100)))
+        candidates = np.flatnonzero(scores >= min_score)
+        candidates = candidates[np.argsort(-scores[candidates])]
+        # Box centre, size and 7 keypoints, in crop pixels
+        decoded = boxes[candidates].copy()
+        offsets = self.anchors[candidates] * size
+        decoded[:, 0:2] += offsets
+        decoded[:, 4::2] += offsets[:, :1]
+        decoded[:, 5::2] += offsets[:, 1:]
+
+        rois = []
+        kept = []
+        for box in decoded:
+            if any(box_iou(box, other) > self.iou_threshold for other in kept):
+                continue
+            kept.append(box)
+            centre, wrist, middle = crop_to_frame(box[[0, 1, 4, 5, 8, 9]].reshape(3, 2), letterbox, size)
+            box_size = box[2:4] * max(w, h) / size
+            rotation = hand_rotation(wrist, middle)
+            # Half a box towards the fingers, along the hand
+            shift = 0.5 * box_size[1]
+            rois.append((float(centre[0] + shift * math.sin(rotation)), float(centre[1] - shift * math.cos(rotation)),
+                         float(2.6 * box_size.max()), rotation))
+            if len(rois) == max_hands:
+                break
+        return rois
+
+
+def box_iou(a, b):
+    """Intersection over union of two (centre x, centre y, width, height, ...) boxes."""
+    overlap_w = min(a[0] + a[2] / 2, b[0] + b[2] / 2) - max(a[0] - a[2] / 2, b[0] - b[2] / 2)
+    overlap_h = min(a[1] + a[3] / 2, b[1] + b[3] / 2) - max(a[1] - a[3] / 2, b[1] - b[3] / 2)
+    if overlap_w <= 0 or overlap_h <= 0:
+        return 0.0
+    overlap = overlap_w * overlap_h
+    return overlap / (a[2] * a[3] + b[2] * b[3] - overlap)
+
+
+class OnnxHandDetector(HandDetector):
+    """MediaPipe's two-stage hand pipeline on ONNX exports of its models, on the CPU.
+
+    engine is 'onnxruntime', 'opencv' (OpenCV DNN) or 'auto', which
+    prefers ONNX Runtime when it is installed. A float16 or int8
+    quantized export runs at reduced precision as is. layout is the
+    models' input layout, 'NCHW' or 'NHWC'; None reads it from each
+    model under ONNX Runtime and assumes NCHW under OpenCV.
+
+    The landmark model sees one rotated square crop per hand. A hand
+    found in the previous frame is cropped around its landmarks, padded
+    by padding times its size on each side and turned upright, as
+    MediaPipe's own tracking does. With no hand to follow, the palm
+    model (palm_model_path) finds hands in the whole frame. Without a
+    palm model the whole frame is letterboxed into one crop for the
+    landmark model alone, which only picks up a hand that covers a fair
+    part of the frame.
+
+    Landmark model outputs are chosen by name: outputs (landmarks name,
+    score name) if given, otherwise the first 63-value output whose name
+    doesn't mention world coordinates and the first scalar one whose
+    name doesn't mention handedness.
+    """
+
+    def __init__(self, model_path, engine='auto', threads=1, layout=None, input_size=224, padding=0.5,
+                 palm_model_path=None, outputs=None, max_num_hands=1, min_detection_confidence=0.7,
+                 min_tracking_confidence=0.7, static_image_mode=False, **options):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Hand landmark model {model_path!r} not found (DETECTOR['ONNX_MODEL'])")
+        if palm_model_path is not None and not os.path.exists(palm_model_path):
+            raise FileNotFoundError(f"Palm detection model {palm_model_path!r} not found (DETECTOR['PALM_MODEL'])")
+        self.model = OnnxModel(model_path, engine, threads, layout, input_size)
+        self.palm = PalmDetector(palm_model_path, engine, threads, layout) if palm_model_path else None
+        self.engine = self.model.engine
+        self.input_size = self.model.input_size
+        self.outputs = tuple(outputs) if outputs else None
+        self.padding = padding
+        self.max_num_hands = max_num_hands
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
+        self.static_image_mode = static_image_mode
+        self.tracked = []
+
+    def configure(self, **options):
+        """Change the confidence thresholds; model_complexity is fixed by the exported model."""
+        self.min_detection_confidence = options.get('min_detection_confidence', self.min_detection_confidence)
+        self.min_tracking_confidence = options.get('min_tracking_confidence', self.min_tracking_confidence)
+
+    def _select_outputs(self, outputs):
+        """Names of the landmark and score outputs, chosen once from the first run's outputs."""
+        if self.outputs is not None:
+            missing = [name for name in self.outputs if name not in outputs]
+            if missing:
+                raise ValueError(f"The landmark model has no output {missing[0]!r}; it has {sorted(outputs)}")
+            return self.outputs
+        landmarks = [name for name, output in outputs.items()
+                     if output.size == NUM_LANDMARKS * 3 and 'world' not in name.lower()]
+        scores = [name for name, output in outputs.items()
+                  if output.size == 1 and not any(word in name.lower() for word in ('handed', 'left', 'right'))]
+        if not landmarks or not scores:
+            raise ValueError(f"Can't tell the landmark model's landmark and score outputs apart among "
+                             f"{sorted(outputs)}; set DETECTOR['ONNX_OUTPUTS']")
+        return landmarks[0], scores[0]
+
+    def _roi(self, landmarks, w, h):
+        """Rotated square crop (centre x, centre y, side, rotation) in pixels around a hand's landmarks."""
+        points = landmarks[:, :2] * (w, h)
+        rotation = hand_rotation(points[WRIST], points[MIDDLE_FINGER_MCP])
+        # Extent of the hand along and across its own direction
+        cos, sin = math.cos(rotation), math.sin(rotation)
+        along = points @ np.float32([[cos, -sin], [sin, cos]])
+        low, high = along.min(axis=0), along.max(axis=0)
+        middle = (low + high) / 2
+        side = (high - low).max() * (1 + 2 * self.padding)
+        return middle[0] * cos - middle[1] * sin, middle[0] * sin + middle[1] * cos, side, rotation
+
+    def _infer(self, rgb, roi):
+        """Run the landmark model on one crop; return the landmarks normalized to the frame, and the hand score."""
+        h, w = rgb.shape[:2]
+        size = self.input_size
+        cv2.warpAffine(rgb, crop_transform(roi, size), (size, size), dst=self.model.crop,
+                       flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT)
+        self.model.load_crop()
+        outputs = self.model.run()
+        if self.outputs is None or self.outputs[0] not in outputs:
+            self.outputs = self._select_outputs(outputs)
+        landmarks = outputs[self.outputs[0]].reshape(NUM_LANDMARKS, 3)
+        score = float(outputs[self.outputs[1]].ravel()[0])
+        if not 0.0 <= score <= 1.0:
+            # Some exports give a logit
+            score = 1 / (1 + math.exp(-score))
+
+        hand = np.empty((NUM_LANDMARKS, 3), dtype=np.float32)
+        hand[:, :2] = crop_to_frame(landmarks[:, :2], roi, size) / (w, h)
+        # MediaPipe scales z like x
+        hand[:, 2] = landmarks[:, 2] * roi[2] / size / w
+        return hand, score
+
+    def detect(self, rgb_frame):
+        h, w = rgb_frame.shape[:2]
+        rois = [] if self.static_image_mode else [self._roi(hand, w, h) for hand in self.tracked]
+        threshold = self.min_tracking_confidence
+        if not rois:
+            threshold = self.min_detection_confidence
+            if self.palm is not None:
+                rois = self.palm.detect(rgb_frame, self.max_num_hands, self.min_detection_confidence)
+            else:
+                rois = [(w / 2, h / 2, max(w, h), 0.0)]
+
+        hands, scores = [], []
+        for roi in rois:
+            hand, score = self._infer(rgb_frame, roi)
+            # Two crops can converge on the same hand
+            if score >= threshold and not any(np.abs(hand[0, :2] - other[0, :2]).max() < 0.05 for other in hands):
+                hands.append(hand)
+                scores.append(score)
+        self.tracked = hands[:self.max_num_hands]
+        return hands[:self.max_num_hands], scores[:self.max_num_hands]
+
+
+class MockDetector(HandDetector):
+    """Deterministic stand-in for a hand model, for tests and benchmarks without one.
+
+    With a landmark stream (e.g. a recording loaded with
+    frame_source.load_landmark_stream), each call returns the next
+    frame's hands, looping. Otherwise one pointing hand is placed with
+    its fingertip at the intensity centroid of the frame, so a frame
+    always gives the same landmarks; a black frame has no hand. cost_ms
+    of CPU time is burnt per call, standing in for a model's cost.
+    """
+
+    def __init__(self, stream=None, cost_ms=0.0, score=1.0, **options):
+        self.stream = list(stream) if stream is not None else None
+        self.cost_ms = cost_ms
+        self.score = score
+        self.calls = 0
+        self.small = np.empty((48, 64, 3), dtype=np.uint8)
+        self.gray = np.empty((48, 64), dtype=np.uint8)
+
+    def detect(self, rgb_frame):
+        if self.cost_ms:
+            busy_until = time.process_time() + self.cost_ms / 1000
+            while time.process_time() < busy_until:
+                pass
+        self.calls += 1
+        if self.stream is not None:
+            hands = [hand.copy() for hand in self.stream[(self.calls - 1) % len(self.stream)]]
+            return hands, [self.score] * len(hands)
+
+        cv2.resize(rgb_frame, (64, 48), dst=self.small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self.small, cv2.COLOR_RGB2GRAY, dst=self.gray)
+        moments = cv2.moments(self.gray)
+        if moments['m00'] == 0:
+            return [], []
+        h, w = rgb_frame.shape[:2]
+        x, y = moments['m10'] / moments['m00'] / 64 * w, moments['m01'] / moments['m00'] / 48 * h
+        return [synthetic_hand(x, y, rgb_frame.shape)], [self.score]
+
+
+# Hand detection backends by name
+DETECTORS = {'mediapipe': HandTracker, 'onnx': OnnxHandDetector, 'mock': MockDetector}
+
+
+def create_detector(settings, backend=None, **options):
+    """A hand detector from a config.DETECTOR-style dict; backend overrides settings['BACKEND'].
+
+    options (max_num_hands, the confidences, static_image_mode,
+    model_complexity) are given to whichever backend is chosen.
+    """
+    backend = backend or settings['BACKEND']
+    if backend == 'mediapipe':
+        return HandTracker(**options)
+    if backend == 'onnx':
+        return OnnxHandDetector(settings['ONNX_MODEL'], settings['ONNX_ENGINE'], settings['THREADS'],
+                                settings['ONNX_LAYOUT'], padding=settings['ROI_PADDING'],
+                                palm_model_path=settings['PALM_MODEL'], outputs=settings['ONNX_OUTPUTS'], **options)
+    if backend == 'mock':
+        stream = load_landmark_stream(settings['MOCK_STREAM']) if settings['MOCK_STREAM'] else None
+        return MockDetector(stream, settings['MOCK_COST_MS'], **options)
+    raise ValueError(f"Unknown detector backend {backend!r}; expected one of {sorted(DETECTORS)}")
@@ -0,0 +1,165 @@
+from tkinter import PhotoImage
+
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+
+class DisplaySink:
+    """Somewhere to show rendered RGB frames."""
+
+    def show(self, frame):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def stats(self):
+        """Flat counters, for metrics export."""
+        return {}
+
+
+class PILSink(DisplaySink):
+    """Builds a new PIL Image and ImageTk.PhotoImage for every frame."""
+
+    def __init__(self, label):
+        self.label = label
+
+    def show(self, frame):
+        imgtk = ImageTk.PhotoImage(image=Image.fromarray(frame))
+        self.label.imgtk = imgtk
+        self.label.configure(image=imgtk)
+
+
+class PasteSink(DisplaySink):
+    """Keeps one ImageTk.PhotoImage and pastes each frame into it."""
+
+    def __init__(self, label):
+        self.label = label
+        self.photo = None
+        self.size = None
+
+    def show(self, frame):
+        h, w = frame.shape[:2]
+        # frombuffer wraps the frame's memory instead of copying it
+        image = Image.frombuffer("RGB", (w, h), frame, "raw", "RGB", 0, 1)
+        if self.size != (w, h):
+            self.photo = ImageTk.PhotoImage(image=image)
+            self.size = (w, h)
+            self.label.imgtk = self.photo
+            self.label.configure(image=self.photo)
+        else:
+            self.photo.paste(image)
+
+
+class PPMSink(DisplaySink):
+    """Keeps one Tk PhotoImage and pushes raw PPM bytes into it.
+
+    The PPM header and pixels live in one preallocated bytearray, so a
+    frame costs one copy into the buffer and Tk's own PPM decode, with
+    no PIL involved.
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self.photo = PhotoImage()
+        self.label.configure(image=self.photo)
+        self.size = None
+        self.buffer = None
+        self.pixels = None
+
+    def show(self, frame):
+        h, w = frame.shape[:2]
+        if self.size != (w, h):
+            header = f"P6 {w} {h} 255\n".encode("ascii")
+            self.buffer = bytearray(len(header) + w * h * 3)
+            self.buffer[:len(header)] = header
+            self.pixels = np.frombuffer(self.buffer, dtype=np.uint8, offset=len(header)).reshape(h, w, 3)
+            self.size = (w, h)
+        np.copyto(self.pixels, frame)
+        self.photo.configure(data=self.buffer, format="PPM")
+
+
+class OpenCVSink(DisplaySink):
+    """Shows frames in a plain OpenCV window, like camera_feed.CameraFeed."""
+
+    def __init__(self, window_name="Touchless Ordering"):
+        self.window_name = window_name
+        self.bgr = None
+
+    def show(self, frame):
+        if self.bgr is None or self.bgr.shape != frame.shape:
+            self.bgr = np.empty_like(frame)
+        cv2.cvtColor(frame, cv2.COLOR_RGB2BGR, dst=self.bgr)
+        cv2.imshow(self.window_name, self.bgr)
+        cv2.waitKey(1)
+
+    def close(self):
+        cv2.destroyWindow(self.window_name)
+
+
+class StreamSink(DisplaySink):
+    """Serves frames to remote viewers through an mjpeg_stream.MJPEGStreamer."""
+
+    def __init__(self, streamer):
+        self.streamer = streamer
+        streamer.start()
+
+    def show(self, frame):
+        self.streamer.publish(frame)
+
+    def close(self):
+        self.streamer.close()
+
+    def stats(self):
+        return self.streamer.stats()
+
+
+class TeeSink(DisplaySink):
+    """Shows every frame on several sinks, e.g. the kiosk screen and a remote stream."""
+
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+
+    def show(self, frame):
+        for sink in self.sinks:
+            sink.show(frame)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def stats(self):
+        stats = {}
+        for sink in self.sinks:
+            stats.update(sink.stats())
+        return stats
+
+
+SINKS = {
+    'pil': PILSink,
+    'paste': PasteSink,
+    'ppm': PPMSink,
+    'opencv': OpenCVSink,
+    'mjpeg': StreamSink,
+}
+
+
+def create_stream_sink(port=None):
+    """A StreamSink serving on config.STREAM's address, or on port if given."""
+    from config import STREAM
+    from mjpeg_stream import MJPEGStreamer
+    streamer = MJPEGStreamer(STREAM['HOST'], port if port is not None else STREAM['PORT'],
+                             STREAM['QUALITY'], STREAM['ENCODERS'])
+    return StreamSink(streamer)
+
+
+def create_sink(name, label):
+    """Create a display sink by name; Tk sinks draw into label."""
+    if name not in SINKS:
+        raise ValueError(f"Unknown display sink '{name}'. Choose from: {', '.join(SINKS)}")
+    if name == 'opencv':
+        return OpenCVSink()
+    if name == 'mjpeg':
+        return create_stream_sink()
+    return SINKS[name](label)
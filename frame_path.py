@@ -0,0 +1,161 @@
+import threading
+import tracemalloc
+
+import cv2
+import numpy as np
+
+
+class FrameRing:
+    """Preallocated frame buffers handed out round-robin."""
+
+    def __init__(self, slots):
+        self.slots = slots
+        self.shape = None
+        self.buffers = []
+        self.index = 0
+
+    def next(self, shape):
+        """Return the next buffer, reallocating only if the frame size changed."""
+        if shape != self.shape:
+            self.buffers = [np.empty(shape, dtype=np.uint8) for _ in range(self.slots)]
+            self.shape = shape
+        buffer = self.buffers[self.index]
+        self.index = (self.index + 1) % self.slots
+        return buffer
+
+
+class FramePool:
+    """Reusable frame buffers passed between threads, with explicit ownership.
+
+    acquire() hands out a buffer nobody else holds: a released one of
+    the right shape, or a newly allocated one when none is free, so a
+    slow consumer costs an allocation instead of a frame overwritten
+    while it is still read. release() gives a buffer back once nothing
+    reads or draws it any more; up to slots free buffers are kept. A
+    buffer that is never released is simply garbage collected.
+    """
+
+    def __init__(self, slots):
+        self.slots = slots
+        self.free = []
+        self.allocated = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, shape):
+        with self._lock:
+            while self.free:
+                buffer = self.free.pop()
+                if buffer.shape == shape:
+                    return buffer
+            self.allocated += 1
+        return np.empty(shape, dtype=np.uint8)
+
+    def release(self, buffer):
+        with self._lock:
+            if len(self.free) < self.slots:
+                self.free.append(buffer)
+
+
+class FramePath:
+    """Mirroring and scaling for the allocation-free frame path.
+
+    Frame sources deliver unmirrored RGB frames in preallocated rings;
+    inference, drawing and display all work in RGB from there. Inference
+    runs on the unmirrored frame and landmark x coordinates are mirrored
+    instead. The only mirror of pixels left is the one into the display
+    buffer, done after inference by the render stage and only if mirror
+    is set. Display and inference sizes are independent of the capture
+    size: with display_size set, frames are shown at that (width, height)
+    whatever the camera delivers, and inference_frame() scales a copy for
+    the model only.
+    """
+
+    def __init__(self, mirror=True, display_size=None):
+        self.mirror = mirror
+        self.display_size = tuple(display_size) if display_size else None
+        self.display = FrameRing(2)
+        self.resized = FrameRing(2)
+        self.inference = FrameRing(2)
+
+    def mirror_landmarks(self, hands):
+        """Mirror landmark x coordinates in place to match the displayed frame."""
+        if self.mirror:
+            for landmarks in hands:
+                np.subtract(1.0, landmarks[:, 0], out=landmarks[:, 0])
+        return hands
+
+    def to_display(self, rgb):
+        """Return the frame to draw on and display, resized and mirrored into reused buffers if needed."""
+        if self.display_size is not None and rgb.shape[1::-1] != self.display_size:
+            width, height = self.display_size
+            resized = self.resized.next((height, width, 3))
+            cv2.resize(rgb, self.display_size, dst=resized, interpolation=cv2.INTER_LINEAR)
+            rgb = resized
+        if not self.mirror:
+            return rgb
+        display = self.display.next(rgb.shape)
+        cv2.flip(rgb, 1, dst=display)
+        return display
+
+    def inference_frame(self, rgb, scale):
+        """The frame the hand model sees: rgb itself, or a copy downscaled by scale into a reused buffer.
+
+        Landmarks are normalized, so they need no rescaling afterwards.
+        """
+        if scale >= 1.0:
+            return rgb
+        height, width = rgb.shape[:2]
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        scaled = self.inference.next((size[1], size[0], 3))
+        cv2.resize(rgb, size, dst=scaled, interpolation=cv2.INTER_AREA)
+        return scaled
+
+
+class AllocationReport:
+    """Tracks bytes allocated per frame with tracemalloc.
+
+    tick() is called once per displayed frame. The traced peak since the
+    previous tick, minus the traced size at that tick, is the transient
+    memory allocated by all threads during the frame; the change in
+    traced size is the net growth.
+    """
+
+    def __init__(self, interval=300):
+        self.interval = interval
+        tracemalloc.start()
+        self.last_current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        self._reset()
+
+    def _reset(self):
+        self.frames = 0
+        self.allocated_total = 0
+        self.allocated_max = 0
+        self.net_total = 0
+
+    def tick(self):
+        """Record one frame and print a report every interval frames."""
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        allocated = max(0, peak - self.last_current)
+        self.net_total += current - self.last_current
+        self.last_current = current
+
+        self.frames += 1
+        self.allocated_total += allocated
+        self.allocated_max = max(self.allocated_max, allocated)
+        if self.frames >= self.interval:
+            print(self.report())
+            self._reset()
+
+    def report(self):
+        """Summary of per-frame allocations since the last report."""
+        frames = max(1, self.frames)
+        return (f"Allocations over {self.frames} frames: "
+                f"avg {self.allocated_total / frames:.0f} B/frame, "
+                f"max {self.allocated_max} B/frame, "
+                f"net {self.net_total / frames:+.0f} B/frame")
+
+    def stop(self):
+        """Stop tracing."""
+        tracemalloc.stop()
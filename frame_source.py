@@ -0,0 +1,351 @@
+import os
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from frame_path import FramePool
+from hand_tracking import INDEX_FINGER_TIP, NUM_LANDMARKS
+
+# An unmirrored RGB frame, plus its hand landmarks when the source already
+# knows them (None means the detector has to run).
+SourceFrame = namedtuple('SourceFrame', ['rgb', 'hands'])
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+# Landmark (x, y) offsets from the wrist, in hand heights, for a hand pointing
+# up with the index finger extended and the other fingers curled.
+POINTING_HAND = np.array([
+    (0.0, 0.0),
+    (-0.3, -0.2), (-0.5, -0.4), (-0.65, -0.55), (-0.8, -0.7),
+    (-0.2, -0.8), (-0.2, -1.1), (-0.2, -1.3), (-0.2, -1.5),
+    (0.0, -0.85), (0.0, -1.0), (0.0, -0.95), (0.0, -0.85),
+    (0.2, -0.8), (0.2, -0.95), (0.2, -0.9), (0.2, -0.8),
+    (0.38, -0.7), (0.38, -0.82), (0.38, -0.78), (0.38, -0.7)
+], dtype=np.float32)
+
+# The pointing hand with the middle finger extended too
+TWO_FINGER_HAND = POINTING_HAND.copy()
+TWO_FINGER_HAND[9:13] = [(0.0, -0.85), (0.0, -1.15), (0.0, -1.35), (0.0, -1.55)]
+
+# All five fingers spread
+OPEN_HAND = TWO_FINGER_HAND.copy()
+OPEN_HAND[1:5] = [(-0.3, -0.2), (-0.55, -0.35), (-0.8, -0.45), (-1.0, -0.55)]
+OPEN_HAND[13:21] = [(0.2, -0.8), (0.2, -1.05), (0.2, -1.25), (0.2, -1.4),
+                    (0.38, -0.7), (0.42, -0.9), (0.45, -1.05), (0.48, -1.18)]
+
+# Synthetic hand templates by name
+HAND_POSES = {'point': POINTING_HAND, 'two_fingers': TWO_FINGER_HAND, 'open_palm': OPEN_HAND}
+
+
+def synthetic_hand(x, y, shape, hand_height=0.15, template=POINTING_HAND):
+    """Landmarks for a template hand whose index fingertip is at pixel (x, y) of an unmirrored frame."""
+    h, w = shape[:2]
+    landmarks = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+    offsets = template - template[INDEX_FINGER_TIP]
+    landmarks[:, 0] = x / w + offsets[:, 0] * hand_height * h / w
+    landmarks[:, 1] = y / h + offsets[:, 1] * hand_height
+    return landmarks
+
+
+def save_landmark_stream(path, stream, max_hands=2):
+    """Save per-frame hand lists to an .npz landmark recording."""
+    stream = list(stream)
+    landmarks = np.zeros((len(stream), max_hands, NUM_LANDMARKS, 3), dtype=np.float32)
+    counts = np.zeros(len(stream), dtype=np.int8)
+    for i, hands in enumerate(stream):
+        counts[i] = min(len(hands), max_hands)
+        for j in range(counts[i]):
+            landmarks[i, j] = hands[j]
+    np.savez_compressed(path, landmarks=landmarks, counts=counts)
+
+
+def load_landmark_stream(path):
+    """Load an .npz landmark recording as a list of per-frame hand lists."""
+    with np.load(path) as data:
+        landmarks, counts = data['landmarks'], data['counts']
+        return [[landmarks[i, j].copy() for j in range(counts[i])] for i in range(len(counts))]
+
+
+class FrameSource:
+    """Somewhere frames come from. read() returns a SourceFrame or None.
+
+    None means no frame right now; finished is set once a finite source
+    has nothing more to give, and connected is cleared while a live
+    source has lost its device. Frames come in buffers from the source's
+    FramePool, rgb: once a frame is neither read nor drawn any more, its
+    consumer hands it back with release(), and only then is the buffer
+    reused.
+    """
+
+    finished = False
+    connected = True
+    rgb = None
+
+    def read(self):
+        raise NotImplementedError
+
+    def frame_shape(self):
+        """(height, width, 3) of the frames this source produces."""
+        raise NotImplementedError
+
+    def request_format(self, width, height, fourcc=None, buffer_size=None, fps=None):
+        """Ask for a capture size, pixel format, driver buffer size and frame rate.
+
+        Only live cameras can change them; other sources ignore the request.
+        """
+
+    def release(self, source_frame):
+        """Return a frame's buffer for reuse."""
+        if self.rgb is not None:
+            self.rgb.release(source_frame.rgb)
+
+    def close(self):
+        pass
+
+
+class CaptureSource(FrameSource):
+    """Frames from a cv2.VideoCapture, read into reused buffers and converted to RGB once.
+
+    Up to slots released RGB buffers are kept for reuse. If a metrics.StageTimer is
+    set as timer, the read and the colour conversion are timed separately.
+    """
+
+    timer = None
+
+    def __init__(self, cap, slots=6):
+        self.cap = cap
+        self.raw = None
+        self.rgb = FramePool(slots)
+
+    def read(self):
+        start = self.timer.now() if self.timer is not None else 0.0
+        if self.raw is None:
+            success, frame = self.cap.read()
+        else:
+            success, frame = self.cap.read(self.raw)
+        if not success:
+            return self._end_of_stream()
+        self.raw = frame
+        if self.timer is not None:
+            start = self.timer.lap('camera', start)
+
+        rgb = self.rgb.acquire(frame.shape)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb)
+        if self.timer is not None:
+            self.timer.lap('convert', start)
+        return SourceFrame(rgb, None)
+
+    def _end_of_stream(self):
+        return None
+
+    def frame_shape(self):
+        return (int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 3)
+
+    def close(self):
+        self.cap.release()
+
+
+class CameraSource(CaptureSource):
+    """Live camera that reconnects by itself.
+
+    If the camera can't be opened, or a read fails because it was
+    unplugged, read() returns None and connected is cleared while a
+    background thread tries to reopen it every retry_interval seconds.
+    Until it is first opened, frame_shape() reports shape. A requested
+    format is applied by the thread that reads frames, before its next
+    read, and again after every reconnect.
+    """
+
+    def __init__(self, index=0, slots=6, retry_interval=1.0, shape=(480, 640, 3)):
+        super().__init__(None, slots)
+        self.index = index
+        self.retry_interval = retry_interval
+        self.shape = shape
+        self.connected = False
+        self.reconnects = 0
+        self._format = None
+        self._format_pending = False
+        self._closed = False
+        self._reconnecting = False
+        self._lock = threading.Lock()
+        if not self._open():
+            print("Could not open camera; retrying in the background. Please check your camera connection.")
+            self._reconnect()
+
+    def _open(self):
+        cap = cv2.VideoCapture(self.index)
+        if not cap.isOpened():
+            cap.release()
+            return False
+        # Keep the driver from buffering frames we would only throw away.
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        with self._lock:
+            if self._closed:
+                cap.release()
+                return True
+            self.cap = cap
+            self.raw = None
+            self.shape = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 3)
+            self._format_pending = self._format is not None
+            self.connected = True
+        return True
+
+    def request_format(self, width, height, fourcc=None, buffer_size=None, fps=None):
+        self._format = (width, height, fourcc, buffer_size, fps)
+        self._format_pending = True
+
+    def _apply_format(self):
+        self._format_pending = False
+        width, height, fourcc, buffer_size, fps = self._format
+        # FOURCC first: some drivers only offer large sizes in compressed formats
+        if fourcc:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        if buffer_size:
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+        if fps:
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+        self.raw = None
+        self.shape = (int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 3)
+        if self.shape[:2] != (height, width):
+            print(f"Camera delivers {self.shape[1]}x{self.shape[0]} instead of the requested {width}x{height}.")
+
+    def _reconnect(self):
+        with self._lock:
+            if self._reconnecting or self._closed:
+                return
+            self._reconnecting = True
+        threading.Thread(target=self._reconnect_loop, name="camera-reconnect", daemon=True).start()
+
+    def _reconnect_loop(self):
+        while not self._closed and not self._open():
+            time.sleep(self.retry_interval)
+        if self.connected:
+            self.reconnects += 1
+            print("Camera connected.")
+        self._reconnecting = False
+
+    def read(self):
+        if not self.connected:
+            return None
+        if self._format_pending:
+            self._apply_format()
+        return super().read()
+
+    def _end_of_stream(self):
+        # A live camera only stops delivering frames when it is lost
+        print("Camera lost; reconnecting.")
+        with self._lock:
+            self.connected = False
+            self.cap.release()
+        self._reconnect()
+        return None
+
+    def frame_shape(self):
+        return self.shape
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            if self.cap is not None:
+                self.cap.release()
+
+
+class VideoFileSource(CaptureSource):
+    """Recorded video file, read as fast as it is consumed."""
+
+    def __init__(self, path, loop=False, slots=6):
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            raise Exception(f"Could not open video file '{path}'.")
+        super().__init__(cap, slots)
+        self.loop = loop
+
+    def _end_of_stream(self):
+        if self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        else:
+            self.finished = True
+        return None
+
+
+class ImageDirectorySource(FrameSource):
+    """Still images from a directory, in file name order."""
+
+    def __init__(self, path, loop=False, slots=6):
+        self.paths = sorted(os.path.join(path, name) for name in os.listdir(path)
+                            if name.lower().endswith(IMAGE_EXTENSIONS))
+        if not self.paths:
+            raise Exception(f"No images found in '{path}'.")
+        self.loop = loop
+        self.index = 0
+        self.rgb = FramePool(slots)
+
+    def read(self):
+        if self.index >= len(self.paths):
+            if not self.loop:
+                self.finished = True
+                return None
+            self.index = 0
+        frame = cv2.imread(self.paths[self.index])
+        self.index += 1
+        if frame is None:
+            return None
+        rgb = self.rgb.acquire(frame.shape)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb)
+        return SourceFrame(rgb, None)
+
+    def frame_shape(self):
+        return cv2.imread(self.paths[0]).shape
+
+
+class SyntheticLandmarkSource(FrameSource):
+    """Plays back a landmark stream over a plain background, with no model at all.
+
+    stream yields one list of (21, 3) unmirrored landmark arrays per
+    frame; it can be a recording or a generator that reacts to the
+    session it drives.
+    """
+
+    def __init__(self, stream, shape=(480, 640, 3), loop=False, background=(40, 40, 40), slots=6):
+        self.stream = stream
+        self.iterator = iter(stream)
+        self.shape = tuple(shape)
+        self.loop = loop
+        self.background = np.empty(self.shape, dtype=np.uint8)
+        self.background[:] = background
+        self.rgb = FramePool(slots)
+
+    def read(self):
+        try:
+            hands = next(self.iterator)
+        except StopIteration:
+            if not self.loop:
+                self.finished = True
+                return None
+            self.iterator = iter(self.stream)
+            return None
+        rgb = self.rgb.acquire(self.shape)
+        np.copyto(rgb, self.background)
+        return SourceFrame(rgb, [landmarks.copy() for landmarks in hands])
+
+    def frame_shape(self):
+        return self.shape
+
+
+def open_source(spec, loop=False, slots=6):
+    """Open a frame source from a spec: 'camera', 'camera:N', an image directory,
+    an .npz landmark recording or a video file."""
+    if spec == 'camera' or spec.startswith('camera:'):
+        index = int(spec.split(':', 1)[1]) if ':' in spec else 0
+        return CameraSource(index, slots)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, loop, slots)
+    if spec.endswith('.npz'):
+        return SyntheticLandmarkSource(load_landmark_stream(spec), loop=loop, slots=slots)
+    return VideoFileSource(spec, loop, slots)
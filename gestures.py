@@ -0,0 +1,166 @@
+from collections import namedtuple
+
+import numpy as np
+
+from hand_tracking import INDEX_FINGER_TIP
+
+WRIST = 0
+THUMB_MCP = 2
+THUMB_TIP = 4
+MIDDLE_MCP = 9
+PINKY_MCP = 17
+
+# Tip and PIP joint of the index, middle, ring and pinky fingers
+FINGER_TIPS = np.array([8, 12, 16, 20])
+FINGER_PIPS = np.array([6, 10, 14, 18])
+
+# One hand's gesture state. pointer is the index fingertip in pixels;
+# extended holds the thumb, index, middle, ring and pinky states;
+# finger_count counts extended fingers other than the thumb; pinch is the
+# thumb-index tip distance in hand sizes (wrist to middle knuckle).
+HandPose = namedtuple('HandPose', ['pointer', 'extended', 'finger_count', 'pinch', 'open_palm'])
+
+
+def hand_poses(hands, shape, finger_ratio=1.15, thumb_ratio=1.35):
+    """Gesture state of every hand in a frame, computed in one vectorized pass.
+
+    hands are (21, 3) normalized landmark arrays. A finger is extended
+    when its tip is finger_ratio times further from the wrist than its
+    PIP joint, which holds at any hand rotation. The thumb is extended
+    when its tip is thumb_ratio times further from the pinky knuckle
+    than its own knuckle is.
+    """
+    if not hands:
+        return []
+    h, w = shape[:2]
+    points = np.stack(hands)[:, :, :2] * (w, h)
+
+    wrist = points[:, WRIST:WRIST + 1]
+    tips = np.linalg.norm(points[:, FINGER_TIPS] - wrist, axis=2)
+    pips = np.linalg.norm(points[:, FINGER_PIPS] - wrist, axis=2)
+    fingers = tips > pips * finger_ratio
+
+    pinky = points[:, PINKY_MCP]
+    thumb = (np.linalg.norm(points[:, THUMB_TIP] - pinky, axis=1) >
+             np.linalg.norm(points[:, THUMB_MCP] - pinky, axis=1) * thumb_ratio)
+
+    hand_size = np.maximum(np.linalg.norm(points[:, MIDDLE_MCP] - points[:, WRIST], axis=1), 1e-6)
+    pinch = np.linalg.norm(points[:, THUMB_TIP] - points[:, INDEX_FINGER_TIP], axis=1) / hand_size
+
+    extended = np.concatenate([thumb[:, None], fingers], axis=1)
+    counts = fingers.sum(axis=1)
+    open_palm = extended.all(axis=1)
+    pointers = points[:, INDEX_FINGER_TIP].astype(int)
+    return [HandPose((int(pointers[i, 0]), int(pointers[i, 1])), extended[i], int(counts[i]),
+                     float(pinch[i]), bool(open_palm[i])) for i in range(len(hands))]
+
+
+class DwellSelector:
+    """Turns a pointer hovering over layout buttons into discrete select events.
+
+    A button is selected once the pointer has stayed on it for dwell
+    seconds, or at once on a pinch. Hysteresis keeps small jitter from
+    resetting progress: the current button's rect is grown by margin
+    pixels, and a pointer lost for under release seconds keeps its
+    place. After a select, the same button only fires again once the
+    pointer has left it.
+    """
+
+    def __init__(self, dwell=0.8, margin=12, release=0.15):
+        self.dwell = dwell
+        self.margin = margin
+        self.release = release
+        self.candidate = None
+        self.since = 0.0
+        self.last_seen = 0.0
+        self.fired = False
+
+    def reset(self):
+        self.candidate = None
+        self.fired = False
+
+    def _target(self, layout, point):
+        if self.candidate is not None:
+            # Follow the candidate into a re-laid-out screen by id
+            button = layout.by_id.get(self.candidate.id)
+            if button is not None:
+                x1, y1, x2, y2 = button.rect
+                x, y = point
+                m = self.margin
+                if x1 - m <= x <= x2 + m and y1 - m <= y <= y2 + m:
+                    return button
+        return layout.hit_test(point)
+
+    def update(self, layout, point, now, pinch=False, accept=None):
+        """Advance with this frame's pointer; return the selected button or None.
+
+        accept(button) may veto a select, e.g. until a required gesture is
+        shown; the dwell then fires as soon as it allows it.
+        """
+        button = self._target(layout, point) if point is not None else None
+        if button is None:
+            if self.candidate is not None and now - self.last_seen > self.release:
+                self.reset()
+            return None
+
+        if self.candidate is None or button.id != self.candidate.id:
+            self.since = now
+            self.fired = False
+        self.candidate = button
+        self.last_seen = now
+
+        if self.fired or not (pinch or now - self.since >= self.dwell):
+            return None
+        if accept is not None and not accept(button):
+            return None
+        self.fired = True
+        return button
+
+    def progress(self, now):
+        """Dwell progress on the current button, from 0 to 1 (0 once it has fired)."""
+        if self.candidate is None or self.fired:
+            return 0.0
+        return min(1.0, (now - self.since) / self.dwell)
+
+
+class GestureEngine:
+    """Per-frame gesture analysis plus dwell/pinch selection for one pointer.
+
+    The last hand in the frame drives the pointer. Pinches are detected
+    with hysteresis: a pinch starts below pinch_on hand sizes and ends
+    above pinch_off, and only its start counts as a select. With a
+    cursor_filter.CursorFilter as cursor, the pointer is smoothed and
+    led by the frame's latency before it is hit-tested or drawn.
+    """
+
+    def __init__(self, dwell=0.8, margin=12, release=0.15, pinch_on=0.3, pinch_off=0.45, cursor=None):
+        self.selector = DwellSelector(dwell, margin, release)
+        self.cursor = cursor
+        self.pinch_on = pinch_on
+        self.pinch_off = pinch_off
+        self.pinching = False
+        self.pose = None
+
+    def update(self, hands, shape, layout, now, accept=None, latency=0.0):
+        """Analyze a frame's hands; return (pose of the pointing hand or None, selected button or None).
+
+        latency is the expected capture-to-display time of this frame in
+        seconds, for the cursor filter's prediction.
+        """
+        poses = hand_poses(hands, shape)
+        pose = poses[-1] if poses else None
+        if pose is not None and self.cursor is not None:
+            pose = pose._replace(pointer=self.cursor(pose.pointer, now, latency, shape))
+        self.pose = pose
+
+        pinch_started = False
+        if pose is None:
+            self.pinching = False
+        elif self.pinching:
+            self.pinching = pose.pinch < self.pinch_off
+        elif pose.pinch < self.pinch_on:
+            self.pinching = pinch_started = True
+
+        button = self.selector.update(layout, pose.pointer if pose is not None else None, now,
+                                      pinch_started, accept)
+        return pose, button
@@ -1,15 +1,113 @@
 import cv2
-import mediapipe as mp
+import numpy as np
 
-class HandTracker:
-    def __init__(self):
+NUM_LANDMARKS = 21
+INDEX_FINGER_TIP = 8
+
+# Same topology as mp.solutions.hands.HAND_CONNECTIONS, kept here so that
+# drawing does not need MediaPipe landmark objects.
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4),
+    (0, 5), (5, 6), (6, 7), (7, 8),
+    (5, 9), (9, 10), (10, 11), (11, 12),
+    (9, 13), (13, 14), (14, 15), (15, 16),
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20)
+)
+
+
+def landmarks_to_array(hand_landmarks, out=None):
+    """Convert MediaPipe hand landmarks to a (21, 3) float32 array of normalized x, y, z."""
+    if out is None:
+        out = np.empty((NUM_LANDMARKS, 3), dtype=np.float32)
+    for i, landmark in enumerate(hand_landmarks.landmark):
+        out[i] = (landmark.x, landmark.y, landmark.z)
+    return out
+
+
+def draw_hand_landmarks(frame, landmarks, rgb=False):
+    """Draw a (21, 3) normalized landmark array onto a BGR (or RGB) frame."""
+    h, w = frame.shape[:2]
+    points = (landmarks[:, :2] * (w, h)).astype(np.int32)
+    for start, end in HAND_CONNECTIONS:
+        cv2.line(frame, tuple(points[start]), tuple(points[end]), (224, 224, 224), 2)
+    point_color = (255, 0, 0) if rgb else (0, 0, 255)
+    for point in points:
+        cv2.circle(frame, tuple(point), 2, point_color, 2)
+
+
+class HandDetector:
+    """Interface of the hand detection backends (see detectors.DETECTORS).
+
+    detect() takes an RGB frame and returns a list of (21, 3) float32
+    arrays of landmarks, x and y normalized to the frame and z relative
+    to the wrist, with a list of one confidence score in [0, 1] per
+    hand. Everything that only needs landmarks calls detect_landmarks().
+    """
+
+    def detect(self, rgb_frame):
+        raise NotImplementedError
+
+    def detect_landmarks(self, rgb_frame):
+        """Return a list of (21, 3) float32 landmark arrays, one per detected hand."""
+        return self.detect(rgb_frame)[0]
+
+    def configure(self, **options):
+        """Change detection options from the next inference on; options a backend lacks are ignored."""
+
+    def warm_up(self, shape=(480, 640, 3)):
+        """Run one inference on a blank frame, so the first camera frame doesn't pay for start-up."""
+        self.detect(np.zeros(shape, dtype=np.uint8))
+
+    def close(self):
+        pass
+
+
+class HandTracker(HandDetector):
+    """The MediaPipe Hands backend."""
+
+    def __init__(self, max_num_hands=1, min_detection_confidence=0.7, min_tracking_confidence=0.7,
+                 static_image_mode=False, model_complexity=1):
+        # Imported here, so modules that only draw or index landmarks
+        # don't pay MediaPipe's import time
+        import mediapipe as mp
         self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            max_num_hands=1,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.7
+        self.options = dict(
+            static_image_mode=static_image_mode,
+            max_num_hands=max_num_hands,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence,
+            model_complexity=model_complexity
         )
+        self.hands = self.mp_hands.Hands(**self.options)
         self.mp_draw = mp.solutions.drawing_utils
+        self._pending_options = None
+
+    def configure(self, **options):
+        """Change Hands options, e.g. model_complexity, from the next inference on.
+
+        MediaPipe can't change them on a running graph, so the graph is
+        rebuilt, on the thread that runs inference; safe to call from
+        any thread. Options equal to the current ones are a no-op.
+        """
+        options = dict(self.options, **options)
+        if options != self.options:
+            self._pending_options = options
+
+    def detect(self, rgb_frame):
+        """Return the landmark arrays of the detected hands, and MediaPipe's handedness score for each."""
+        if self._pending_options is not None:
+            self.options, self._pending_options = self._pending_options, None
+            self.hands.close()
+            self.hands = self.mp_hands.Hands(**self.options)
+        rgb_frame.flags.writeable = False
+        results = self.hands.process(rgb_frame)
+        rgb_frame.flags.writeable = True
+
+        if not results.multi_hand_landmarks:
+            return [], []
+        hands = [landmarks_to_array(hand_landmarks) for hand_landmarks in results.multi_hand_landmarks]
+        scores = [handedness.classification[0].score for handedness in results.multi_handedness]
+        return hands, scores
 
     def detect_hand(self, frame):
         """Detects hand and extracts index finger position."""
@@ -22,3 +120,7 @@ class HandTracker:
                 h, w, _ = frame.shape
                 return int(index_finger.x * w), int(index_finger.y * h)
         return None
+
+    def close(self):
+        """Release the MediaPipe graph."""
+        self.hands.close()
@@ -0,0 +1,173 @@
+import argparse
+import time
+
+from frame_path import FramePath
+from frame_source import (HAND_POSES, SyntheticLandmarkSource, open_source, save_landmark_stream,
+                          synthetic_hand)
+from menu_loader import DEFAULT_MENU, compile_menu
+from session import OrderingSession
+
+# Canned scenarios over the default menu: button ids to select in order (or
+# (button id, hand pose) pairs, see frame_source.HAND_POSES), or a number of
+# seconds to wait with the hand resting away from any button.
+SCENARIOS = {
+    'order': ["Add Items", "add_Burger", "add_Pizza", "add_Fries", "back_to_home",
+              "View Cart", "delete_Pizza", ("Yes", 'two_fingers'), "checkout", 6.0],
+    'add_remove': ["Add Items", "add_Burger", "add_Burger", "add_Coffee", "reduce_Burger",
+                   "reduce_Coffee", "back_to_home"],
+    'idle': [10.0],
+}
+
+
+class FrameClock:
+    """Simulated clock that advances by one frame period per tick."""
+
+    def __init__(self, fps=30.0, start=1000.0):
+        self.now = start
+        self.period = 1.0 / fps
+
+    def __call__(self):
+        return self.now
+
+    def tick(self):
+        self.now += self.period
+
+
+def scenario_stream(session, steps, shape, fps=30.0):
+    """Yield per-frame hands that select the scenario's buttons in order.
+
+    Each button is selected by holding the hand on it for the session's
+    dwell time, then moving it away so the selection re-arms. The stream
+    looks buttons up in the session's current layout when each frame is
+    requested, so it follows the session's real state.
+    """
+    h, w = shape[:2]
+    rest = (w - 40, h // 2)
+    dwell_frames = int(fps * (session.gestures.selector.dwell + 0.1)) + 1
+    settle_frames = int(fps * 0.3) + 1
+
+    def hand_at(x, y, pose='point'):
+        # Scenario positions are on the mirrored display; sources are unmirrored
+        return [synthetic_hand(w - x, y, shape, template=HAND_POSES[pose])]
+
+    for step in steps:
+        if isinstance(step, (int, float)):
+            for _ in range(int(step * fps)):
+                yield hand_at(*rest)
+            continue
+
+        button_id, pose = step if isinstance(step, tuple) else (step, 'point')
+        for _ in range(dwell_frames):
+            button = session.layout.by_id.get(button_id)
+            if button is not None:
+                break
+            yield hand_at(*rest)
+        else:
+            raise RuntimeError(f"Button '{button_id}' is not on screen '{session.current_screen}'")
+
+        x1, y1, x2, y2 = button.rect
+        for _ in range(dwell_frames):
+            yield hand_at((x1 + x2) // 2, (y1 + y2) // 2, pose)
+        for _ in range(settle_frames):
+            yield hand_at(*rest)
+
+
+class HeadlessRunner:
+    """Drives an OrderingSession from a frame source without any display.
+
+    Frames whose source provides landmarks skip the detector; otherwise
+    detect(rgb) is called. Per-frame latency covers reading, inference
+    and rendering. When clock is a FrameClock it is ticked once per
+    frame, so timers run in simulated time.
+    """
+
+    def __init__(self, session, source, detect=None, clock=None, mirror=True, sink=None, record=False):
+        self.session = session
+        self.source = source
+        self.detect = detect
+        self.clock = clock
+        self.frame_path = FramePath(mirror)
+        self.sink = sink
+        self.recorded = [] if record else None
+
+    def run(self, max_frames=None):
+        """Run until the source is exhausted or max_frames; return per-frame latencies in ms."""
+        latencies = []
+        while max_frames is None or len(latencies) < max_frames:
+            start = time.perf_counter()
+            source_frame = self.source.read()
+            if source_frame is None:
+                if self.source.finished:
+                    break
+                # A live source has no frame yet; wait a little instead of spinning
+                time.sleep(0.005)
+                continue
+
+            if source_frame.hands is not None:
+                hands = source_frame.hands
+            else:
+                hands = self.detect(source_frame.rgb)
+            if self.recorded is not None:
+                self.recorded.append([landmarks.copy() for landmarks in hands])
+
+            hands = self.frame_path.mirror_landmarks(hands)
+            frame = self.session.step(self.frame_path.to_display(source_frame.rgb), hands)
+            if self.sink is not None:
+                self.sink.show(frame)
+            self.source.release(source_frame)
+
+            latencies.append((time.perf_counter() - start) * 1000)
+            if self.clock is not None:
+                self.clock.tick()
+        return latencies
+
+
+def run_scenario(name, fps=30.0, shape=(480, 640, 3)):
+    """Run a canned scenario on synthetic landmarks; return (session, latencies, seconds)."""
+    clock = FrameClock(fps)
+    session = OrderingSession(compile_menu(DEFAULT_MENU), clock=clock)
+    source = SyntheticLandmarkSource(scenario_stream(session, SCENARIOS[name], shape, fps), shape)
+    runner = HeadlessRunner(session, source, clock=clock)
+    start = time.perf_counter()
+    latencies = runner.run()
+    return session, latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the ordering state machine without a display")
+    parser.add_argument("--source", help="video file, image directory or .npz landmark recording")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), help="run a canned synthetic scenario")
+    parser.add_argument("--frames", type=int, help="stop after this many frames")
+    parser.add_argument("--record", metavar="PATH", help="save the detected landmarks to an .npz recording")
+    parser.add_argument("--detector", help="hand detection backend for --source: one of detectors.DETECTORS "
+                                           "(default from config.DETECTOR)")
+    args = parser.parse_args()
+
+    if args.scenario:
+        session, latencies, seconds = run_scenario(args.scenario)
+    elif args.source:
+        from config import DETECTOR
+        from detectors import create_detector
+
+        tracker = create_detector(DETECTOR, args.detector)
+        session = OrderingSession(compile_menu(DEFAULT_MENU))
+        source = open_source(args.source)
+        runner = HeadlessRunner(session, source, detect=tracker.detect_landmarks, record=bool(args.record))
+        start = time.perf_counter()
+        latencies = runner.run(args.frames)
+        seconds = time.perf_counter() - start
+        source.close()
+        tracker.close()
+        if args.record:
+            save_landmark_stream(args.record, runner.recorded)
+            print(f"Saved {len(runner.recorded)} frames of landmarks to {args.record}")
+    else:
+        parser.error("give --source or --scenario")
+
+    print(f"{len(latencies)} frames in {seconds:.2f}s ({len(latencies) / max(seconds, 1e-9):.1f} FPS), "
+          f"screen '{session.current_screen}', cart {dict(session.cart.items())}, "
+          f"orders completed {session.orders_completed}")
+
+
+if __name__ == "__main__":
+    main()
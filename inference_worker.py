@@ -0,0 +1,258 @@
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from hand_tracking import HandTracker, NUM_LANDMARKS
+
+
+class SharedRing:
+    """Fixed number of equally shaped array slots in one shared memory block."""
+
+    def __init__(self, shape, slots, dtype=np.uint8, name=None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.dtype = np.dtype(dtype)
+        self.owner = name is None
+
+        size = slots * int(np.prod(self.shape)) * self.dtype.itemsize
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.array = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        """Detach from the block, and free it if this side created it."""
+        # The ndarray holds an export of the buffer; drop it before closing.
+        self.array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _worker_main(frame_name, result_name, frame_shape, slots, max_hands, detector, hands_options,
+                 requests, responses, index, current):
+    """Worker process: run the hand model on frames found in shared memory.
+
+    current[index] holds the slot being processed, or -1, so the parent
+    can reclaim it should this process die.
+    """
+    frames = SharedRing(frame_shape, slots, name=frame_name)
+    results = SharedRing((max_hands, NUM_LANDMARKS, 3), slots, np.float32, name=result_name)
+    if detector is None:
+        tracker = HandTracker(max_num_hands=max_hands, **hands_options)
+    else:
+        from detectors import create_detector
+        tracker = create_detector(detector, max_num_hands=max_hands, **hands_options)
+    try:
+        while True:
+            request = requests.get()
+            if request is None:
+                break
+            slot, seq = request
+            current[index] = slot
+            hands = tracker.detect_landmarks(frames.array[slot])
+            count = min(len(hands), max_hands)
+            for i in range(count):
+                results.array[slot, i] = hands[i]
+            responses.put((slot, seq, count))
+            current[index] = -1
+    finally:
+        tracker.close()
+        frames.close()
+        results.close()
+
+
+class InferenceWorkerPool:
+    """Runs hand landmark inference in separate processes.
+
+    RGB frames are copied straight into a shared memory ring and only
+    (slot, sequence) pairs go through the queues, so no ndarray is ever
+    pickled. Landmarks come back through a second ring as float32
+    (21, 3) arrays. detect() is thread safe, so several pipeline
+    inference threads can keep several workers busy at once. detector
+    is a config.DETECTOR-style dict choosing the workers' backend;
+    None runs MediaPipe.
+
+    The ring is sized for frame_shape. A frame of another size, e.g.
+    from a camera that reconnected at a different resolution, is resized
+    into its slot; landmarks are normalized, so they still map onto the
+    original frame. No call waits longer than timeout seconds, and
+    waiting fails at once when every worker process has died.
+
+    A result that arrives after its wait() timed out is dropped and its
+    slot freed. The collector thread also watches the workers: the slot
+    of one that dies is reclaimed, its frame's wait() fails, and the
+    worker is restarted, up to max_restarts times over the pool's life.
+    """
+
+    def __init__(self, frame_shape, workers=1, max_hands=1, slots=None, detector=None, timeout=10.0,
+                 max_restarts=5, **hands_options):
+        self.frame_shape = tuple(frame_shape)
+        self.max_hands = max_hands
+        self.timeout = timeout
+        self.resized = 0
+        self.slots = slots or workers * 2
+
+        self.frames = SharedRing(self.frame_shape, self.slots)
+        self.results = SharedRing((max_hands, NUM_LANDMARKS, 3), self.slots, np.float32)
+
+        self.requests = multiprocessing.Queue()
+        self.responses = multiprocessing.Queue()
+        self.free_slots = queue.Queue()
+        for slot in range(self.slots):
+            self.free_slots.put(slot)
+
+        self._seq = 0
+        self._seq_lock = threading.Lock()
+        self._done = {}
+        self._done_cond = threading.Condition()
+        # Slot -> sequence number of the frame in it, for frames not yet answered
+        self._pending = {}
+        self._abandoned = set()
+        self._lost = set()
+        self._closing = False
+        self.restarts = 0
+        self.max_restarts = max_restarts
+
+        self._worker_args = (self.frames.name, self.results.name, self.frame_shape, self.slots,
+                             max_hands, detector, hands_options, self.requests, self.responses)
+        self._current = multiprocessing.Array('l', [-1] * workers, lock=False)
+        self.processes = [self._start_worker(index) for index in range(workers)]
+
+        self._collector = threading.Thread(target=self._collect_loop, name="inference-collector",
+                                           daemon=True)
+        self._collector.start()
+
+    def _start_worker(self, index):
+        process = multiprocessing.Process(target=_worker_main,
+                                          args=self._worker_args + (index, self._current), daemon=True)
+        process.start()
+        return process
+
+    def _collect_loop(self):
+        while True:
+            try:
+                response = self.responses.get(timeout=0.5)
+            except queue.Empty:
+                self._reclaim_dead_workers()
+                continue
+            if response is None:
+                break
+            slot, seq, count = response
+            with self._done_cond:
+                # A reclaimed slot may already hold another frame
+                if self._pending.get(slot) != seq:
+                    continue
+                del self._pending[slot]
+                if seq in self._abandoned:
+                    self._abandoned.discard(seq)
+                else:
+                    self._done[seq] = [self.results.array[slot, i].copy() for i in range(count)]
+                    self._done_cond.notify_all()
+            self.free_slots.put(slot)
+            self._reclaim_dead_workers()
+
+    def _reclaim_dead_workers(self):
+        """Free the slot of every worker that died mid-frame, fail its frame, and restart the worker."""
+        if self._closing:
+            return
+        for index, process in enumerate(self.processes):
+            if process.is_alive() or process.exitcode is None:
+                continue
+            slot = self._current[index]
+            self._current[index] = -1
+            if slot >= 0:
+                with self._done_cond:
+                    seq = self._pending.pop(slot, None)
+                    if seq is not None:
+                        if seq in self._abandoned:
+                            self._abandoned.discard(seq)
+                        else:
+                            self._lost.add(seq)
+                            self._done_cond.notify_all()
+                if seq is not None:
+                    self.free_slots.put(slot)
+            if self.restarts < self.max_restarts:
+                self.restarts += 1
+                print(f"Inference worker {index} exited with code {process.exitcode}; restarting it.")
+                self.processes[index] = self._start_worker(index)
+
+    def _check_workers(self):
+        if not any(process.is_alive() for process in self.processes):
+            raise RuntimeError("Every inference worker process has exited")
+
+    def submit(self, frame, timeout=None):
+        """Queue an RGB frame for inference and return its sequence number."""
+        timeout = self.timeout if timeout is None else timeout
+        self._check_workers()
+        try:
+            slot = self.free_slots.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No free inference slot after {timeout:g} s") from None
+        if frame.shape == self.frame_shape:
+            np.copyto(self.frames.array[slot], frame)
+        else:
+            if self.resized == 0:
+                print(f"Frames are {frame.shape[1]}x{frame.shape[0]}; resizing them to the inference workers' "
+                      f"{self.frame_shape[1]}x{self.frame_shape[0]}.")
+            self.resized += 1
+            cv2.resize(frame, (self.frame_shape[1], self.frame_shape[0]), dst=self.frames.array[slot],
+                       interpolation=cv2.INTER_AREA)
+        with self._seq_lock:
+            self._seq += 1
+            seq = self._seq
+        with self._done_cond:
+            self._pending[slot] = seq
+        self.requests.put((slot, seq))
+        return seq
+
+    def wait(self, seq, timeout=None):
+        """Block until the landmarks for a submitted frame are available."""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._done_cond:
+            while seq not in self._done:
+                if seq in self._lost:
+                    self._lost.discard(seq)
+                    raise RuntimeError(f"An inference worker exited while processing frame {seq}")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # Its result, should it still come, is dropped by the collector
+                    self._abandoned.add(seq)
+                    raise TimeoutError(f"No inference result for frame {seq} after {timeout:g} s")
+                try:
+                    self._check_workers()
+                except RuntimeError:
+                    self._abandoned.add(seq)
+                    raise
+                # Wake now and then to notice workers that died
+                self._done_cond.wait(min(remaining, 0.5))
+            return self._done.pop(seq)
+
+    def detect(self, frame, timeout=None):
+        """Run inference on an RGB frame and return a list of (21, 3) landmark arrays."""
+        return self.wait(self.submit(frame, timeout), timeout)
+
+    def close(self):
+        """Stop the worker processes and free the shared memory."""
+        self._closing = True
+        for _ in self.processes:
+            self.requests.put(None)
+        for process in self.processes:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        self.responses.put(None)
+        self._collector.join(timeout=1.0)
+        self.frames.close()
+        self.results.close()
@@ -0,0 +1,206 @@
+import json
+import os
+import queue
+import threading
+import time
+
+from metrics import RollingHistogram
+
+SEGMENT_SUFFIX = '.jsonl'
+
+_STOP = object()
+
+
+def segment_paths(directory):
+    """Journal segment files in a directory, oldest first."""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+    return [os.path.join(directory, name) for name in names]
+
+
+def read_segment(path):
+    """Records of one segment; a torn last line from a crash is skipped."""
+    records = []
+    with open(path, 'rb') as file:
+        for line in file:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+    return records
+
+
+def apply_record(cart, record):
+    """Apply one journal record to an item -> quantity dict."""
+    kind = record['type']
+    if kind == 'snapshot':
+        cart.clear()
+        cart.update(record['cart'])
+    elif kind == 'cart':
+        if record['quantity'] > 0:
+            cart[record['item']] = record['quantity']
+        else:
+            cart.pop(record['item'], None)
+    elif kind == 'order':
+        cart.clear()
+
+
+class OrderJournal:
+    """Append-only journal of cart changes and completed orders, written off the render loop.
+
+    append() only puts the record on a queue; a writer thread encodes
+    records as JSON lines and commits them in groups, with one fsync at
+    most every fsync_interval seconds (0 syncs every batch). Each segment
+    starts with a snapshot of the cart, so recovery only replays the
+    newest one; a segment is rotated once it reaches segment_bytes.
+    With keep_segments set, older segments beyond that many are deleted.
+    """
+
+    def __init__(self, directory, fsync_interval=0.2, segment_bytes=1 << 20, keep_segments=None):
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.segment_bytes = segment_bytes
+        self.keep_segments = keep_segments
+        os.makedirs(directory, exist_ok=True)
+
+        self.cart = self.recover()
+        paths = segment_paths(directory)
+        self.segment_index = int(os.path.basename(paths[-1])[:-len(SEGMENT_SUFFIX)]) if paths else 0
+        self.file = None
+        self.segment_size = 0
+
+        self.records = 0
+        self.bytes = 0
+        self.fsyncs = 0
+        self.enqueue_us = RollingHistogram(1024)
+        self.commit_ms = RollingHistogram(1024)
+        self.batch_sizes = RollingHistogram(1024)
+
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="order-journal", daemon=True)
+
+    def recover(self):
+        """The cart as of the last committed record, replayed from the newest segment with a snapshot."""
+        for path in reversed(segment_paths(self.directory)):
+            records = read_segment(path)
+            if records and records[0]['type'] == 'snapshot':
+                cart = {}
+                for record in records:
+                    apply_record(cart, record)
+                return cart
+        return {}
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Commit everything queued so far and stop the writer."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def append(self, record):
+        """Queue a record for the writer; never blocks on disk."""
+        start = time.perf_counter()
+        self._queue.put((record, start))
+        self.enqueue_us.add((time.perf_counter() - start) * 1e6)
+
+    def watch(self, cart):
+        """Journal every change of a CartManager: an item's new quantity, or the whole cart."""
+        def listener(event):
+            if event.item is None:
+                self.append({'type': 'snapshot', 'time': time.time(), 'kind': event.kind,
+                             'cart': dict(cart.items())})
+            else:
+                self.append({'type': 'cart', 'time': time.time(), 'kind': event.kind,
+                             'item': event.item, 'quantity': event.quantity, 'total': event.total})
+        cart.subscribe(listener)
+
+    def record_order(self, order):
+        """Journal a completed order (a dict with order_id, items, total and time)."""
+        self.append(dict(order, type='order'))
+
+    def _open_segment(self):
+        if self.file is not None:
+            self._sync()
+            self.file.close()
+        self.segment_index += 1
+        path = os.path.join(self.directory, f"{self.segment_index:06d}{SEGMENT_SUFFIX}")
+        self.file = open(path, 'ab')
+        self.segment_size = 0
+        self._write({'type': 'snapshot', 'time': time.time(), 'cart': dict(self.cart)})
+
+        if self.keep_segments:
+            for old in segment_paths(self.directory)[:-self.keep_segments]:
+                os.remove(old)
+
+    def _write(self, record):
+        apply_record(self.cart, record)
+        line = json.dumps(record, separators=(',', ':')).encode() + b'\n'
+        self.file.write(line)
+        self.segment_size += len(line)
+        self.bytes += len(line)
+        self.records += 1
+
+    def _sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.fsyncs += 1
+
+    def _run(self):
+        self._open_segment()
+        self._sync()
+        pending = []
+        last_sync = time.perf_counter()
+        stopping = False
+        while not stopping:
+            # Block until a record arrives, or until the pending group is due
+            timeout = None
+            if pending:
+                timeout = max(0.0, self.fsync_interval - (time.perf_counter() - last_sync))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            batch = 0
+            while item is not None:
+                if item is _STOP:
+                    stopping = True
+                    break
+                record, enqueued_at = item
+                if self.segment_size >= self.segment_bytes:
+                    self._open_segment()
+                self._write(record)
+                pending.append(enqueued_at)
+                batch += 1
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+            if batch:
+                self.batch_sizes.add(batch)
+
+            if pending and (stopping or time.perf_counter() - last_sync >= self.fsync_interval):
+                self._sync()
+                last_sync = time.perf_counter()
+                for enqueued_at in pending:
+                    self.commit_ms.add((last_sync - enqueued_at) * 1000)
+                pending = []
+        self._sync()
+        self.file.close()
+
+    def stats(self):
+        """Flat counters and latencies, for metrics export."""
+        enqueue = self.enqueue_us.summary()
+        commit = self.commit_ms.summary()
+        return {
+            'journal_records': self.records,
+            'journal_bytes': self.bytes,
+            'journal_fsyncs': self.fsyncs,
+            'journal_segment': self.segment_index,
+            'journal_mean_batch': self.batch_sizes.summary()['mean'],
+            'journal_enqueue_us_p99': enqueue['p99'],
+            'journal_commit_ms_p50': commit['p50'],
+            'journal_commit_ms_p99': commit['p99'],
+        }
@@ -0,0 +1,53 @@
+from collections import namedtuple
+
+# Action kinds
+NAVIGATE = 'navigate'
+ADD = 'add'
+REDUCE = 'reduce'
+DELETE = 'delete'
+CONFIRM_DELETE = 'confirm_delete'
+CANCEL_DELETE = 'cancel_delete'
+QUIT = 'quit'
+PAGE = 'page'
+
+# What selecting a button does: a kind plus its target (a screen, an item or a page step)
+Action = namedtuple('Action', ['kind', 'target'])
+
+# rect is [x1, y1, x2, y2], inclusive; color None means the primary colour
+LayoutButton = namedtuple('LayoutButton', ['id', 'text', 'rect', 'action', 'color'], defaults=(None,))
+
+# Static text drawn on a screen
+LayoutText = namedtuple('LayoutText', ['text', 'org', 'scale'])
+
+
+class ScreenLayout:
+    """Geometry of one screen, computed once per state change.
+
+    Buttons are bucketed into a uniform grid so a fingertip lookup only
+    tests the few buttons overlapping one cell, however many buttons the
+    screen has.
+    """
+
+    def __init__(self, title, buttons=(), texts=(), cell_size=64):
+        self.title = title
+        self.buttons = list(buttons)
+        self.texts = list(texts)
+        self.cell_size = cell_size
+        self.by_id = {button.id: button for button in self.buttons}
+        self.grid = {}
+        for button in self.buttons:
+            x1, y1, x2, y2 = button.rect
+            for cx in range(x1 // cell_size, x2 // cell_size + 1):
+                for cy in range(y1 // cell_size, y2 // cell_size + 1):
+                    self.grid.setdefault((cx, cy), []).append(button)
+
+    def hit_test(self, point):
+        """Return the button under a point, or None."""
+        if point is None:
+            return None
+        x, y = point
+        for button in self.grid.get((x // self.cell_size, y // self.cell_size), ()):
+            x1, y1, x2, y2 = button.rect
+            if x1 <= x <= x2 and y1 <= y <= y2:
+                return button
+        return None
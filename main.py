@@ -1,79 +1,271 @@
-import cv2
-import mediapipe as mp
-import numpy as np
+import argparse
+import threading
 import time
-import json
 from tkinter import Tk, Label, Frame, Button, StringVar
-from PIL import Image, ImageTk
+from config import (ANALYTICS, CURSOR, DETECTOR, DISPLAY, JOURNAL, MENU, METRICS, MULTI_USER, PIPELINE, POS,
+                    PRESENCE, QUALITY, TRACKING)
+from menu_loader import format_price
+from startup import StartupTimeline
+
+# Only Tk and light modules are imported up front, so the window appears at
+# once; OpenCV, MediaPipe and the modules built on them are imported by
+# TouchlessOrdering.load() on a background thread.
+
+# How often the Tk thread checks on the background load
+STARTUP_POLL_MS = 50
 
 class TouchlessOrdering:
-    def __init__(self, root):
+    def __init__(self, root, source='camera', pipelined=False, inference_workers=0, alloc_report=0,
+                 display=DISPLAY['SINK'], adaptive_tracking=False, hud=False, metrics_file=None, startup=None,
+                 adaptive_quality=False, stream=False, detector=None, users=1):
         self.root = root
         self.root.title("Touchless Ordering System")
         self.root.geometry("1200x600")
-
-        # Initialize MediaPipe
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            max_num_hands=1,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.7
-        )
-        self.mp_draw = mp.solutions.drawing_utils
-
-        # Initialize camera
-        self.cap = cv2.VideoCapture(0)
-        if not self.cap.isOpened():
-            raise Exception("Could not open camera. Please check your camera connection.")
-
-        # Load menu from JSON file
-        self.menu = self.load_menu("menu.json")
-        self.cart = {}
-
-        # Screen states
-        self.SCREENS = {
-            'HOME': 'home_screen',
-            'ADD_ITEMS': 'add_items_screen',
-            'VIEW_CART': 'view_cart_screen',
-            'CHECKOUT': 'checkout_screen',
-            'CONFIRM_DELETE': 'confirm_delete_screen'
-        }
-        self.current_screen = self.SCREENS['HOME']
-
-        # UI Elements
-        self.home_buttons = {
-            "Add Items": [50, 100, 350, 170],
-            "View Cart": [50, 200, 350, 270],
-            "Quit": [50, 300, 350, 370]
-        }
-
-        self.add_items_buttons = {}
-        self.view_cart_buttons = {}
-        self.confirm_delete_buttons = {
-            "Yes": [50, 300, 200, 370],
-            "No": [250, 300, 400, 370]
-        }
-
-        # Selection cooldown
-        self.selection_cooldown = 1.0  # Seconds
-        self.last_selection_time = 0
-
-        # Item to be deleted (for confirmation dialog)
-        self.item_to_delete = None
-
-        # Color scheme
-        self.COLORS = {
-            'PRIMARY': (46, 204, 113),  # Green
-            'SECONDARY': (52, 152, 219),  # Blue
-            'ACCENT': (231, 76, 60),  # Red
-            'BACKGROUND': (44, 62, 80),  # Dark Blue
-            'TEXT': (236, 240, 241),  # White
-            'HOVER': (39, 174, 96)  # Darker Green
-        }
+        self.startup = startup if startup is not None else StartupTimeline()
+
+        self.source_spec = source
+        self.pipelined = pipelined
+        self.inference_workers = inference_workers
+        self.alloc_report_frames = alloc_report
+        self.display = display
+        self.adaptive_tracking = adaptive_tracking
+        self.adaptive_quality = adaptive_quality
+        self.stream = stream
+        self.detector = dict(DETECTOR, BACKEND=detector or DETECTOR['BACKEND'])
+        self.users = users
+        self.hud_visible = hud
+        self.metrics_file = metrics_file
+
+        # Built by load() on the startup thread
+        self.session = None
+        self.source = None
+        self.pipeline = None
+        self.status = "Starting..."
+        self.load_error = None
+        self.loaded = threading.Event()
+
+        self.running = False
+        self.last_stats_time = time.time()
+        self.display_latency = 0.0
 
         # Tkinter GUI Setup
         self.setup_gui()
 
+    def load(self):
+        """Import OpenCV and MediaPipe, open the frame source, warm up the hand model and build the session.
+
+        Runs on a background thread while the window is already up. The
+        camera opens in parallel with the hand model. No Tk widget is
+        touched here; finish_startup() completes the UI on the Tk thread.
+        """
+        try:
+            self.status = "Loading..."
+            import os
+            import socket
+            from concurrent.futures import ThreadPoolExecutor
+            from analytics import OrderAnalytics
+            from cursor_filter import create_cursor_filter
+            from frame_path import AllocationReport, FramePath
+            from frame_source import open_source
+            from gestures import GestureEngine
+            from journal import OrderJournal
+            from menu_loader import MenuWatcher, load_menu
+            from metrics import HUD, MetricsExporter, StageTimer
+            from pipeline import Pacer
+            from pos_client import OrderSubmitter
+            from presence import MotionDetector, PresenceScheduler
+            from quality import QualityController, describe
+            from session import OrderingSession
+            self.startup.mark('modules')
+
+            # Open the frame source. Frames are read into reused buffers and
+            # converted to RGB once; a buffer is reused only after the render
+            # stage (or the pipeline, for a dropped frame) releases it. With
+            # --pipelined, up to one frame per inference thread is in flight on
+            # top of the capture, mailbox and render stages, so that many free
+            # buffers are kept.
+            def open_camera():
+                source = open_source(self.source_spec, loop=True, slots=5 + max(1, self.inference_workers))
+                self.startup.mark('camera')
+                return source
+
+            with ThreadPoolExecutor(1, thread_name_prefix="camera-open") as opener:
+                opening = opener.submit(open_camera)
+                self.frame_path = FramePath(mirror=True, display_size=DISPLAY['SIZE'])
+                self.inference_scale = 1.0
+
+                # Optionally adapt capture, inference and frame rate to a frame-time budget
+                if self.adaptive_quality:
+                    self.quality = QualityController(QUALITY['LEVELS'], QUALITY['BUDGET_MS'], QUALITY['START_LEVEL'],
+                                                     QUALITY['WINDOW'], QUALITY['HEADROOM'], QUALITY['UPGRADE_WAIT'],
+                                                     reset_after=QUALITY['UPGRADE_RESET'])
+                    level = self.quality.level
+                    tracker_options = dict(model_complexity=level.model_complexity,
+                                           min_tracking_confidence=level.tracking_confidence)
+                else:
+                    self.quality = None
+                    tracker_options = {}
+
+                # Initialize hand tracking, in-process or in worker processes,
+                # and run one inference so the first camera frame isn't slow
+                self.status = "Loading hand model..."
+                if self.inference_workers > 0:
+                    from inference_worker import InferenceWorkerPool
+                    import numpy as np
+                    self.hand_tracker = None
+                    shape = opening.result().frame_shape()
+                    self.worker_pool = InferenceWorkerPool(shape, workers=self.inference_workers,
+                                                           max_hands=self.users, detector=self.detector)
+                    # The first call also waits for the workers to load the model
+                    self.worker_pool.detect(np.zeros(shape, dtype=np.uint8), timeout=60.0)
+                else:
+                    from detectors import create_detector
+                    self.hand_tracker = create_detector(self.detector, max_num_hands=self.users, **tracker_options)
+                    self.hand_tracker.warm_up()
+                    self.worker_pool = None
+                self.startup.mark('model')
+                self.status = "Starting camera..."
+                self.source = opening.result()
+
+            # Optionally track the hand in a crop and skip frames between inferences
+            if self.adaptive_tracking:
+                from roi_tracking import AdaptiveTracker
+                self.adaptive_tracker = AdaptiveTracker(
+                    self.hand_tracker.detect_landmarks,
+                    full_frame_interval=TRACKING['FULL_FRAME_INTERVAL'],
+                    skip_frames=TRACKING['SKIP_FRAMES'],
+                    padding=TRACKING['ROI_PADDING'],
+                    scale=TRACKING['ROI_SCALE']
+                )
+            else:
+                self.adaptive_tracker = None
+
+            # Load the compiled menu and watch its file for changes. The cursor
+            # is smoothed and led by the measured capture-to-display latency.
+            # With several users, each hand gets its own lane, session and cursor.
+            if self.users > 1:
+                from multi_user import MultiUserSession
+                self.session = MultiUserSession(
+                    load_menu(MENU['PATH']), self.users, on_cart_change=self.update_cart_display,
+                    on_quit=self.shutdown, on_order=self.order_completed,
+                    make_gestures=lambda: GestureEngine(cursor=create_cursor_filter(CURSOR)),
+                    max_distance=MULTI_USER['MAX_DISTANCE'], forget_after=MULTI_USER['FORGET_AFTER'])
+                self.sessions = self.session.sessions
+            else:
+                gestures = GestureEngine(cursor=create_cursor_filter(CURSOR))
+                self.session = OrderingSession(load_menu(MENU['PATH']), on_cart_change=self.update_cart_display,
+                                               on_quit=self.shutdown, on_order=self.order_completed,
+                                               gestures=gestures)
+                self.sessions = [self.session]
+            self.menu_watcher = MenuWatcher(MENU['PATH'], MENU['RELOAD_INTERVAL'])
+
+            # Optional per-frame allocation report
+            self.alloc_report = AllocationReport(self.alloc_report_frames) if self.alloc_report_frames > 0 else None
+
+            # Per-stage timing, HUD (toggled with the H key) and metrics export
+            self.timer = StageTimer(METRICS['HISTOGRAM_SIZE'])
+            self.source.timer = self.timer
+            self.hud = HUD(self.timer, visible=self.hud_visible)
+            if self.metrics_file:
+                self.metrics_exporter = MetricsExporter(self.timer, self.metrics_file, METRICS['EXPORT_INTERVAL'],
+                                                        counters=self.counters)
+            else:
+                self.metrics_exporter = None
+            self.pacer = Pacer(PIPELINE['TARGET_FPS'])
+            self.active_fps = PIPELINE['TARGET_FPS']
+
+            # Run the hand model only when something moves, and idle when nobody is there
+            if PRESENCE['ENABLED']:
+                motion = MotionDetector(PRESENCE['MOTION_SIZE'], PRESENCE['MOTION_THRESHOLD'],
+                                        PRESENCE['MOTION_FRACTION'])
+                self.presence = PresenceScheduler(motion, PRESENCE['IDLE_AFTER'], PRESENCE['HOLD'],
+                                                  PRESENCE['IDLE_FPS'])
+            else:
+                self.presence = None
+            if self.quality is not None:
+                self.apply_quality(self.quality.level)
+                print(f"Quality starts at level {self.quality.index}: {describe(self.quality.level)}")
+
+            # The order journal recovers the last cart now; finish_startup() restores it
+            if JOURNAL['DIRECTORY']:
+                self.journal = OrderJournal(JOURNAL['DIRECTORY'], JOURNAL['FSYNC_INTERVAL'],
+                                            JOURNAL['SEGMENT_BYTES'], JOURNAL['KEEP_SEGMENTS'])
+            else:
+                self.journal = None
+
+            # Completed orders and session events go to this kiosk's analytics store
+            if ANALYTICS['DIRECTORY']:
+                self.analytics = OrderAnalytics(os.path.join(ANALYTICS['DIRECTORY'],
+                                                             ANALYTICS['KIOSK'] or socket.gethostname()),
+                                                ANALYTICS['FLUSH_INTERVAL'])
+            else:
+                self.analytics = None
+
+            # Completed orders go to the kitchen/POS endpoint off the UI thread
+            if POS['URL']:
+                self.pos_submitter = OrderSubmitter(POS['URL'], POS['SPOOL_DIRECTORY'], POS['QUEUE_SIZE'],
+                                                    POS['MAX_BATCH'], POS['CONNECTIONS'],
+                                                    max_retries=POS['MAX_RETRIES'])
+            else:
+                self.pos_submitter = None
+        except Exception as error:
+            self.load_error = error
+        self.loaded.set()
+
+    def check_loaded(self):
+        """Show the background load's progress; finish starting up once it is done."""
+        if not self.loaded.is_set():
+            self.status_var.set(self.status)
+            self.root.after(STARTUP_POLL_MS, self.check_loaded)
+        elif self.load_error is not None:
+            self.status_var.set(f"Startup failed: {self.load_error}")
+            raise self.load_error
+        else:
+            self.finish_startup()
+
+    def finish_startup(self):
+        """Complete the UI on the Tk thread, start the background services and the frame loop."""
+        from display_sink import TeeSink, create_sink, create_stream_sink
+        self.display_sink = create_sink(self.display, self.camera_label)
+        if self.stream and self.display != 'mjpeg':
+            # Mirror the kiosk screen, e.g. to a supervisor station
+            self.display_sink = TeeSink([self.display_sink, create_stream_sink()])
+        self.root.bind('h', self.hud.toggle)
+
+        # Restore an unfinished cart from the order journal, then journal every change.
+        # With several users the journal only records completed orders.
+        if self.journal is not None and self.users == 1:
+            if self.journal.cart:
+                self.session.cart.restore(self.journal.cart)
+                print(f"Restored cart from the order journal: {dict(self.session.cart.items())}")
+            self.journal.watch(self.session.cart)
+        if self.analytics is not None:
+            for session in self.sessions:
+                self.analytics.watch(session.cart)
+        self.update_cart_display()
+        self.status_var.set("")
+
+        self.running = True
+        self.menu_watcher.start()
+        if self.journal is not None:
+            self.journal.start()
+        if self.analytics is not None:
+            self.analytics.start()
+        if self.pos_submitter is not None:
+            self.pos_submitter.start()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.start()
+        self.startup.mark('ready')
+        if self.pipelined:
+            from pipeline import FramePipeline
+            self.pipeline = FramePipeline(self.source.read, self.timer.timed('inference', self.detect_hands),
+                                          inference_threads=max(1, self.inference_workers),
+                                          release=self.source.release)
+            self.pipeline.start()
+            self.update_frame_pipelined()
+        else:
+            self.update_frame()
+
     def setup_gui(self):
         """Set up the Tkinter GUI."""
         # Left Frame for Camera Feed
@@ -84,6 +276,11 @@ class TouchlessOrdering:
         self.right_frame = Frame(self.root, width=400, height=600, bg="white")
         self.right_frame.pack(side="right", fill="both", expand=True)
 
+        # Startup progress and camera connection status
+        self.status_var = StringVar(value=self.status)
+        self.status_label = Label(self.left_frame, textvariable=self.status_var, font=("Arial", 14))
+        self.status_label.pack(pady=10)
+
         # Camera Feed Label
         self.camera_label = Label(self.left_frame)
         self.camera_label.pack()
@@ -102,352 +299,271 @@ class TouchlessOrdering:
         self.total_label = Label(self.right_frame, textvariable=self.total_var, font=("Arial", 14, "bold"), bg="white")
         self.total_label.pack(pady=10)
 
-        # Update Cart Display
-        self.update_cart_display()
-
     def update_cart_display(self):
-        """Update the cart display in the Tkinter GUI."""
-        cart_text = ""
-        total = 0
-        for item, quantity in self.cart.items():
-            price = self.menu[item] * quantity
-            total += price
-            cart_text += f"{item} x{quantity}: ${price:.2f}\n"
-        self.cart_items_var.set(cart_text)
-        self.total_var.set(f"Total: ${total:.2f}")
-
-    def load_menu(self, filename):
-        """Load menu items from a JSON file."""
-        try:
-            with open(filename, 'r') as file:
-                return json.load(file)
-        except FileNotFoundError:
-            print(f"Menu file '{filename}' not found. Using default menu.")
-            return {
-                "Burger": 2.01,
-                "Pizza": 5.00,
-                "Pasta": 4.50,
-                "Fries": 1.50,
-                "Soda": 1.00,
-                "Coffee": 2.00
-            }
-
-    def check_collision(self, point, rect):
-        """Check if a point is within a rectangle."""
-        if point is None:
-            return False
-        x, y = point
-        x1, y1, x2, y2 = rect
-        return x1 <= x <= x2 and y1 <= y <= y2
-
-    def draw_fancy_button(self, frame, text, coords, is_hover=False, color=None):
-        """Draw a modern-looking button with animations."""
-        if color is None:
-            color = self.COLORS['PRIMARY']
-
-        # Create button shadow
-        shadow_offset = 5
-        shadow_coords = [x + shadow_offset for x in coords]
-        cv2.rectangle(frame, (shadow_coords[0], shadow_coords[1]),
-                      (shadow_coords[2], shadow_coords[3]),
-                      (0, 0, 0), -1)
-
-        # Create main button
-        button_color = self.COLORS['HOVER'] if is_hover else color
-        cv2.rectangle(frame, (coords[0], coords[1]), (coords[2], coords[3]),
-                      button_color, cv2.FILLED)
-
-        # Add button border
-        cv2.rectangle(frame, (coords[0], coords[1]), (coords[2], coords[3]),
-                      self.COLORS['TEXT'], 2)
-
-        # Add text with shadow
-        text_size = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)[0]
-        text_x = coords[0] + (coords[2] - coords[0] - text_size[0]) // 2
-        text_y = coords[1] + (coords[3] - coords[1] + text_size[1]) // 2
-
-        # Draw text shadow
-        cv2.putText(frame, text, (text_x + 2, text_y + 2),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
-
-        # Draw main text
-        cv2.putText(frame, text, (text_x, text_y),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, self.COLORS['TEXT'], 2)
-
-    def draw_home_screen(self, frame, index_finger_pos):
-        """Draw the home screen."""
-        self.draw_header(frame, "Home Screen")
-        for text, coords in self.home_buttons.items():
-            is_hover = self.check_collision(index_finger_pos, coords)
-            self.draw_fancy_button(frame, text, coords, is_hover)
-
-    def draw_add_items_screen(self, frame, index_finger_pos):
-        """Draw the add items screen."""
-        self.draw_header(frame, "Add Items")
-        y_offset = 100
-        self.add_items_buttons.clear()
-
-        for item, price in self.menu.items():
-            display_text = f"{item}: ${price:.2f}"
-            cv2.putText(frame, display_text, (50, y_offset),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, self.COLORS['TEXT'], 2)
-
-            # Add + button
-            add_button_coords = [300, y_offset - 25, 350, y_offset + 5]
-            self.add_items_buttons[f"add_{item}"] = add_button_coords
-            is_hover = self.check_collision(index_finger_pos, add_button_coords)
-            self.draw_fancy_button(frame, "+", add_button_coords, is_hover, self.COLORS['SECONDARY'])
-
-            # Display current quantity in cart
-            quantity = self.cart.get(item, 0)
-            cv2.putText(frame, f"x{quantity}", (370, y_offset),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, self.COLORS['TEXT'], 2)
-
-            # Add - button
-            reduce_button_coords = [400, y_offset - 25, 450, y_offset + 5]
-            self.add_items_buttons[f"reduce_{item}"] = reduce_button_coords
-            is_hover = self.check_collision(index_finger_pos, reduce_button_coords)
-            self.draw_fancy_button(frame, "-", reduce_button_coords, is_hover, self.COLORS['ACCENT'])
-
-            y_offset += 50
-
-        # Back to Home button
-        back_button_coords = [50, y_offset, 350, y_offset + 70]
-        self.add_items_buttons["back_to_home"] = back_button_coords
-        is_hover = self.check_collision(index_finger_pos, back_button_coords)
-        self.draw_fancy_button(frame, "Back to Home", back_button_coords, is_hover, self.COLORS['ACCENT'])
-
-    def draw_view_cart_screen(self, frame, index_finger_pos, finger_count):
-        """Draw the view cart screen."""
-        self.draw_header(frame, "View Cart")
-        y_offset = 100
-        self.view_cart_buttons.clear()
-
-        if self.cart:
-            for item, quantity in self.cart.items():
-                price = self.menu[item] * quantity
-                text = f"{item} x{quantity}: ${price:.2f}"
-                cv2.putText(frame, text, (50, y_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.7, self.COLORS['TEXT'], 2)
-
-                delete_coords = [350, y_offset - 25, 400, y_offset + 5]
-                self.view_cart_buttons[f"delete_{item}"] = delete_coords
-                is_hover = self.check_collision(index_finger_pos, delete_coords)
-
-                if is_hover and finger_count == 1:
-                    self.item_to_delete = item
-                    self.current_screen = self.SCREENS['CONFIRM_DELETE']
-                    return
-
-                self.draw_fancy_button(frame, "X", delete_coords, is_hover, self.COLORS['ACCENT'])
-                y_offset += 50
-
-            checkout_coords = [50, y_offset, 350, y_offset + 70]
-            self.view_cart_buttons["checkout"] = checkout_coords
-            is_hover = self.check_collision(index_finger_pos, checkout_coords)
-            self.draw_fancy_button(frame, "Checkout", checkout_coords, is_hover, self.COLORS['SECONDARY'])
-
-            back_button_coords = [50, frame.shape[0] - 100, 350, frame.shape[0] - 30]
-            self.view_cart_buttons["back_to_home"] = back_button_coords
-            is_hover = self.check_collision(index_finger_pos, back_button_coords)
-            self.draw_fancy_button(frame, "Back to Home", back_button_coords, is_hover, self.COLORS['ACCENT'])
-
-        else:
-            cv2.putText(frame, "Your cart is empty!", (50, 200), cv2.FONT_HERSHEY_SIMPLEX, 1, self.COLORS['TEXT'], 2)
-
-    def draw_confirm_delete_screen(self, frame, index_finger_pos):
-        """Draw the confirm delete screen and handle deletion."""
-        self.draw_header(frame, "Confirm Delete")
-        
-        if self.item_to_delete:
-            # Display the confirmation message
-            cv2.putText(frame, f"Delete {self.item_to_delete}?", (50, 200), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, self.COLORS['TEXT'], 2)
-
-            # Draw the "Yes" and "No" buttons
-            for text, coords in self.confirm_delete_buttons.items():
-                is_hover = self.check_collision(index_finger_pos, coords)
-                self.draw_fancy_button(frame, text, coords, is_hover)
-
-                # Handle button clicks
-                if is_hover:
-                    if text == "Yes":
-                        # Delete the item from the cart
-                        if self.item_to_delete in self.cart:
-                            del self.cart[self.item_to_delete]
-                            print(f"Deleted {self.item_to_delete} from the cart.")
-                        self.current_screen = self.SCREENS['VIEW_CART']
-                        self.item_to_delete = None  # Reset the item to delete
-                    elif text == "No":
-                        # Cancel deletion and return to the cart screen
-                        self.current_screen = self.SCREENS['VIEW_CART']
-                        self.item_to_delete = None  # Reset the item to delete
+        """Update the cart display in the Tkinter GUI; called only when the cart changes."""
+        if self.users == 1:
+            cart_text, total = self.session.cart.get_cart_summary()
+            self.cart_items_var.set(cart_text)
+            self.total_var.set(f"Total: {format_price(total)}")
+            return
+        summaries = [session.cart.get_cart_summary() for session in self.sessions]
+        self.cart_items_var.set("\n\n".join(f"Customer {lane + 1}:\n{cart_text}"
+                                             for lane, (cart_text, _) in enumerate(summaries)))
+        self.total_var.set("  ".join(f"{lane + 1}: {format_price(total)}" for lane, (_, total) in enumerate(summaries)))
+
+    def detect_hands(self, source_frame):
+        """Return mirrored hand landmarks for a source frame, running inference if needed."""
+        now = time.perf_counter()
+        if source_frame.hands is not None:
+            hands = source_frame.hands
+        elif self.presence is not None and not self.presence.wants_inference(source_frame.rgb, now):
+            hands = []
+        elif self.adaptive_tracker is not None:
+            hands = self.adaptive_tracker.process(source_frame.rgb)
+        elif self.worker_pool is not None:
+            hands = self.worker_pool.detect(source_frame.rgb)
         else:
-            # If no item is selected for deletion, return to the cart screen
-            self.current_screen = self.SCREENS['VIEW_CART']
-            self.item_to_delete = None
-
-    def draw_checkout_screen(self, frame):
-        """Draw the checkout screen and handle the transition back to the home screen."""
-        self.draw_header(frame, "Order Placed!")
-        total = 0
-        y_offset = 200
-
-        # Display order items and calculate total
-        for item, quantity in self.cart.items():
-            price = self.menu[item] * quantity
-            total += price
-            order_text = f"{item} x{quantity}: ${price:.2f}"
-            cv2.putText(frame, order_text, (50, y_offset),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, self.COLORS['TEXT'], 2)
-            y_offset += 30
-
-        # Display total
-        cv2.putText(frame, f"Total: ${total:.2f}", (50, y_offset),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, self.COLORS['TEXT'], 2)
-
-        # Track the time when the checkout screen is first displayed
-        if not hasattr(self, 'checkout_start_time'):
-            self.checkout_start_time = time.time()
-
-        # Transition back to the home screen after 5 seconds
-        if time.time() - self.checkout_start_time >= 5:
-            self.cart.clear()  # Clear the cart
-            self.current_screen = self.SCREENS['HOME']  # Return to the home screen
-            del self.checkout_start_time  # Reset the timer
-
-    def draw_header(self, frame, text):
-        """Draw a fancy header."""
-        cv2.rectangle(frame, (0, 0), (frame.shape[1], 70),
-                      self.COLORS['SECONDARY'], cv2.FILLED)
-        cv2.putText(frame, text, (50, 45),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1, self.COLORS['TEXT'], 2)
-
-    def handle_selection(self, finger_count, index_finger_pos):
-        """Handle selection based on finger count."""
-        current_time = time.time()
-        if current_time - self.last_selection_time < self.selection_cooldown:
+            rgb = self.frame_path.inference_frame(source_frame.rgb, self.inference_scale)
+            hands = self.hand_tracker.detect_landmarks(rgb)
+        if self.presence is not None:
+            self.presence.observe(hands, now)
+        return self.frame_path.mirror_landmarks(hands)
+
+    def apply_quality(self, level):
+        """Switch capture format, inference scale, model settings and frame rate to a quality level.
+
+        Each takes effect on the thread that owns it: the capture and
+        the model before their next frame, the pacer from the next frame.
+        Nothing changes once the app has shut down and closed the source.
+        """
+        if not self.running:
             return
-
-        if self.current_screen == self.SCREENS['HOME']:
-            for text, coords in self.home_buttons.items():
-                if self.check_collision(index_finger_pos, coords):
-                    if text == "Add Items":
-                        self.current_screen = self.SCREENS['ADD_ITEMS']
-                    elif text == "View Cart":
-                        self.current_screen = self.SCREENS['VIEW_CART']
-                    elif text == "Quit":
-                        self.cap.release()
-                        cv2.destroyAllWindows()
-                        self.root.quit()
-                    self.last_selection_time = current_time
-                    break
-
-        elif self.current_screen == self.SCREENS['ADD_ITEMS']:
-            for button_id, coords in self.add_items_buttons.items():
-                if self.check_collision(index_finger_pos, coords):
-                    if button_id.startswith("add_"):
-                        item = button_id[4:]
-                        self.cart[item] = self.cart.get(item, 0) + 1
-                        self.update_cart_display()
-                    elif button_id.startswith("reduce_"):
-                        item = button_id[7:]
-                        if item in self.cart:
-                            if self.cart[item] > 1:
-                                self.cart[item] -= 1
-                            else:
-                                del self.cart[item]
-                            self.update_cart_display()
-                    elif button_id == "back_to_home":
-                        self.current_screen = self.SCREENS['HOME']
-                    self.last_selection_time = current_time
-                    break
-
-        elif self.current_screen == self.SCREENS['VIEW_CART']:
-            for button_id, coords in self.view_cart_buttons.items():
-                if button_id.startswith("delete_"):
-                    if self.check_collision(index_finger_pos, coords):
-                        self.item_to_delete = button_id[7:]
-                        self.current_screen = self.SCREENS['CONFIRM_DELETE']
-                        self.last_selection_time = current_time
-                        return
-
-
-            if self.check_collision(index_finger_pos, self.view_cart_buttons.get("checkout", [-1, -1, -1, -1])):
-                self.current_screen = self.SCREENS['CHECKOUT']
-                self.last_selection_time = current_time
-            elif self.check_collision(index_finger_pos, self.view_cart_buttons.get("back_to_home", [-1, -1, -1, -1])):
-                self.current_screen = self.SCREENS['HOME']
-                self.last_selection_time = current_time
-
-        elif self.current_screen == self.SCREENS['CONFIRM_DELETE']:
-            if finger_count == 2:
-                for text, coords in self.confirm_delete_buttons.items():
-                    if self.check_collision(index_finger_pos, coords):
-                        if text == "Yes":
-                            if self.item_to_delete in self.cart:
-                                del self.cart[self.item_to_delete]
-                                self.update_cart_display()
-                        elif text == "No":
-                            pass
-                        self.current_screen = self.SCREENS['VIEW_CART']
-                        self.item_to_delete = None
-                        self.last_selection_time = current_time
-                        return
+        self.source.request_format(level.width, level.height, level.fourcc, QUALITY['BUFFER_SIZE'],
+                                   level.target_fps)
+        self.inference_scale = level.inference_scale
+        self.active_fps = level.target_fps
+        self.hand_tracker.configure(model_complexity=level.model_complexity,
+                                    min_tracking_confidence=level.tracking_confidence)
+        self.pacer.set_fps(level.target_fps)
+
+    def display_frame(self, frame):
+        """Show a rendered RGB frame through the display sink."""
+        self.display_sink.show(frame)
+
+    def order_completed(self, order):
+        """Journal a completed order, record it for analytics and submit it to the POS endpoint."""
+        if self.journal is not None:
+            self.journal.record_order(order)
+        if self.analytics is not None:
+            self.analytics.record_order(order)
+        if self.pos_submitter is not None:
+            self.pos_submitter.submit(order)
+
+    def apply_menu_update(self):
+        """Swap in a menu the watcher has reloaded since the last frame."""
+        menu = self.menu_watcher.poll()
+        if menu is not None:
+            self.session.set_menu(menu)
+            print(f"Menu reloaded: {len(menu)} items.")
+
+    def present(self, source_frame, hands, captured_at):
+        """Mirror, draw and display a frame whose hands are known, timing each stage.
+
+        captured_at is the frame's capture time on the timer's clock; the
+        running average of capture-to-display times is the latency the
+        cursor filter compensates. Choosing Quit shuts down inside
+        session.step(); the rest of the frame is then skipped, since the
+        sinks, source and pipeline are closed.
+        """
+        self.apply_menu_update()
+        start = self.timer.now()
+        frame = self.frame_path.to_display(source_frame.rgb)
+        start = self.timer.lap('mirror', start)
+        self.session.step(frame, hands, self.display_latency)
+        if not self.running:
+            return
+        if self.presence is not None:
+            self.presence.draw(frame)
+        self.hud.draw(frame)
+        start = self.timer.lap('ui', start)
+        self.display_frame(frame)
+        shown = self.timer.lap('display', start)
+        self.display_latency += 0.1 * (shown - captured_at - self.display_latency)
+        if self.presence is not None:
+            self.pacer.set_fps(self.presence.idle_fps if self.presence.idle else self.active_fps)
+        if self.quality is not None and not (self.presence is not None and self.presence.idle):
+            level = self.quality.update((shown - captured_at) * 1000, shown)
+            if level is not None:
+                self.apply_quality(level)
+        self.timer.frame_done()
+        if self.alloc_report is not None:
+            self.alloc_report.tick()
+
+        self.startup.mark('first_frame')
+        if hands and not self.startup.reached('first_landmark'):
+            self.startup.mark('first_landmark')
+            print(self.startup.report())
+
+    def show_camera_status(self):
+        """Tell customers when the camera is lost; the source reconnects by itself."""
+        status = "" if self.source.connected else "Camera disconnected, reconnecting..."
+        if status != self.status_var.get():
+            self.status_var.set(status)
 
     def update_frame(self):
         """Update the camera feed and handle selections."""
-        success, frame = self.cap.read()
-        if not success:
-            print("Ignoring empty camera frame.")
+        if not self.running:
             return
 
-        frame = cv2.flip(frame, 1)
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        rgb_frame.flags.writeable = False
-        results = self.hands.process(rgb_frame)
-        rgb_frame.flags.writeable = True
-        frame = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
-
-        index_finger_pos = None
-        finger_count = 0
-
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                self.mp_draw.draw_landmarks(frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
-                index_finger_pos = (int(hand_landmarks.landmark[8].x * frame.shape[1]),
-                                   int(hand_landmarks.landmark[8].y * frame.shape[0]))
-                finger_count = len(results.multi_hand_landmarks)
-
-                # Handle selection
-                self.handle_selection(finger_count, index_finger_pos)
-
-        # Draw the current screen
-        if self.current_screen == self.SCREENS['HOME']:
-            self.draw_home_screen(frame, index_finger_pos)
-        elif self.current_screen == self.SCREENS['ADD_ITEMS']:
-            self.draw_add_items_screen(frame, index_finger_pos)
-        elif self.current_screen == self.SCREENS['VIEW_CART']:
-            self.draw_view_cart_screen(frame, index_finger_pos, finger_count)
-        elif self.current_screen == self.SCREENS['CHECKOUT']:
-            self.draw_checkout_screen(frame)
-        elif self.current_screen == self.SCREENS['CONFIRM_DELETE']:
-            self.draw_confirm_delete_screen(frame, index_finger_pos)
-
-        # Convert the frame to a format Tkinter can display
-        img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-        imgtk = ImageTk.PhotoImage(image=img)
-        self.camera_label.imgtk = imgtk
-        self.camera_label.configure(image=imgtk)
+        source_frame = self.source.read()
+        if source_frame is not None:
+            start = captured_at = self.timer.now()
+            hands = self.detect_hands(source_frame)
+            self.timer.lap('inference', start)
+            self.present(source_frame, hands, captured_at)
+            self.source.release(source_frame)
+            if not self.running:
+                return
+        elif self.source.connected:
+            print("Ignoring empty camera frame.")
+
+        self.show_camera_status()
+        self.report_stats()
 
         # Schedule the next frame update
-        self.root.after(10, self.update_frame)
+        self.root.after(self.pacer.next_delay_ms(), self.update_frame)
+
+    def update_frame_pipelined(self):
+        """Render the newest frame produced by the capture/inference threads."""
+        if not self.running:
+            return
+
+        packet = self.pipeline.poll()
+        if packet is not None:
+            self.present(*packet)
+            self.source.release(packet[0])
+            if not self.running:
+                return
+
+        self.show_camera_status()
+        self.report_stats()
+        self.root.after(self.pacer.next_delay_ms(), self.update_frame_pipelined)
+
+    def counters(self):
+        """Flat numeric counters of the pipeline and tracker, for metrics export."""
+        counters = {'display_latency_ms': self.display_latency * 1000}
+        counters.update(self.startup.stats())
+        counters.update(self.display_sink.stats())
+        if self.quality is not None:
+            counters.update(self.quality.stats())
+        if self.presence is not None:
+            counters.update(self.presence.stats())
+        if self.pipeline is not None:
+            counters.update(self.pipeline.stats())
+        if self.adaptive_tracker is not None:
+            counters.update(self.adaptive_tracker.stats())
+        if self.journal is not None:
+            counters.update(self.journal.stats())
+        if self.analytics is not None:
+            counters.update(self.analytics.stats())
+        if self.pos_submitter is not None:
+            counters.update(self.pos_submitter.stats())
+        return counters
+
+    def report_stats(self):
+        """Periodically print pipeline and tracking counters."""
+        now = time.time()
+        if now - self.last_stats_time < PIPELINE['STATS_INTERVAL']:
+            return
+        self.last_stats_time = now
+        if self.pipeline is not None:
+            print(f"Pipeline stats: {self.pipeline.stats()}")
+        if self.adaptive_tracker is not None:
+            print(f"Tracking stats: {self.adaptive_tracker.stats()}")
+        if self.journal is not None:
+            print(f"Journal stats: {self.journal.stats()}")
+        if self.pos_submitter is not None:
+            print(f"POS stats: {self.pos_submitter.stats()}")
+        if self.stream or self.display == 'mjpeg':
+            print(f"Stream stats: {self.display_sink.stats()}")
+
+    def shutdown(self):
+        """Stop the frame loop, release the frame source and close the window."""
+        self.running = False
+        self.menu_watcher.stop()
+        if self.pipeline is not None:
+            self.pipeline.stop()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+        if self.journal is not None:
+            self.journal.stop()
+        if self.analytics is not None:
+            self.analytics.stop()
+        if self.pos_submitter is not None:
+            self.pos_submitter.stop()
+        if self.worker_pool is not None:
+            self.worker_pool.close()
+        else:
+            self.hand_tracker.close()
+        self.display_sink.close()
+        self.source.close()
+        import cv2
+        cv2.destroyAllWindows()
+        if not self.startup.reached('first_landmark'):
+            print(self.startup.report())
+        self.root.quit()
 
     def run(self):
-        """Start the application."""
-        self.update_frame()
+        """Show the window at once, load the camera and hand model in the background, then start."""
+        self.root.update()
+        self.startup.mark('window')
+        threading.Thread(target=self.load, name="startup", daemon=True).start()
+        self.root.after(STARTUP_POLL_MS, self.check_loaded)
         self.root.mainloop()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Touchless Ordering System")
+    parser.add_argument("--source", default="camera",
+                        help="'camera', 'camera:N', a video file, an image directory or an .npz landmark recording")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="run capture and inference on background threads")
+    parser.add_argument("--inference-workers", type=int, default=0, metavar="N",
+                        help="run hand inference in N separate processes (0 = in-process)")
+    parser.add_argument("--alloc-report", type=int, default=0, metavar="FRAMES",
+                        help="trace allocations and report bytes allocated per frame every FRAMES frames")
+    parser.add_argument("--display", default=DISPLAY['SINK'],
+                        help="how rendered frames are shown: one of display_sink.SINKS (pil, paste, ppm, opencv, "
+                             "mjpeg)")
+    parser.add_argument("--stream", action="store_true",
+                        help="also stream the rendered display as MJPEG over HTTP (address in config.STREAM)")
+    parser.add_argument("--detector", default=DETECTOR['BACKEND'],
+                        help="hand detection backend: one of detectors.DETECTORS (mediapipe, onnx, mock)")
+    parser.add_argument("--users", type=int, default=1, metavar="N",
+                        help="track up to N hands, each ordering in its own lane of the screen (see MULTI_USER)")
+    parser.add_argument("--adaptive-tracking", action="store_true",
+                        help="run inference on a crop around the hand and skip frames in between")
+    parser.add_argument("--adaptive-quality", action="store_true",
+                        help="lower or raise capture size, inference scale, model complexity and FPS "
+                             "to hold QUALITY['BUDGET_MS'] (see config.py)")
+    parser.add_argument("--hud", action="store_true",
+                        help="show FPS and per-stage timings on screen (toggle with H)")
+    parser.add_argument("--metrics-file", metavar="PATH",
+                        help="periodically write timings to PATH (.prom for Prometheus text, else JSON)")
+    args = parser.parse_args()
+    if args.adaptive_tracking and args.inference_workers > 0:
+        parser.error("--adaptive-tracking runs in-process and cannot be combined with --inference-workers")
+    if args.adaptive_tracking and args.users > 1:
+        parser.error("--adaptive-tracking follows one hand and cannot be combined with --users")
+    if args.adaptive_quality and args.inference_workers > 0:
+        parser.error("--adaptive-quality changes frame sizes and the model in-process; "
+                     "it cannot be combined with --inference-workers")
+
+    startup = StartupTimeline()
     root = Tk()
-    app = TouchlessOrdering(root)
-    app.run()
\ No newline at end of file
+    app = TouchlessOrdering(root, source=args.source, pipelined=args.pipelined, inference_workers=args.inference_workers,
+                            alloc_report=args.alloc_report, display=args.display,
+                            adaptive_tracking=args.adaptive_tracking, hud=args.hud,
+                            metrics_file=args.metrics_file, startup=startup,
+                            adaptive_quality=args.adaptive_quality, stream=args.stream,
+                            detector=args.detector, users=args.users)
+    app.run()
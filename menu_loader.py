@@ -1,18 +1,210 @@
 import json
+import os
+import threading
+from collections import namedtuple
 
-def load_menu(filename):
-    """Load menu items from a JSON file."""
+from pipeline import LatestSlot
+
+DEFAULT_MENU = {
+    "Burger": 2.01,
+    "Pizza": 5.00,
+    "Pasta": 4.50,
+    "Fries": 1.50,
+    "Soda": 1.00,
+    "Coffee": 2.00
+}
+
+DEFAULT_CATEGORY = "Menu"
+
+# Bumped whenever the compiled form changes, so stale cache files are ignored
+CACHE_VERSION = 2
+
+# One menu entry; price is in integer cents
+MenuItem = namedtuple('MenuItem', ['id', 'name', 'price', 'category'])
+
+
+def format_price(cents):
+    """Format integer cents as dollars, e.g. 201 -> '$2.01'."""
+    return f"${cents // 100}.{cents % 100:02d}"
+
+
+def to_cents(price, name):
+    """Convert a JSON price in dollars to integer cents, rejecting fractions of a cent."""
+    if isinstance(price, bool) or not isinstance(price, (int, float)):
+        raise ValueError(f"Menu item '{name}' has a non-numeric price: {price!r}")
+    cents = round(price * 100)
+    if cents < 0 or abs(price * 100 - cents) > 1e-6:
+        raise ValueError(f"Menu item '{name}' has an invalid price: {price!r}")
+    return cents
+
+
+class CompiledMenu:
+    """A validated menu with integer-cent prices, indexed by name, ID and category.
+
+    Items keep their order from the source file. Compiled menus are
+    immutable; a changed menu file produces a new one that is swapped
+    in whole.
+    """
+
+    def __init__(self, items):
+        self.items = tuple(items)
+        self.by_name = {item.name: item for item in self.items}
+        self.by_id = {item.id: item for item in self.items}
+        categories = {}
+        for item in self.items:
+            categories.setdefault(item.category, []).append(item)
+        self.categories = {category: tuple(items) for category, items in categories.items()}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, name):
+        return name in self.by_name
+
+    def price(self, name):
+        """Price of an item in cents."""
+        return self.by_name[name].price
+
+
+def compile_menu(data):
+    """Validate parsed menu JSON and compile it.
+
+    data is either a flat {name: price} dict, or {"items": [...]} where
+    each item has a name and price and optionally an id and a category.
+    Prices are in dollars.
+    """
+    if isinstance(data, dict) and isinstance(data.get('items'), list):
+        entries = data['items']
+    elif isinstance(data, dict):
+        entries = [{'name': name, 'price': price} for name, price in data.items()]
+    else:
+        raise ValueError("Menu must be a {name: price} object or an object with an 'items' list")
+
+    items = []
+    names = set()
+    ids = set()
+    for entry in entries:
+        if not isinstance(entry, dict) or not isinstance(entry.get('name'), str) or not entry['name']:
+            raise ValueError(f"Menu item without a name: {entry!r}")
+        name = entry['name']
+        item_id = str(entry.get('id', name))
+        if name in names:
+            raise ValueError(f"Duplicate menu item name '{name}'")
+        if item_id in ids:
+            raise ValueError(f"Duplicate menu item id '{item_id}'")
+        names.add(name)
+        ids.add(item_id)
+        items.append(MenuItem(item_id, name, to_cents(entry.get('price'), name),
+                              str(entry.get('category', DEFAULT_CATEGORY))))
+    return CompiledMenu(items)
+
+
+def file_signature(path):
+    """(mtime_ns, size) of a file, or None if it does not exist."""
     try:
-        with open(filename, 'r') as file:
-            return json.load(file)
+        stat = os.stat(path)
     except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def read_cache(cache_path, signature):
+    """The compiled menu in a cache file, or None if it is missing, stale or malformed.
+
+    The cache is plain JSON, one [id, name, cents, category] list per
+    item, so reading it never runs code from the file.
+    """
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as file:
+            cached = json.load(file)
+        if cached['version'] != CACHE_VERSION or cached['signature'] != list(signature):
+            return None
+        items = [MenuItem(*entry) for entry in cached['items']]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    for item in items:
+        if not (isinstance(item.id, str) and isinstance(item.name, str) and isinstance(item.category, str)
+                and isinstance(item.price, int) and not isinstance(item.price, bool) and item.price >= 0):
+            return None
+    return CompiledMenu(items)
+
+
+def load_menu(filename, use_cache=True):
+    """Load and compile a menu JSON file, through a compiled cache next to it.
+
+    The cache is only used while the JSON file's mtime and size match
+    the ones it was compiled from. A missing file gives the default menu.
+    """
+    signature = file_signature(filename)
+    if signature is None:
         print(f"Menu file '{filename}' not found. Using default menu.")
-        return {
-            "Burger": 2.01,
-            "Pizza": 5.00,
-            "Pasta": 4.50,
-            "Fries": 1.50,
-            "Soda": 1.00,
-            "Coffee": 2.00
-        }
+        return compile_menu(DEFAULT_MENU)
+
+    cache_path = filename + '.cache'
+    if use_cache:
+        menu = read_cache(cache_path, signature)
+        if menu is not None:
+            return menu
+
+    with open(filename, 'r') as file:
+        menu = compile_menu(json.load(file))
+
+    if use_cache:
+        # Write to a temporary file and rename it into place, so a reader
+        # never sees a partial cache
+        try:
+            temp_path = cache_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump({'version': CACHE_VERSION, 'signature': list(signature),
+                           'items': [list(item) for item in menu.items]}, file)
+            os.replace(temp_path, cache_path)
+        except OSError as error:
+            print(f"Could not write menu cache '{cache_path}': {error}")
+    return menu
+
+
+class MenuWatcher:
+    """Watches a menu file and compiles changes on a background thread.
+
+    The file's mtime and size are polled every interval seconds; a
+    change is loaded and validated off the render loop. poll() hands
+    each new menu over once, so the frame loop can swap it in between
+    frames. A file that fails to load is reported and the current menu
+    stays in use.
+    """
+
+    def __init__(self, path, interval=1.0):
+        self.path = path
+        self.interval = interval
+        self.signature = file_signature(path)
+        self.reloads = 0
+        self.failures = 0
+        self._updates = LatestSlot()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="menu-watcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            signature = file_signature(self.path)
+            if signature is None or signature == self.signature:
+                continue
+            self.signature = signature
+            try:
+                menu = load_menu(self.path)
+            except (OSError, ValueError) as error:
+                self.failures += 1
+                print(f"Menu reload failed, keeping the current menu: {error}")
+                continue
+            self.reloads += 1
+            self._updates.put(menu)
 
+    def poll(self):
+        """Return a newly loaded menu, or None if there is none since the last call."""
+        return self._updates.take()
@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class RollingHistogram:
+    """The last size samples of a measurement, in a fixed numpy ring."""
+
+    def __init__(self, size=256):
+        self.samples = np.zeros(size, dtype=np.float64)
+        self.size = size
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        self.samples[self.index] = value
+        self.index = (self.index + 1) % self.size
+        self.count += 1
+        self.total += value
+
+    def values(self):
+        return self.samples[:min(self.count, self.size)]
+
+    def summary(self):
+        """Mean and p50/p95/p99 of the recent samples."""
+        values = self.values()
+        if values.size == 0:
+            return {'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+        p50, p95, p99 = np.percentile(values, (50, 95, 99))
+        return {'mean': float(values.mean()), 'p50': float(p50), 'p95': float(p95), 'p99': float(p99)}
+
+
+class StageTimer:
+    """Times named stages of the frame loop into rolling histograms.
+
+    lap(stage, start) records the milliseconds since start and returns
+    the current time, so consecutive stages chain without extra calls.
+    Stages may be recorded from any thread (e.g. 'inference' from every
+    pipeline inference thread); recording and snapshots share a lock.
+    """
+
+    def __init__(self, size=256):
+        self.size = size
+        self.stages = {}
+        self._lock = threading.Lock()
+        self.frame_intervals = RollingHistogram(size)
+        self.last_frame = None
+
+    def now(self):
+        return time.perf_counter()
+
+    def lap(self, stage, start):
+        """Record the time since start under stage; return the current time."""
+        now = time.perf_counter()
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = RollingHistogram(self.size)
+            histogram.add((now - start) * 1000)
+        return now
+
+    def timed(self, stage, function):
+        """Wrap a function so each call is recorded under stage."""
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            self.lap(stage, start)
+            return result
+        return wrapper
+
+    def frame_done(self):
+        """Mark the end of a displayed frame, for FPS."""
+        now = time.perf_counter()
+        if self.last_frame is not None:
+            self.frame_intervals.add((now - self.last_frame) * 1000)
+        self.last_frame = now
+
+    def fps(self):
+        values = self.frame_intervals.values()
+        return 1000.0 / values.mean() if values.size else 0.0
+
+    def snapshot(self):
+        """FPS plus a summary per stage."""
+        with self._lock:
+            stages = {stage: dict(histogram.summary(), count=histogram.count, sum=histogram.total)
+                      for stage, histogram in self.stages.items()}
+        return {'fps': self.fps(), 'stages': stages}
+
+
+class HUD:
+    """On-screen FPS and per-stage timings, refreshed a few times a second."""
+
+    def __init__(self, timer, visible=False, refresh_interval=0.5):
+        self.timer = timer
+        self.visible = visible
+        self.refresh_interval = refresh_interval
+        self.lines = []
+        self.last_refresh = 0.0
+
+    def toggle(self, event=None):
+        self.visible = not self.visible
+
+    def draw(self, frame):
+        """Draw the HUD in the top-right corner of a frame."""
+        if not self.visible:
+            return
+        now = time.perf_counter()
+        if now - self.last_refresh >= self.refresh_interval:
+            snapshot = self.timer.snapshot()
+            self.lines = [f"FPS {snapshot['fps']:.1f}"] + [
+                f"{stage} {summary['p50']:.1f}/{summary['p95']:.1f}ms"
+                for stage, summary in snapshot['stages'].items()
+            ]
+            self.last_refresh = now
+
+        x = frame.shape[1] - 220
+        for i, line in enumerate(self.lines):
+            y = 95 + i * 18
+            cv2.putText(frame, line, (x + 1, y + 1), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 0, 0), 2)
+            cv2.putText(frame, line, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 0), 1)
+
+
+def prometheus_text(snapshot, counters):
+    """Render a timer snapshot and flat counters in Prometheus text format."""
+    lines = [
+        "# HELP touchless_fps Displayed frames per second.",
+        "# TYPE touchless_fps gauge",
+        f"touchless_fps {snapshot['fps']:.3f}",
+        "# HELP touchless_stage_ms Frame loop stage duration in milliseconds.",
+        "# TYPE touchless_stage_ms summary",
+    ]
+    for stage, summary in snapshot['stages'].items():
+        for quantile in ('p50', 'p95', 'p99'):
+            lines.append(f'touchless_stage_ms{{stage="{stage}",quantile="0.{quantile[1:]}"}} '
+                         f"{summary[quantile]:.4f}")
+        lines.append(f'touchless_stage_ms_sum{{stage="{stage}"}} {summary["sum"]:.4f}')
+        lines.append(f'touchless_stage_ms_count{{stage="{stage}"}} {summary["count"]}')
+    for name, value in counters.items():
+        lines.append(f"# TYPE touchless_{name} gauge")
+        lines.append(f"touchless_{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """Periodically writes timings to a JSON or Prometheus text file.
+
+    Files ending in .prom get Prometheus text format, anything else JSON.
+    Writes go to a temporary file that is renamed into place, so a
+    scraper never sees a partial file. counters() may return extra flat
+    numeric values, e.g. pipeline drop counters.
+    """
+
+    def __init__(self, timer, path, interval=10.0, counters=None):
+        self.timer = timer
+        self.path = path
+        self.interval = interval
+        self.counters = counters
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self.export()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.export()
+
+    def export(self):
+        """Write the current numbers to the metrics file."""
+        snapshot = self.timer.snapshot()
+        counters = self.counters() if self.counters is not None else {}
+        if self.path.endswith('.prom'):
+            text = prometheus_text(snapshot, counters)
+        else:
+            text = json.dumps(dict(snapshot, counters=counters, timestamp=time.time()), indent=2)
+
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as file:
+            file.write(text)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,239 @@
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+from metrics import RollingHistogram
+
+BOUNDARY = b'frame'
+
+# Kernel send buffer per stream client. Kept small so a slow client
+# blocks the write, and then skips to the newest frame, instead of
+# queueing seconds of stale frames in the socket.
+STREAM_SEND_BUFFER = 64 * 1024
+
+# Unchanged frames are found by comparing every SAMPLE_ROWS-th row with
+# the last frame taken: anything drawn (text, the cursor, highlights)
+# is taller than that, and it costs a quarter of a full comparison.
+SAMPLE_ROWS = 4
+
+INDEX_PAGE = b"""<!doctype html>
+<title>Touchless Ordering</title>
+<body style="margin:0;background:#000"><img src="/stream" style="width:100%"></body>
+"""
+
+
+class MJPEGStreamer:
+    """Serves rendered frames as an MJPEG stream over HTTP.
+
+    publish() is called from the render loop and never waits. It does
+    nothing while no client is connected, and skips a frame whose sampled
+    rows match the last one it took. Otherwise it copies the frame into a free
+    buffer and hands it to a pool of encoder threads (OpenCV releases
+    the GIL while encoding). If every encoder is busy, the frame is
+    dropped. Each client is served by its own thread, which always sends
+    the newest JPEG, so a slow client skips frames instead of holding
+    up the others or the encoders.
+
+    Endpoints: / (a page showing the stream), /stream, /snapshot.jpg
+    and /stats (JSON).
+    """
+
+    def __init__(self, host='127.0.0.1', port=8090, quality=80, encoders=2):
+        self.quality = quality
+        self.encoders = encoders
+        self.pool = ThreadPoolExecutor(encoders, thread_name_prefix="mjpeg-encode")
+        self.free = []
+        self.in_flight = 0
+        self.sample = None
+        self.submitted = 0
+        self.sequence = 0
+        self.jpeg = None
+        self.closed = False
+        self.cond = threading.Condition()
+
+        self.clients = 0
+        self.encoded = 0
+        self.unchanged = 0
+        self.busy_drops = 0
+        self.client_drops = 0
+        self.bytes_sent = 0
+        self.encode_ms = RollingHistogram(256)
+        self._rate_mark = (time.perf_counter(), 0)
+        self.kbps = 0.0
+
+        self.server = ThreadingHTTPServer((host, port), MJPEGHandler)
+        self.server.daemon_threads = True
+        self.server.streamer = self
+        self._thread = threading.Thread(target=self.server.serve_forever, name="mjpeg-server", daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._thread.start()
+        print(f"Streaming the display at {self.url}")
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
+        self.pool.shutdown(wait=True)
+
+    def publish(self, frame):
+        """Queue a rendered RGB frame for encoding, unless the streamer is closed, nobody watches, it is unchanged, or encoders are busy."""
+        if self.closed or self.clients == 0:
+            return
+        sample = frame[::SAMPLE_ROWS]
+        with self.cond:
+            # add_client() resets the sample under the same lock
+            if self.sample is not None and self.sample.shape == sample.shape and np.array_equal(self.sample, sample):
+                self.unchanged += 1
+                return
+            if self.in_flight >= self.encoders:
+                self.busy_drops += 1
+                return
+            if self.sample is None or self.sample.shape != sample.shape:
+                self.sample = np.empty_like(sample)
+            np.copyto(self.sample, sample)
+            self.in_flight += 1
+            buffer = self.free.pop() if self.free else None
+            self.submitted += 1
+            sequence = self.submitted
+        if buffer is None or buffer.shape != frame.shape:
+            buffer = np.empty_like(frame)
+        np.copyto(buffer, frame)
+        self.pool.submit(self._encode, buffer, sequence)
+
+    def _encode(self, buffer, sequence):
+        start = time.perf_counter()
+        ok, data = cv2.imencode('.jpg', cv2.cvtColor(buffer, cv2.COLOR_RGB2BGR),
+                                [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self.cond:
+            self.free.append(buffer)
+            self.in_flight -= 1
+            self.encode_ms.add(elapsed_ms)
+            self.encoded += 1
+            # With several encoders a newer frame may finish first
+            if ok and sequence > self.sequence:
+                self.sequence = sequence
+                self.jpeg = data.tobytes()
+                self.cond.notify_all()
+
+    def add_client(self):
+        with self.cond:
+            if self.clients == 0:
+                # Whatever was encoded before may be stale; take the next frame
+                self.jpeg = None
+                self.sample = None
+            self.clients += 1
+
+    def remove_client(self):
+        with self.cond:
+            self.clients -= 1
+
+    def next_jpeg(self, after, timeout=1.0):
+        """Wait for a JPEG newer than sequence after; return (sequence, jpeg), or (after, None) on timeout or close."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.closed or (self.jpeg is not None and self.sequence > after), timeout)
+            if self.closed or self.jpeg is None or self.sequence <= after:
+                return after, None
+            return self.sequence, self.jpeg
+
+    def sent(self, size, skipped):
+        with self.cond:
+            self.bytes_sent += size
+            self.client_drops += skipped
+
+    def stats(self):
+        """Flat counters, for metrics export; bandwidth is averaged since the previous call."""
+        now = time.perf_counter()
+        mark_time, mark_bytes = self._rate_mark
+        if now - mark_time >= 0.5:
+            self.kbps = (self.bytes_sent - mark_bytes) * 8 / 1000 / (now - mark_time)
+            self._rate_mark = (now, self.bytes_sent)
+        encode = self.encode_ms.summary()
+        return {
+            'stream_clients': self.clients,
+            'stream_encoded': self.encoded,
+            'stream_unchanged': self.unchanged,
+            'stream_busy_drops': self.busy_drops,
+            'stream_client_drops': self.client_drops,
+            'stream_encode_ms_p50': encode['p50'],
+            'stream_encode_ms_p99': encode['p99'],
+            'stream_kbps': self.kbps,
+        }
+
+
+class MJPEGHandler(BaseHTTPRequestHandler):
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path == '/':
+            self._respond(200, 'text/html', INDEX_PAGE)
+        elif path == '/stream':
+            self._stream()
+        elif path == '/snapshot.jpg':
+            self._snapshot()
+        elif path == '/stats':
+            self._respond(200, 'application/json', json.dumps(self.server.streamer.stats()).encode())
+        else:
+            self._respond(404, 'text/plain', b'not found')
+
+    def _respond(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self):
+        streamer = self.server.streamer
+        self.send_response(200)
+        self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=' + BOUNDARY.decode())
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, STREAM_SEND_BUFFER)
+        streamer.add_client()
+        try:
+            sequence = 0
+            while not streamer.closed:
+                newest, jpeg = streamer.next_jpeg(sequence)
+                if jpeg is None:
+                    continue
+                part = b'--%s\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n' % (BOUNDARY, len(jpeg))
+                self.wfile.write(part + jpeg + b'\r\n')
+                # Frames published while this client was still sending are skipped
+                streamer.sent(len(part) + len(jpeg) + 2, newest - sequence - 1 if sequence else 0)
+                sequence = newest
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            streamer.remove_client()
+
+    def _snapshot(self):
+        streamer = self.server.streamer
+        streamer.add_client()
+        try:
+            _, jpeg = streamer.next_jpeg(0, timeout=2.0)
+        finally:
+            streamer.remove_client()
+        if jpeg is None:
+            self._respond(503, 'text/plain', b'no frame')
+        else:
+            self._respond(200, 'image/jpeg', jpeg)
+            streamer.sent(len(jpeg), 0)
+
+    def log_message(self, format, *args):
+        pass
@@ -0,0 +1,208 @@
+import time
+
+import cv2
+import numpy as np
+
+from session import OrderingSession
+
+
+def min_cost_assignment(cost):
+    """Match rows to distinct columns at the least total cost (Hungarian algorithm).
+
+    cost is an (n, m) array; min(n, m) pairs are matched. Returns
+    (rows, columns) index arrays, sorted by row.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+    # Potentials and the matching, 1-based with column 0 as a sentinel
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    row_of = np.zeros(m + 1, dtype=np.intp)
+    way = np.zeros(m + 1, dtype=np.intp)
+    for i in range(1, n + 1):
+        row_of[0] = i
+        column = 0
+        min_slack = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while row_of[column] != 0:
+            used[column] = True
+            row = row_of[column]
+            free = ~used
+            free[0] = False
+            slack = cost[row - 1] - u[row] - v[1:]
+            better = free[1:] & (slack < min_slack[1:])
+            min_slack[1:][better] = slack[better]
+            way[1:][better] = column
+            candidates = np.where(free, min_slack, np.inf)
+            next_column = int(np.argmin(candidates))
+            delta = candidates[next_column]
+            u[row_of[used]] += delta
+            v[used] -= delta
+            min_slack[free] -= delta
+            column = next_column
+        # Flip the augmenting path
+        while column != 0:
+            previous = way[column]
+            row_of[column] = row_of[previous]
+            column = previous
+
+    columns = np.flatnonzero(row_of[1:])
+    rows = row_of[1:][columns] - 1
+    if transposed:
+        rows, columns = columns, rows
+    order = np.argsort(rows)
+    return rows[order], columns[order]
+
+
+def hand_centroids(hands):
+    """(n, 2) normalized centroids of a list of (21, 3) landmark arrays, in one vectorized pass."""
+    if not hands:
+        return np.empty((0, 2), dtype=np.float32)
+    return np.stack(hands)[:, :, :2].mean(axis=1)
+
+
+class HandIdentities:
+    """Gives the hands in each frame identities that stay stable across frames.
+
+    Detectors list hands in no particular order, so each frame's hands
+    are matched to the live tracks by landmark centroid: the assignment
+    with the least total distance (Hungarian algorithm), predicted from
+    each track's last move. A match further than max_distance (in frame
+    widths) is no match. An unmatched hand starts a track with a new id
+    while fewer than max_hands are live; a track that goes unmatched for
+    forget_after seconds ends.
+    """
+
+    def __init__(self, max_hands=4, max_distance=0.15, forget_after=1.0):
+        self.max_hands = max_hands
+        self.max_distance = max_distance
+        self.forget_after = forget_after
+        self.ids = np.empty(0, dtype=np.int64)
+        self.centroids = np.empty((0, 2))
+        self.velocities = np.empty((0, 2))
+        self.last_seen = np.empty(0)
+        self.next_id = 1
+
+    def update(self, hands, now, aspect=1.0):
+        """Return one id per hand (None for hands beyond max_hands); aspect is the frame's height/width."""
+        centroids = hand_centroids(hands)
+        centroids = centroids * (1.0, aspect)
+        alive = now - self.last_seen <= self.forget_after
+        self.ids, self.centroids = self.ids[alive], self.centroids[alive]
+        self.velocities, self.last_seen = self.velocities[alive], self.last_seen[alive]
+
+        ids = [None] * len(hands)
+        matched = np.zeros(len(self.ids), dtype=bool)
+        if len(hands) and len(self.ids):
+            predicted = self.centroids + self.velocities
+            cost = np.linalg.norm(centroids[:, None] - predicted[None], axis=2)
+            for hand, track in zip(*min_cost_assignment(cost)):
+                if cost[hand, track] <= self.max_distance:
+                    ids[hand] = int(self.ids[track])
+                    matched[track] = True
+                    self.velocities[track] = centroids[hand] - self.centroids[track]
+                    self.centroids[track] = centroids[hand]
+                    self.last_seen[track] = now
+        # Tracks that missed this frame stop moving
+        self.velocities[~matched] = 0.0
+
+        for hand in range(len(hands)):
+            if ids[hand] is None and len(self.ids) < self.max_hands:
+                ids[hand] = self.next_id
+                self.next_id += 1
+                self.ids = np.append(self.ids, ids[hand])
+                self.centroids = np.vstack([self.centroids, centroids[hand]])
+                self.velocities = np.vstack([self.velocities, np.zeros(2)])
+                self.last_seen = np.append(self.last_seen, now)
+        return ids
+
+    def live(self):
+        return set(self.ids.tolist())
+
+
+class MultiUserSession:
+    """Several customers ordering side by side in front of one wide-angle camera.
+
+    The frame is split into lanes side-by-side panels, each running its
+    own OrderingSession: screen, cart, cursor filter and dwell/pinch
+    cooldown. Hands get stable ids from HandIdentities. A new id is given
+    the free lane under its centroid, or the nearest free one, and keeps
+    it while it is tracked, so a customer can reach over the border;
+    hands with no free lane are ignored. Each lane's session sees only
+    its own hand, in lane coordinates, so the per-frame cost is one
+    assignment plus one gesture update and hit test per hand.
+
+    make_gestures() builds each lane's gestures.GestureEngine. Orders
+    reach on_order with the lane number added.
+    """
+
+    def __init__(self, menu, lanes=2, clock=time.time, on_cart_change=None, on_quit=None, on_order=None,
+                 make_gestures=None, max_distance=0.15, forget_after=1.0):
+        self.clock = clock
+        self.identities = HandIdentities(lanes, max_distance, forget_after)
+        self.sessions = []
+        for lane in range(lanes):
+            def lane_order(order, lane=lane):
+                if on_order is not None:
+                    on_order(dict(order, lane=lane))
+            self.sessions.append(OrderingSession(menu, clock, on_cart_change, on_quit, lane_order,
+                                                 make_gestures() if make_gestures is not None else None))
+        self.lane_of = {}
+
+    @property
+    def orders_completed(self):
+        return sum(session.orders_completed for session in self.sessions)
+
+    def set_menu(self, menu):
+        for session in self.sessions:
+            session.set_menu(menu)
+
+    def lane_bounds(self, width):
+        """Pixel column where each lane starts, plus the frame width."""
+        return [width * lane // len(self.sessions) for lane in range(len(self.sessions) + 1)]
+
+    def assign_lanes(self, hands, ids):
+        """Bind new ids to free lanes and release the lanes of ended tracks; return one lane (or None) per hand."""
+        live = self.identities.live()
+        self.lane_of = {hand_id: lane for hand_id, lane in self.lane_of.items() if hand_id in live}
+        taken = set(self.lane_of.values())
+        lanes = len(self.sessions)
+        centroids = hand_centroids(hands)
+        result = []
+        for hand, hand_id in enumerate(ids):
+            if hand_id is not None and hand_id not in self.lane_of:
+                free = [lane for lane in range(lanes) if lane not in taken]
+                if free:
+                    under = min(int(centroids[hand, 0] * lanes), lanes - 1)
+                    lane = min(free, key=lambda lane: abs(lane - under))
+                    self.lane_of[hand_id] = lane
+                    taken.add(lane)
+            result.append(self.lane_of.get(hand_id))
+        return result
+
+    def step(self, frame, hands, latency=0.0):
+        """Run every lane's session on its panel of an RGB frame, each with its own hand.
+
+        hands are (21, 3) landmark arrays in the frame's (mirrored)
+        coordinates; latency is the expected capture-to-display time.
+        """
+        h, w = frame.shape[:2]
+        ids = self.identities.update(hands, self.clock(), h / w)
+        lanes = self.assign_lanes(hands, ids)
+        bounds = self.lane_bounds(w)
+        for lane, session in enumerate(self.sessions):
+            x0, x1 = bounds[lane], bounds[lane + 1]
+            lane_hands = []
+            for hand, hand_lane in zip(hands, lanes):
+                if hand_lane == lane:
+                    # Frame-normalized x to lane-normalized x
+                    hand = hand.copy()
+                    hand[:, 0] = (hand[:, 0] * w - x0) / (x1 - x0)
+                    lane_hands.append(hand)
+            session.step(frame[:, x0:x1], lane_hands, latency)
+        for x in bounds[1:-1]:
+            cv2.line(frame, (x, 0), (x, h - 1), self.sessions[0].COLORS['TEXT'], 2)
+        return frame
@@ -0,0 +1,145 @@
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+SHADOW_OFFSET = 5
+PADDING = 2  # Room for the half of a 2 px border that falls outside the rect
+
+
+def opaque(color, rgb=False):
+    """Opaque 4-channel version of a BGR colour tuple, in RGBA order if rgb is set."""
+    color = tuple(color)
+    if rgb:
+        color = color[::-1]
+    return color + (255,)
+
+
+class SpriteCache:
+    """Pre-rendered 4-channel button sprites, keyed by text, size, colour and hover state."""
+
+    def __init__(self, text_color, hover_color, rgb=False):
+        self.text_color = text_color
+        self.hover_color = hover_color
+        self.rgb = rgb
+        self._sprites = {}
+        self.misses = 0
+
+    def button(self, text, width, height, color, is_hover):
+        """Return (sprite, mask) for a button, rendering it on first use."""
+        key = (text, width, height, tuple(color), is_hover)
+        entry = self._sprites.get(key)
+        if entry is None:
+            self.misses += 1
+            sprite = self._render_button(text, width, height, color, is_hover)
+            entry = (sprite, sprite[..., 3:] > 0)
+            self._sprites[key] = entry
+        return entry
+
+    def _render_button(self, text, width, height, color, is_hover):
+        sprite = np.zeros((height + 1 + SHADOW_OFFSET + 2 * PADDING,
+                           width + 1 + SHADOW_OFFSET + 2 * PADDING, 4), dtype=np.uint8)
+        x1, y1 = PADDING, PADDING
+        x2, y2 = x1 + width, y1 + height
+
+        # Button shadow
+        cv2.rectangle(sprite, (x1 + SHADOW_OFFSET, y1 + SHADOW_OFFSET),
+                      (x2 + SHADOW_OFFSET, y2 + SHADOW_OFFSET), opaque((0, 0, 0)), -1)
+
+        # Main button and border
+        button_color = self.hover_color if is_hover else color
+        cv2.rectangle(sprite, (x1, y1), (x2, y2), opaque(button_color, self.rgb), cv2.FILLED)
+        cv2.rectangle(sprite, (x1, y1), (x2, y2), opaque(self.text_color, self.rgb), 2)
+
+        # Text with shadow
+        text_size = cv2.getTextSize(text, FONT, 0.7, 2)[0]
+        text_x = x1 + (width - text_size[0]) // 2
+        text_y = y1 + (height + text_size[1]) // 2
+        cv2.putText(sprite, text, (text_x + 2, text_y + 2), FONT, 0.7, opaque((0, 0, 0)), 2)
+        cv2.putText(sprite, text, (text_x, text_y), FONT, 0.7, opaque(self.text_color, self.rgb), 2)
+        return sprite
+
+
+class OverlayLayer:
+    """Full-frame 4-channel UI layer that is only redrawn when its key changes.
+
+    The screen's static chrome and button sprites are drawn into the
+    layer once per state; hover changes swap a single button sprite in
+    place. Every frame the layer is composited onto the camera image
+    with one masked copy. Colours are given in BGR and drawn in the
+    sprite cache's colour space. cv2 draws without anti-aliasing here, so alpha
+    is either 0 or 255 and the blend reduces to np.copyto with a mask.
+    """
+
+    def __init__(self, sprites):
+        self.sprites = sprites
+        self.key = None
+        self.canvas = None
+        self.mask = None
+        self.rows = (0, 0)
+        self.buttons = {}
+        self.hovered = None
+        self.redraws = 0
+
+    def begin(self, key, shape):
+        """Clear the layer for a new state identified by key."""
+        h, w = shape[:2]
+        if self.canvas is None or self.canvas.shape[:2] != (h, w):
+            self.canvas = np.zeros((h, w, 4), dtype=np.uint8)
+        else:
+            self.canvas.fill(0)
+        self.key = key
+        self.buttons = {}
+        self.hovered = None
+        self.redraws += 1
+
+    def finish(self):
+        """Precompute the blend mask and the rows the layer covers."""
+        self.mask = self.canvas[..., 3:] > 0
+        covered = np.flatnonzero(self.mask.any(axis=(1, 2)))
+        self.rows = (covered[0], covered[-1] + 1) if covered.size else (0, 0)
+
+    def rectangle(self, pt1, pt2, color, thickness=cv2.FILLED):
+        """Draw a rectangle into the layer."""
+        cv2.rectangle(self.canvas, pt1, pt2, opaque(color, self.sprites.rgb), thickness)
+
+    def put_text(self, text, org, scale, color, thickness=2):
+        """Draw text into the layer."""
+        cv2.putText(self.canvas, text, org, FONT, scale, opaque(color, self.sprites.rgb), thickness)
+
+    def place_button(self, button_id, text, coords, color):
+        """Draw a button sprite into the layer and remember it for hover swaps."""
+        self.buttons[button_id] = (text, coords, color)
+        self._blit_button(button_id, False)
+
+    def set_hover(self, button_id):
+        """Show the hover variant of one button and restore the previous one."""
+        if button_id == self.hovered:
+            return
+        if self.hovered in self.buttons:
+            self._blit_button(self.hovered, False)
+        if button_id in self.buttons:
+            self._blit_button(button_id, True)
+        self.hovered = button_id
+
+    def _blit_button(self, button_id, is_hover):
+        text, coords, color = self.buttons[button_id]
+        x1, y1, x2, y2 = coords
+        sprite, mask = self.sprites.button(text, x2 - x1, y2 - y1, color, is_hover)
+
+        # Clip the sprite to the canvas
+        h, w = self.canvas.shape[:2]
+        left, top = x1 - PADDING, y1 - PADDING
+        sx0, sy0 = max(0, -left), max(0, -top)
+        sx1 = min(sprite.shape[1], w - left)
+        sy1 = min(sprite.shape[0], h - top)
+        if sx0 >= sx1 or sy0 >= sy1:
+            return
+        np.copyto(self.canvas[top + sy0:top + sy1, left + sx0:left + sx1],
+                  sprite[sy0:sy1, sx0:sx1], where=mask[sy0:sy1, sx0:sx1])
+
+    def composite(self, frame):
+        """Blend the layer onto a frame of the same size, in place."""
+        y0, y1 = self.rows
+        if y0 == y1:
+            return
+        np.copyto(frame[y0:y1], self.canvas[y0:y1, :, :3], where=self.mask[y0:y1])
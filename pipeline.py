@@ -0,0 +1,175 @@
+import threading
+import time
+
+
+class LatestSlot:
+    """Single-item mailbox that only ever holds the newest value.
+
+    on_drop, if given, is called with each item replaced before it was
+    consumed, e.g. to release its frame buffer.
+    """
+
+    def __init__(self, on_drop=None):
+        self._cond = threading.Condition()
+        self._item = None
+        self.on_drop = on_drop
+        self.dropped = 0
+
+    def put(self, item):
+        """Store an item, dropping whatever was not consumed yet."""
+        with self._cond:
+            dropped, self._item = self._item, item
+            if dropped is not None:
+                self.dropped += 1
+            self._cond.notify()
+        if dropped is not None and self.on_drop is not None:
+            self.on_drop(dropped)
+
+    def get(self, timeout=None):
+        """Wait for an item and take it. Returns None on timeout."""
+        with self._cond:
+            if self._item is None:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+    def take(self):
+        """Take the current item without waiting."""
+        with self._cond:
+            item, self._item = self._item, None
+            return item
+
+    def depth(self):
+        """Number of items waiting (0 or 1)."""
+        return 0 if self._item is None else 1
+
+
+class Pacer:
+    """Deadline-based frame pacing for Tk's after() scheduler."""
+
+    def __init__(self, target_fps):
+        self.period = 1.0 / target_fps
+        self.deadline = time.perf_counter() + self.period
+
+    def set_fps(self, target_fps):
+        """Change the frame rate from the next frame on."""
+        self.period = 1.0 / target_fps
+
+    def next_delay_ms(self):
+        """Milliseconds to wait until the next frame deadline."""
+        now = time.perf_counter()
+        self.deadline += self.period
+        if self.deadline < now:
+            # Fell behind; resync instead of firing a burst of late frames.
+            self.deadline = now + self.period
+        return max(1, int((self.deadline - now) * 1000))
+
+
+class FramePipeline:
+    """Capture -> inference -> render pipeline with latest-frame dropping.
+
+    read() returns the next frame or None; detect(frame) returns its hand
+    landmarks. Capture and inference each run on their own thread and
+    hand over through single-slot mailboxes, so a slow stage drops stale
+    frames instead of queueing them. The render stage is polled from the
+    Tk main thread with poll(). release(frame), if given, is called for
+    every frame the pipeline drops; the render stage releases the frames
+    poll() returns once it is done with them.
+    """
+
+    def __init__(self, read, detect, inference_threads=1, release=None):
+        self.read = read
+        self.detect = detect
+        self.inference_threads = inference_threads
+        self.release = release if release is not None else (lambda frame: None)
+
+        self.capture_slot = LatestSlot(on_drop=lambda packet: self.release(packet[0]))
+        self.result_slot = LatestSlot(on_drop=lambda packet: self.release(packet[0]))
+
+        self.captured = 0
+        self.inferred = 0
+        self.rendered = 0
+        self.read_failures = 0
+        self.inference_errors = 0
+        self.out_of_order = 0
+        self._published_at = 0.0
+        self._publish_lock = threading.Lock()
+
+        self._running = False
+        self._threads = []
+
+    def start(self):
+        """Start the capture and inference threads."""
+        self._running = True
+        self._threads = [threading.Thread(target=self._capture_loop, name="capture", daemon=True)]
+        for i in range(self.inference_threads):
+            self._threads.append(threading.Thread(target=self._inference_loop,
+                                                  name=f"inference-{i}", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """Stop the worker threads and wait for them to exit."""
+        self._running = False
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+
+    def _capture_loop(self):
+        while self._running:
+            frame = self.read()
+            if frame is None:
+                self.read_failures += 1
+                time.sleep(0.01)
+                continue
+            self.captured += 1
+            self.capture_slot.put((frame, time.perf_counter()))
+
+    def _inference_loop(self):
+        while self._running:
+            packet = self.capture_slot.get(timeout=0.1)
+            if packet is None:
+                continue
+            frame, captured_at = packet
+            try:
+                results = self.detect(frame)
+            except (RuntimeError, TimeoutError, ValueError) as error:
+                # Keep the thread alive; the frame is lost
+                with self._publish_lock:
+                    self.inference_errors += 1
+                    if self.inference_errors == 1:
+                        print(f"Inference failed: {error}")
+                self.release(frame)
+                continue
+            with self._publish_lock:
+                self.inferred += 1
+                # With several inference threads a newer frame may finish first.
+                stale = captured_at < self._published_at
+                if stale:
+                    self.out_of_order += 1
+                else:
+                    self._published_at = captured_at
+                    self.result_slot.put((frame, results, captured_at))
+            if stale:
+                self.release(frame)
+
+    def poll(self):
+        """Return the newest (frame, results, captured_at) or None."""
+        packet = self.result_slot.take()
+        if packet is not None:
+            self.rendered += 1
+        return packet
+
+    def stats(self):
+        """Counters for dropped frames and queue depth."""
+        return {
+            'captured': self.captured,
+            'inferred': self.inferred,
+            'rendered': self.rendered,
+            'dropped_before_inference': self.capture_slot.dropped,
+            'dropped_before_render': self.result_slot.dropped,
+            'queue_depth': self.capture_slot.depth() + self.result_slot.depth(),
+            'dropped_out_of_order': self.out_of_order,
+            'read_failures': self.read_failures,
+            'inference_errors': self.inference_errors,
+        }
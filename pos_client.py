@@ -0,0 +1,339 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from metrics import RollingHistogram
+
+# Statuses worth retrying; any other non-2xx status is a permanent rejection
+RETRY_STATUSES = (408, 429, 500, 502, 503, 504)
+
+# Outcomes of sending a batch
+DELIVERED = 'delivered'
+REJECTED = 'rejected'
+FAILED = 'failed'
+
+
+class ConnectionPool:
+    """A few keep-alive HTTP/1.1 connections to one host, for use on one asyncio loop.
+
+    Only what the POS endpoint needs: JSON requests and responses with a
+    Content-Length body. A connection that fails or that the server
+    closes is dropped and a new one is opened on demand. A request on an
+    idle connection that the server closed in the meantime is sent once
+    more on a new connection; requests carry idempotency keys, so this
+    is safe.
+    """
+
+    def __init__(self, url, size=4, timeout=5.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = parts.path or '/'
+        self.timeout = timeout
+        self.idle = []
+        self.opened = 0
+        self.reconnects = 0
+        self._slots = asyncio.Semaphore(size)
+
+    async def post_json(self, payload, headers=None):
+        """POST a JSON payload; return (status, parsed JSON body or None)."""
+        body = json.dumps(payload, separators=(',', ':')).encode()
+        lines = [f"POST {self.path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                 "Content-Type: application/json", f"Content-Length: {len(body)}", "Connection: keep-alive"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode() + body
+
+        async with self._slots:
+            connection = self.idle.pop() if self.idle else None
+            try:
+                status, data = await self._exchange(request, connection)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                if connection is None:
+                    raise
+                self.reconnects += 1
+                status, data = await self._exchange(request, None)
+        return status, json.loads(data) if data else None
+
+    async def _exchange(self, request, connection):
+        """Send a request on an idle connection, or a new one if connection is None; return (status, body)."""
+        if connection is None:
+            connection = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+            self.opened += 1
+        reader, writer = connection
+        try:
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive, data = await asyncio.wait_for(self._read_response(reader), self.timeout)
+        except BaseException:
+            writer.close()
+            raise
+        if keep_alive:
+            self.idle.append(connection)
+        else:
+            writer.close()
+        return status, data
+
+    async def _read_response(self, reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("POS endpoint closed the connection")
+        version, status = status_line.split(b' ', 2)[:2]
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        data = await reader.readexactly(int(headers.get('content-length', 0)))
+        keep_alive = headers.get('connection', '').lower() != 'close' and version == b'HTTP/1.1'
+        return int(status), keep_alive, data
+
+    def close(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle = []
+
+
+class OrderSubmitter:
+    """Pushes completed orders to the POS endpoint from an asyncio loop on its own thread.
+
+    submit() never blocks the caller: it hands the order to the loop,
+    where it waits in a bounded queue. Workers, one per pooled
+    connection, take whatever has queued up (at most max_batch orders)
+    and post it as one batch, so bursts share round trips. Each order's
+    order_id is its idempotency key, and each batch carries a key derived
+    from its orders, so a retried request cannot create duplicates.
+    Failed batches are retried with exponential backoff and jitter; once
+    retries are exhausted, or when the queue is full, orders are spilled
+    to spool_directory and resent from there later. A spool file that
+    cannot be read is renamed to *.bad, and one the endpoint rejects to
+    *.rejected, and both are left for inspection.
+    """
+
+    def __init__(self, url, spool_directory, queue_size=256, max_batch=16, connections=4, timeout=5.0,
+                 max_retries=4, backoff_base=0.1, backoff_max=5.0, spool_interval=5.0):
+        self.url = url
+        self.spool_directory = spool_directory
+        self.queue_size = queue_size
+        self.max_batch = max_batch
+        self.connections = connections
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.spool_interval = spool_interval
+        os.makedirs(spool_directory, exist_ok=True)
+
+        self.submitted = 0
+        self.quarantined = 0
+        self.spilled = sum(len(self._read_spool(name) or ()) for name in self.spool_files())
+        self.delivered = 0
+        self.batches = 0
+        self.retries = 0
+        self.rejected = 0
+        self.latency_ms = RollingHistogram(4096)
+        self.batch_sizes = RollingHistogram(1024)
+
+        self.loop = None
+        self.queue = None
+        self.pool = None
+        self._spool_sequence = 0
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="pos-submitter", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self, timeout=5.0):
+        """Give queued orders up to timeout seconds to be delivered, spill the rest and stop."""
+        future = asyncio.run_coroutine_threadsafe(self._shutdown(timeout), self.loop)
+        future.result()
+        self._thread.join()
+
+    def submit(self, order):
+        """Queue an order for submission; safe to call from any thread."""
+        self.submitted += 1
+        self.loop.call_soon_threadsafe(self._enqueue, order, time.perf_counter())
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.queue = asyncio.Queue(self.queue_size)
+        self.pool = ConnectionPool(self.url, self.connections, self.timeout)
+        self._tasks = [self.loop.create_task(self._worker()) for _ in range(self.connections)]
+        self._tasks.append(self.loop.create_task(self._drain_spool()))
+        self._ready.set()
+        self.loop.run_forever()
+        self.loop.close()
+
+    def _enqueue(self, order, submitted_at):
+        try:
+            self.queue.put_nowait((order, submitted_at))
+        except asyncio.QueueFull:
+            self._spill([order])
+
+    async def _worker(self):
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            orders = [order for order, _ in batch]
+            try:
+                result = await self._send(orders)
+            except asyncio.CancelledError:
+                # Stopped mid-request: keep the batch for the next run
+                self._spill(orders)
+                raise
+            if result == REJECTED:
+                self.rejected += len(orders)
+            if result == DELIVERED:
+                now = time.perf_counter()
+                for _, submitted_at in batch:
+                    self.latency_ms.add((now - submitted_at) * 1000)
+            for _ in batch:
+                self.queue.task_done()
+
+    async def _send(self, orders, retries=None, spill=True):
+        """Post a batch with retries; spill it to disk if it cannot be delivered yet.
+
+        Return DELIVERED, REJECTED (a status not worth retrying; never
+        spilled) or FAILED.
+        """
+        retries = self.max_retries if retries is None else retries
+        key = hashlib.sha1(",".join(order['order_id'] for order in orders).encode()).hexdigest()
+        for attempt in range(retries + 1):
+            try:
+                status, _ = await self.pool.post_json({'orders': orders}, {'Idempotency-Key': key})
+                if 200 <= status < 300:
+                    self.batches += 1
+                    self.delivered += len(orders)
+                    self.batch_sizes.add(len(orders))
+                    return DELIVERED
+                if status not in RETRY_STATUSES:
+                    print(f"POS endpoint rejected {len(orders)} orders with status {status}.")
+                    return REJECTED
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                pass
+            if attempt < retries:
+                self.retries += 1
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+        if spill:
+            self._spill(orders)
+        return FAILED
+
+    def _spill(self, orders):
+        """Write orders to a new spool file, atomically."""
+        self._spool_sequence += 1
+        name = f"{time.time_ns()}-{self._spool_sequence:06d}.json"
+        temp_path = os.path.join(self.spool_directory, name + '.tmp')
+        with open(temp_path, 'w') as file:
+            json.dump(orders, file)
+        os.replace(temp_path, os.path.join(self.spool_directory, name))
+        self.spilled += len(orders)
+
+    def spool_files(self):
+        """Spool file names, oldest first."""
+        return sorted(name for name in os.listdir(self.spool_directory) if name.endswith('.json'))
+
+    def _read_spool(self, name):
+        """The orders in a spool file, or None if it is unreadable, in which case it is quarantined."""
+        path = os.path.join(self.spool_directory, name)
+        try:
+            with open(path) as file:
+                orders = json.load(file)
+            if not isinstance(orders, list) or not all(
+                    isinstance(order, dict) and isinstance(order.get('order_id'), str) for order in orders):
+                raise ValueError("not a list of orders with order_id")
+        except (OSError, ValueError) as error:
+            self.quarantined += 1
+            print(f"Unreadable POS spool file '{name}', renamed to {name}.bad: {error}")
+            try:
+                os.replace(path, path + '.bad')
+            except OSError:
+                pass
+            return None
+        return orders
+
+    async def _drain_spool(self):
+        """Periodically resend spooled orders, oldest first, while the endpoint accepts them.
+
+        Spool files are merged into batches of up to max_batch orders; a
+        file is only removed once its orders were delivered. When a merged
+        batch is rejected, its files are resent one by one, so only the
+        files the endpoint rejects on their own are renamed to *.rejected.
+        A temporary failure ends the round.
+        """
+        while True:
+            names = self.spool_files()
+            alone = 0
+            while names:
+                group, orders = [], []
+                while names and (not orders or len(orders) < self.max_batch) and not (alone and group):
+                    name = names.pop(0)
+                    spooled = self._read_spool(name)
+                    if spooled is not None:
+                        group.append(name)
+                        orders.extend(spooled)
+                alone = max(0, alone - len(group))
+                if not orders:
+                    continue
+                # One attempt per round; on failure wait for the next one
+                result = await self._send(orders, retries=0, spill=False)
+                if result == FAILED:
+                    break
+                if result == REJECTED and len(group) > 1:
+                    names[:0] = group
+                    alone = len(group)
+                    continue
+                for name in group:
+                    path = os.path.join(self.spool_directory, name)
+                    if result == DELIVERED:
+                        os.remove(path)
+                    else:
+                        os.replace(path, path + '.rejected')
+                if result == REJECTED:
+                    self.rejected += len(orders)
+                self.spilled -= len(orders)
+            await asyncio.sleep(self.spool_interval)
+
+    async def _shutdown(self, timeout):
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        leftover = []
+        while not self.queue.empty():
+            leftover.append(self.queue.get_nowait()[0])
+        if leftover:
+            self._spill(leftover)
+        self.pool.close()
+        self.loop.call_soon(self.loop.stop)
+
+    def stats(self):
+        """Flat counters and latencies, for metrics export."""
+        latency = self.latency_ms.summary()
+        return {
+            'pos_submitted': self.submitted,
+            'pos_delivered': self.delivered,
+            'pos_retries': self.retries,
+            'pos_spilled': self.spilled,
+            'pos_rejected': self.rejected,
+            'pos_queue_depth': self.queue.qsize() if self.queue is not None else 0,
+            'pos_connections_opened': self.pool.opened if self.pool is not None else 0,
+            'pos_reconnects': self.pool.reconnects if self.pool is not None else 0,
+            'pos_quarantined': self.quarantined,
+            'pos_mean_batch': self.batch_sizes.summary()['mean'],
+            'pos_latency_ms_p50': latency['p50'],
+            'pos_latency_ms_p99': latency['p99'],
+        }
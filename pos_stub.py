@@ -0,0 +1,111 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubPOSServer(ThreadingHTTPServer):
+    """A local stand-in for the kitchen/POS endpoint.
+
+    Accepts POSTed {"orders": [...]} batches over keep-alive connections
+    and remembers order ids, so a retried order is acknowledged but not
+    counted twice. latency delays each response; failure_rate answers
+    that share of requests with 503; while down is set, every request
+    gets 503. A batch holding any order id in reject_ids is refused with
+    400, as a permanent rejection.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), latency=0.0, failure_rate=0.0):
+        super().__init__(address, StubPOSHandler)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.down = False
+        self.reject_ids = set()
+        self.order_ids = set()
+        self.requests = 0
+        self.duplicates = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/orders"
+
+    def accept(self, orders):
+        """Record a batch; return (accepted, duplicates)."""
+        with self.lock:
+            self.requests += 1
+            accepted = 0
+            for order in orders:
+                if order['order_id'] in self.order_ids:
+                    self.duplicates += 1
+                else:
+                    self.order_ids.add(order['order_id'])
+                    accepted += 1
+        return accepted, len(orders) - accepted
+
+    def start(self):
+        """Serve on a background thread."""
+        threading.Thread(target=self.serve_forever, name="pos-stub", daemon=True).start()
+        return self
+
+
+class StubPOSHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this, Nagle's
+    # algorithm and delayed ACKs hold every response back by ~40 ms
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        if server.down or random.random() < server.failure_rate:
+            self._respond(503, {'error': 'unavailable'})
+            return
+        try:
+            orders = json.loads(body)['orders']
+        except (ValueError, KeyError, TypeError):
+            self._respond(400, {'error': 'bad request'})
+            return
+        if any(order.get('order_id') in server.reject_ids for order in orders):
+            self._respond(400, {'error': 'order rejected'})
+            return
+        accepted, duplicates = server.accept(orders)
+        self._respond(200, {'accepted': accepted, 'duplicates': duplicates})
+
+    def _respond(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stub of the kitchen/POS order endpoint")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before each response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of requests answered with 503")
+    args = parser.parse_args()
+
+    server = StubPOSServer(('127.0.0.1', args.port), args.latency, args.failure_rate)
+    print(f"Stub POS endpoint at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"{len(server.order_ids)} orders, {server.requests} requests, {server.duplicates} duplicates")
+
+
+if __name__ == "__main__":
+    main()
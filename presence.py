@@ -0,0 +1,147 @@
+import threading
+
+import cv2
+import numpy as np
+
+from config import COLORS
+from metrics import RollingHistogram
+
+
+class MotionDetector:
+    """Cheap frame-difference motion detection on a tiny grayscale copy of the frame.
+
+    Frames are shrunk to size with area averaging, which also averages
+    away most sensor noise, and compared with the previous one. There is
+    motion when more than min_fraction of the pixels changed by more
+    than threshold grey levels. All buffers are reused.
+    """
+
+    def __init__(self, size=(64, 48), threshold=15, min_fraction=0.01):
+        self.size = tuple(size)
+        self.threshold = threshold
+        self.min_fraction = min_fraction
+        width, height = self.size
+        self.small = np.empty((height, width, 3), dtype=np.uint8)
+        self.gray = [np.empty((height, width), dtype=np.uint8) for _ in range(2)]
+        self.diff = np.empty((height, width), dtype=np.uint8)
+        self.index = 0
+        self.primed = False
+        self.fraction = 0.0
+
+    def update(self, rgb):
+        """Compare an RGB frame with the previous one; return True if it moved."""
+        cv2.resize(rgb, self.size, dst=self.small, interpolation=cv2.INTER_AREA)
+        gray, previous = self.gray[self.index], self.gray[1 - self.index]
+        cv2.cvtColor(self.small, cv2.COLOR_RGB2GRAY, dst=gray)
+        self.index = 1 - self.index
+        if not self.primed:
+            self.primed = True
+            return True
+        cv2.absdiff(gray, previous, dst=self.diff)
+        cv2.threshold(self.diff, self.threshold, 255, cv2.THRESH_BINARY, dst=self.diff)
+        self.fraction = cv2.countNonZero(self.diff) / self.diff.size
+        return self.fraction > self.min_fraction
+
+
+class PresenceScheduler:
+    """Decides when the hand model runs, and when the kiosk idles.
+
+    While a hand has been seen in the last hold seconds, every frame is
+    inferred, since a hand resting on a button shows no motion. Other
+    frames are only inferred when the motion detector fires. After
+    idle_after seconds without a hand the kiosk goes idle: the frame
+    loop drops to idle_fps and shows the attract screen until the next
+    motion wakes it. Wake-up latency runs from the capture of the frame
+    that woke it to the first hand found after that.
+
+    wants_inference() and observe() may be called from several inference
+    threads at once; a lock serializes them, since they share the motion
+    detector's buffers and the idle timers.
+    """
+
+    def __init__(self, motion=None, idle_after=10.0, hold=1.0, idle_fps=5):
+        self.motion = motion if motion is not None else MotionDetector()
+        self.idle_after = idle_after
+        self.hold = hold
+        self.idle_fps = idle_fps
+        self.idle = False
+        self.last_hand = float('-inf')
+        self.active_since = None
+        self.woke_at = None
+        self.lock = threading.Lock()
+
+        self.inferred = 0
+        self.skipped = 0
+        self.wakeups = 0
+        self.wake_ms = RollingHistogram(256)
+
+    def wants_inference(self, rgb, now):
+        """Run motion detection on a frame captured at now; return True if the hand model should see it."""
+        with self.lock:
+            return self._wants_inference(rgb, now)
+
+    def _wants_inference(self, rgb, now):
+        moved = self.motion.update(rgb)
+        if self.active_since is None:
+            self.active_since = now
+        if moved and self.idle:
+            self.idle = False
+            self.active_since = self.woke_at = now
+            self.wakeups += 1
+            print("Motion: leaving attract mode.")
+        if moved or now - self.last_hand < self.hold:
+            self.inferred += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def observe(self, hands, now):
+        """Record the hands found in a frame captured at now, and go idle once they have been gone long enough."""
+        with self.lock:
+            self._observe(hands, now)
+
+    def _observe(self, hands, now):
+        if self.active_since is None:
+            self.active_since = now
+        if hands:
+            # Parallel workers may report frames out of capture order
+            self.last_hand = max(self.last_hand, now)
+            if self.idle:
+                # Sources that deliver landmarks skip the motion gate
+                self.idle = False
+                self.active_since = now
+                self.wakeups += 1
+            if self.woke_at is not None and now >= self.woke_at:
+                self.wake_ms.add((now - self.woke_at) * 1000)
+                self.woke_at = None
+        elif not self.idle and now - max(self.last_hand, self.active_since) >= self.idle_after:
+            self.idle = True
+            self.woke_at = None
+            print(f"No hand for {self.idle_after:g} s: attract mode at {self.idle_fps} FPS.")
+
+    def draw(self, frame):
+        """Draw the attract screen onto a frame while idle."""
+        if self.idle:
+            draw_attract(frame)
+
+    def stats(self):
+        """Flat counters, for metrics export."""
+        wake = self.wake_ms.summary()
+        return {
+            'presence_idle': int(self.idle),
+            'presence_inferred': self.inferred,
+            'presence_skipped': self.skipped,
+            'presence_wakeups': self.wakeups,
+            'presence_motion_fraction': self.motion.fraction,
+            'presence_wake_ms_p50': wake['p50'],
+            'presence_wake_ms_p99': wake['p99'],
+        }
+
+
+def draw_attract(frame, text="Wave to start ordering"):
+    """Draw the attract-mode banner across the middle of an RGB frame."""
+    h, w = frame.shape[:2]
+    (text_w, text_h), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 1.0, 2)
+    x, y = (w - text_w) // 2, (h + text_h) // 2
+    cv2.rectangle(frame, (x - 20, y - text_h - 20), (x + text_w + 20, y + 20), COLORS['BACKGROUND'][::-1], -1)
+    cv2.putText(frame, text, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 1.0, COLORS['TEXT'][::-1], 2)
@@ -0,0 +1,102 @@
+from collections import namedtuple
+
+import numpy as np
+
+# One rung of the quality ladder: capture size and pixel format, the
+# share of the capture size the hand model sees, MediaPipe's model
+# complexity and tracking confidence, and the frame rate to pace for.
+QualityLevel = namedtuple('QualityLevel', ['width', 'height', 'fourcc', 'inference_scale', 'model_complexity',
+                                           'tracking_confidence', 'target_fps'])
+
+
+def describe(level):
+    return (f"capture {level.width}x{level.height} {level.fourcc}, inference x{level.inference_scale:g}, "
+            f"model complexity {level.model_complexity}, tracking confidence {level.tracking_confidence:g}, "
+            f"{level.target_fps} FPS")
+
+
+class QualityController:
+    """Moves along a ladder of quality levels to keep frame times within a budget.
+
+    levels run from best to cheapest. update() is given every frame's
+    time; once window frames have been seen at the current level, their
+    p90 is compared with budget_ms. Over budget steps one level down at
+    once. Under headroom times the budget, and at least upgrade_wait
+    seconds after the last change, steps one level up. An upgrade that
+    has to be undone within upgrade_wait doubles the wait (up to
+    max_upgrade_wait), so a level that can't be held is not retried over
+    and over. The wait drops back to its base once an upgrade has held
+    for the current wait, or after reset_after seconds without a step
+    down, so a few passing load spikes don't slow recovery for good.
+    Every change is logged through log.
+    """
+
+    def __init__(self, levels, budget_ms, start=0, window=30, headroom=0.6, upgrade_wait=5.0,
+                 max_upgrade_wait=60.0, reset_after=120.0, log=print):
+        self.levels = [QualityLevel(*level) for level in levels]
+        self.budget_ms = budget_ms
+        self.index = min(start, len(self.levels) - 1)
+        self.window = window
+        self.headroom = headroom
+        self.base_upgrade_wait = self.upgrade_wait = upgrade_wait
+        self.max_upgrade_wait = max_upgrade_wait
+        self.reset_after = reset_after
+        self.log = log
+
+        self.samples = np.zeros(window)
+        self.count = 0
+        self.changed_at = None
+        self.last_upgrade_at = None
+        self.last_downgrade_at = None
+        self.adjustments = 0
+        self.last_p90 = 0.0
+
+    @property
+    def level(self):
+        return self.levels[self.index]
+
+    def update(self, frame_ms, now):
+        """Record one frame's time in ms at now seconds; return the new level if quality changes, else None."""
+        if self.changed_at is None:
+            self.changed_at = self.last_downgrade_at = now
+        if self.last_upgrade_at is not None and now - self.last_upgrade_at >= self.upgrade_wait:
+            # The upgrade held
+            self.last_upgrade_at = None
+            self.upgrade_wait = self.base_upgrade_wait
+        elif now - self.last_downgrade_at >= self.reset_after:
+            self.upgrade_wait = self.base_upgrade_wait
+        self.samples[self.count % self.window] = frame_ms
+        self.count += 1
+        if self.count < self.window:
+            return None
+
+        p90 = self.last_p90 = float(np.percentile(self.samples, 90))
+        if p90 > self.budget_ms and self.index < len(self.levels) - 1:
+            if self.last_upgrade_at is not None and now - self.last_upgrade_at < self.upgrade_wait:
+                self.upgrade_wait = min(self.max_upgrade_wait, self.upgrade_wait * 2)
+            self.last_upgrade_at = None
+            self.last_downgrade_at = now
+            return self._change(self.index + 1, p90, now, "down")
+        if (p90 < self.budget_ms * self.headroom and self.index > 0
+                and now - self.changed_at >= self.upgrade_wait):
+            self.last_upgrade_at = now
+            return self._change(self.index - 1, p90, now, "up")
+        return None
+
+    def _change(self, index, p90, now, direction):
+        self.index = index
+        self.changed_at = now
+        self.count = 0
+        self.adjustments += 1
+        self.log(f"Quality {direction} to level {index} of {len(self.levels) - 1} "
+                 f"(frame time p90 {p90:.1f} ms, budget {self.budget_ms:g} ms): {describe(self.level)}")
+        return self.level
+
+    def stats(self):
+        """Flat counters, for metrics export."""
+        return {
+            'quality_level': self.index,
+            'quality_adjustments': self.adjustments,
+            'quality_frame_ms_p90': self.last_p90,
+            'quality_upgrade_wait': self.upgrade_wait,
+        }
@@ -0,0 +1,151 @@
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from hand_tracking import INDEX_FINGER_TIP
+
+
+class AdaptiveTracker:
+    """Runs a landmark detector on a crop around the hand, and not on every frame.
+
+    After a detection, inference runs on a padded region around the last
+    landmarks, optionally downscaled. The region only moves when the hand
+    gets close to its edge, so the detector sees a stable crop. The full
+    frame is searched every full_frame_interval inferences, or as soon as
+    the hand is lost in the crop. With skip_frames > 0, that many frames
+    are skipped between inferences and the hand is moved along the
+    fingertip's last velocity instead.
+
+    detect(rgb) must return a list of (21, 3) normalized landmark arrays
+    for the image it is given; results are mapped back to full-frame
+    coordinates here.
+    """
+
+    def __init__(self, detect, full_frame_interval=30, skip_frames=0, padding=0.3,
+                 scale=1.0, min_roi_size=128):
+        self.detect = detect
+        self.full_frame_interval = full_frame_interval
+        self.skip_frames = skip_frames
+        self.padding = padding
+        self.scale = scale
+        self.min_roi_size = min_roi_size
+
+        self.frame_index = 0
+        self.roi = None
+        self.inferences_since_full = 0
+        self.last_hands = []
+        self.last_index = 0
+        self.previous_tips = None
+        self.previous_index = 0
+
+        self.full_calls = 0
+        self.roi_calls = 0
+        self.skipped = 0
+        self.call_times = deque(maxlen=1024)
+
+    def process(self, rgb_frame):
+        """Return landmarks for this frame, detected or interpolated."""
+        self.frame_index += 1
+        if self.last_hands and self.frame_index - self.last_index <= self.skip_frames:
+            self.skipped += 1
+            return self._extrapolate()
+
+        hands = []
+        if self.roi is not None and self.inferences_since_full < self.full_frame_interval:
+            hands = self._detect_roi(rgb_frame)
+            self.inferences_since_full += 1
+        if not hands:
+            hands = self._detect_full(rgb_frame)
+            self.inferences_since_full = 0
+
+        self._remember(hands, rgb_frame.shape)
+        return hands
+
+    def _detect_full(self, rgb_frame):
+        self.full_calls += 1
+        self.call_times.append(time.perf_counter())
+        return self.detect(rgb_frame)
+
+    def _detect_roi(self, rgb_frame):
+        self.roi_calls += 1
+        self.call_times.append(time.perf_counter())
+
+        h, w = rgb_frame.shape[:2]
+        x0, y0, x1, y1 = self.roi
+        crop = rgb_frame[y0:y1, x0:x1]
+        if self.scale < 1.0:
+            crop = cv2.resize(crop, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        else:
+            crop = np.ascontiguousarray(crop)
+
+        hands = self.detect(crop)
+        crop_w, crop_h = x1 - x0, y1 - y0
+        for landmarks in hands:
+            landmarks[:, 0] = (x0 + landmarks[:, 0] * crop_w) / w
+            landmarks[:, 1] = (y0 + landmarks[:, 1] * crop_h) / h
+            landmarks[:, 2] *= crop_w / w
+        return hands
+
+    def _remember(self, hands, shape):
+        if hands and self.last_hands and len(hands) == len(self.last_hands):
+            self.previous_tips = np.array([landmarks[INDEX_FINGER_TIP, :2] for landmarks in self.last_hands])
+            self.previous_index = self.last_index
+        else:
+            self.previous_tips = None
+        # Keep private copies; callers may modify the returned arrays
+        self.last_hands = [landmarks.copy() for landmarks in hands]
+        self.last_index = self.frame_index
+        self._update_roi(shape)
+
+    def _update_roi(self, shape):
+        if not self.last_hands:
+            self.roi = None
+            return
+
+        h, w = shape[:2]
+        points = np.concatenate([landmarks[:, :2] for landmarks in self.last_hands]) * (w, h)
+        bx0, by0 = points.min(axis=0)
+        bx1, by1 = points.max(axis=0)
+
+        # Keep the current region while the hand stays well inside it
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            margin_x = (x1 - x0) * self.padding / 2
+            margin_y = (y1 - y0) * self.padding / 2
+            if (bx0 >= x0 + margin_x and by0 >= y0 + margin_y and
+                    bx1 <= x1 - margin_x and by1 <= y1 - margin_y):
+                return
+
+        size = max(bx1 - bx0, by1 - by0) * (1 + 2 * self.padding)
+        size = int(min(max(size, self.min_roi_size), w, h))
+        cx, cy = (bx0 + bx1) / 2, (by0 + by1) / 2
+        x0 = int(min(max(cx - size / 2, 0), w - size))
+        y0 = int(min(max(cy - size / 2, 0), h - size))
+        self.roi = (x0, y0, x0 + size, y0 + size)
+
+    def _extrapolate(self):
+        hands = [landmarks.copy() for landmarks in self.last_hands]
+        if self.previous_tips is None:
+            return hands
+        frames = self.last_index - self.previous_index
+        ahead = self.frame_index - self.last_index
+        for landmarks, previous_tip in zip(hands, self.previous_tips):
+            velocity = (landmarks[INDEX_FINGER_TIP, :2] - previous_tip) / frames
+            landmarks[:, :2] += velocity * ahead
+        return hands
+
+    def calls_per_second(self):
+        """Inference calls made during the last second."""
+        now = time.perf_counter()
+        return sum(1 for t in self.call_times if now - t <= 1.0)
+
+    def stats(self):
+        """Counters for full-frame, cropped and skipped inferences."""
+        return {
+            'full_frame_calls': self.full_calls,
+            'roi_calls': self.roi_calls,
+            'skipped_frames': self.skipped,
+            'calls_per_second': self.calls_per_second(),
+        }
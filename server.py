@@ -0,0 +1,378 @@
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from analytics import OrderAnalytics
+from config import ANALYTICS, DETECTOR, JOURNAL, MENU, POS
+from detectors import create_detector
+from frame_path import FramePath
+from frame_source import SyntheticLandmarkSource, open_source
+from headless import SCENARIOS, FrameClock, scenario_stream
+from inference_worker import InferenceWorkerPool
+from journal import OrderJournal
+from menu_loader import DEFAULT_MENU, MenuWatcher, compile_menu, load_menu
+from metrics import RollingHistogram
+from pipeline import LatestSlot
+from pos_client import OrderSubmitter
+from session import OrderingSession
+
+
+class Station:
+    """One kiosk station: a frame source, a capture thread and its own ordering session.
+
+    The capture thread keeps only the newest frame, like the single
+    kiosk pipeline. Non-camera sources are paced at fps. Lossless
+    stations (scripted scenarios) wait for each frame to be served
+    before reading the next one, so the script sees the session's
+    current state.
+    """
+
+    def __init__(self, name, source, session, clock=None, fps=None, lossless=False, sink=None, journal=None,
+                 analytics=None):
+        self.name = name
+        self.source = source
+        self.session = session
+        self.journal = journal
+        self.analytics = analytics
+        self.clock = clock
+        self.fps = fps
+        self.lossless = lossless
+        self.sink = sink
+        self.frame_path = FramePath(mirror=True)
+        self.slot = LatestSlot(on_drop=lambda packet: self.source.release(packet[0]))
+        self.latency = RollingHistogram(512)
+        self.captured = 0
+        self.served = 0
+        self.finished = False
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self.journal is not None:
+            self.journal.start()
+        if self.analytics is not None:
+            self.analytics.start()
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, name=f"capture-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self.source.close()
+        if self.sink is not None:
+            self.sink.close()
+        if self.journal is not None:
+            self.journal.stop()
+        if self.analytics is not None:
+            self.analytics.stop()
+
+    def _capture_loop(self):
+        period = 1.0 / self.fps if self.fps else 0.0
+        deadline = time.perf_counter()
+        while self._running:
+            if self.lossless:
+                while self._running and self.served < self.captured:
+                    time.sleep(0.0005)
+            if period:
+                deadline += period
+                delay = deadline - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    deadline = time.perf_counter()
+
+            source_frame = self.source.read()
+            if source_frame is None:
+                if self.source.finished:
+                    self.finished = True
+                    return
+                time.sleep(0.005)
+                continue
+            self.captured += 1
+            self.slot.put((source_frame, time.perf_counter()))
+
+    def render(self, source_frame, hands, captured_at):
+        """Run the session on a frame whose hands are known."""
+        hands = self.frame_path.mirror_landmarks(hands)
+        frame = self.session.step(self.frame_path.to_display(source_frame.rgb), hands)
+        if self.sink is not None:
+            self.sink.show(frame)
+        self.source.release(source_frame)
+        if self.clock is not None:
+            self.clock.tick()
+        self.served += 1
+        self.latency.add((time.perf_counter() - captured_at) * 1000)
+
+
+class BatchScheduler:
+    """Runs hand inference for frames from many stations on a few shared model instances.
+
+    Shared instances see frames from different streams back to back, so
+    they run in static image mode instead of relying on per-stream
+    tracking. With processes=True, each batch is spread over worker
+    processes through shared memory (one pool per frame size); otherwise
+    over a thread pool with one detector per thread. backend names one
+    of detectors.DETECTORS; None takes config.DETECTOR's.
+    """
+
+    def __init__(self, instances=1, processes=False, max_batch=8, backend=None):
+        self.instances = instances
+        self.detector = dict(DETECTOR, BACKEND=backend or DETECTOR['BACKEND'])
+        self.processes = processes
+        self.max_batch = max_batch
+        self.pools = {}
+        self.trackers = []
+        self._local = threading.local()
+        self._executor = None if processes else ThreadPoolExecutor(instances, thread_name_prefix="inference")
+
+        self.batches = 0
+        self.calls = 0
+        self.batch_sizes = RollingHistogram(512)
+
+    def _detect_local(self, rgb):
+        tracker = getattr(self._local, 'tracker', None)
+        if tracker is None:
+            tracker = self._local.tracker = create_detector(self.detector, static_image_mode=True)
+            self.trackers.append(tracker)
+        return tracker.detect_landmarks(rgb)
+
+    def _pool_for(self, shape):
+        pool = self.pools.get(shape)
+        if pool is None:
+            # Enough slots for a whole batch to be submitted before waiting
+            pool = InferenceWorkerPool(shape, workers=self.instances, slots=self.max_batch + self.instances,
+                                       detector=self.detector, static_image_mode=True)
+            self.pools[shape] = pool
+        return pool
+
+    def infer(self, frames):
+        """Return one list of hands per RGB frame."""
+        self.batches += 1
+        self.calls += len(frames)
+        self.batch_sizes.add(len(frames))
+        if self.processes:
+            submitted = [(pool, pool.submit(frame)) for pool, frame in
+                         ((self._pool_for(frame.shape), frame) for frame in frames)]
+            return [pool.wait(seq) for pool, seq in submitted]
+        return list(self._executor.map(self._detect_local, frames))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+        for tracker in self.trackers:
+            tracker.close()
+        for pool in self.pools.values():
+            pool.close()
+
+
+def jain_fairness(values):
+    """Jain's fairness index: 1.0 when all values are equal, 1/n when one takes everything."""
+    values = [value for value in values if value >= 0]
+    squares = sum(value * value for value in values)
+    if not values or squares == 0:
+        return 1.0
+    return sum(values) ** 2 / (len(values) * squares)
+
+
+class KioskServer:
+    """Hosts several independent ordering sessions in one process.
+
+    Each round takes the newest frame of every station that has one,
+    runs inference for all frames that need it as one batch, then
+    renders every station's session. Sources with their own landmarks
+    (synthetic streams) skip inference. A reloaded menu from menu_watcher
+    is swapped into the live (non-scenario) stations between rounds.
+    """
+
+    def __init__(self, stations, scheduler, menu_watcher=None):
+        self.stations = stations
+        self.scheduler = scheduler
+        self.menu_watcher = menu_watcher
+        self.started_at = None
+
+    def run(self, seconds=None, report_interval=5.0):
+        for station in self.stations:
+            station.start()
+        if self.menu_watcher is not None:
+            self.menu_watcher.start()
+        self.started_at = time.perf_counter()
+        last_report = self.started_at
+        try:
+            while seconds is None or time.perf_counter() - self.started_at < seconds:
+                if all(station.finished and not station.slot.depth() for station in self.stations):
+                    break
+                if not self.serve_round():
+                    time.sleep(0.001)
+                if time.perf_counter() - last_report >= report_interval:
+                    self.print_report()
+                    last_report = time.perf_counter()
+        finally:
+            if self.menu_watcher is not None:
+                self.menu_watcher.stop()
+            for station in self.stations:
+                station.stop()
+            self.scheduler.close()
+        self.print_report()
+
+    def serve_round(self):
+        """Serve one round; return False if no station had a frame."""
+        menu = self.menu_watcher.poll() if self.menu_watcher is not None else None
+        if menu is not None:
+            for station in self.stations:
+                if not station.lossless:
+                    station.session.set_menu(menu)
+            print(f"Menu reloaded: {len(menu)} items.")
+
+        ready = []
+        for station in self.stations:
+            packet = station.slot.take()
+            if packet is not None:
+                ready.append((station, packet))
+        if not ready:
+            return False
+
+        needs_inference = [packet[0].rgb for _, packet in ready if packet[0].hands is None]
+        inferred = iter(self.scheduler.infer(needs_inference) if needs_inference else [])
+        for station, (source_frame, captured_at) in ready:
+            hands = source_frame.hands if source_frame.hands is not None else next(inferred)
+            station.render(source_frame, hands, captured_at)
+        return True
+
+    def report(self):
+        """Per-station frame rate and latency, plus fairness across stations."""
+        elapsed = max(time.perf_counter() - self.started_at, 1e-9)
+        rows = []
+        for station in self.stations:
+            summary = station.latency.summary()
+            rows.append({
+                'station': station.name,
+                'fps': station.served / elapsed,
+                'latency_p50': summary['p50'],
+                'latency_p95': summary['p95'],
+                'latency_p99': summary['p99'],
+                'dropped': station.slot.dropped,
+                'screen': station.session.current_screen,
+                **(station.sink.stats() if station.sink is not None else {}),
+            })
+        return {
+            'stations': rows,
+            'fairness': jain_fairness([row['fps'] for row in rows]),
+            'inference_calls_per_second': self.scheduler.calls / elapsed,
+            'mean_batch_size': self.scheduler.batch_sizes.summary()['mean'],
+        }
+
+    def print_report(self):
+        report = self.report()
+        for row in report['stations']:
+            print(f"{row['station']}: {row['fps']:.1f} FPS, latency p50/p95/p99 "
+                  f"{row['latency_p50']:.1f}/{row['latency_p95']:.1f}/{row['latency_p99']:.1f} ms, "
+                  f"dropped {row['dropped']}, screen {row['screen']}")
+            if 'stream_clients' in row:
+                print(f"  stream: {row['stream_clients']} clients, {row['stream_encoded']} encoded "
+                      f"(p50 {row['stream_encode_ms_p50']:.1f} ms), {row['stream_unchanged']} unchanged, "
+                      f"{row['stream_busy_drops']} dropped busy, {row['stream_kbps']:.0f} kbit/s")
+        print(f"Fairness {report['fairness']:.3f}, {report['inference_calls_per_second']:.1f} inferences/s, "
+              f"mean batch {report['mean_batch_size']:.2f}")
+
+
+def create_station(spec, index, menu, fps, display, pos_submitter=None, stream_port=None):
+    """Build a station from a source spec; 'scenario:NAME' plays a canned synthetic scenario.
+
+    Live stations journal their orders, record them for analytics and submit them through the
+    shared pos_submitter.
+    With stream_port, the station's screen is served as MJPEG on stream_port + index.
+    """
+    name = f"station{index}"
+    sinks = []
+    if display:
+        from display_sink import OpenCVSink
+        sinks.append(OpenCVSink(f"Touchless Ordering - {name}"))
+    if stream_port is not None:
+        from display_sink import create_stream_sink
+        sinks.append(create_stream_sink(stream_port + index))
+    sink = None
+    if len(sinks) == 1:
+        sink = sinks[0]
+    elif sinks:
+        from display_sink import TeeSink
+        sink = TeeSink(sinks)
+
+    if spec.startswith('scenario:'):
+        # Scenarios name items of the default menu
+        clock = FrameClock(fps)
+        session = OrderingSession(compile_menu(DEFAULT_MENU), clock=clock)
+        stream = scenario_stream(session, SCENARIOS[spec.split(':', 1)[1]], (480, 640, 3), fps)
+        return Station(name, SyntheticLandmarkSource(stream), session, clock=clock, fps=fps,
+                       lossless=True, sink=sink)
+
+    source = open_source(spec, loop=True)
+    is_camera = spec == 'camera' or spec.startswith('camera:')
+    session = OrderingSession(menu)
+    journal = None
+    if JOURNAL['DIRECTORY']:
+        # Each station journals to its own directory and resumes its own cart
+        journal = OrderJournal(os.path.join(JOURNAL['DIRECTORY'], name), JOURNAL['FSYNC_INTERVAL'],
+                               JOURNAL['SEGMENT_BYTES'], JOURNAL['KEEP_SEGMENTS'])
+        if journal.cart:
+            session.cart.restore(journal.cart)
+        journal.watch(session.cart)
+    analytics = None
+    if ANALYTICS['DIRECTORY']:
+        # Each station is a kiosk of its own in the analytics
+        analytics = OrderAnalytics(os.path.join(ANALYTICS['DIRECTORY'], name), ANALYTICS['FLUSH_INTERVAL'])
+        analytics.watch(session.cart)
+
+    def order_completed(order):
+        if journal is not None:
+            journal.record_order(order)
+        if analytics is not None:
+            analytics.record_order(order)
+        if pos_submitter is not None:
+            pos_submitter.submit(dict(order, station=name))
+
+    session.on_order = order_completed
+    return Station(name, source, session, fps=None if is_camera else fps, sink=sink, journal=journal,
+                   analytics=analytics)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve several kiosk stations from one process")
+    parser.add_argument("--station", action="append", required=True, metavar="SOURCE",
+                        help="'camera:N', a video file, an image directory, an .npz recording or "
+                             "'scenario:NAME'; repeat for each station")
+    parser.add_argument("--instances", type=int, default=1, help="shared hand model instances")
+    parser.add_argument("--processes", action="store_true", help="run model instances in worker processes")
+    parser.add_argument("--detector", default=DETECTOR['BACKEND'],
+                        help="hand detection backend: one of detectors.DETECTORS (mediapipe, onnx, mock)")
+    parser.add_argument("--fps", type=float, default=30.0, help="frame rate of non-camera sources")
+    parser.add_argument("--seconds", type=float, help="stop after this many seconds")
+    parser.add_argument("--display", action="store_true", help="show each station in an OpenCV window")
+    parser.add_argument("--stream-port", type=int, metavar="PORT",
+                        help="stream each station's screen as MJPEG, station N on PORT+N")
+    args = parser.parse_args()
+
+    pos_submitter = None
+    if POS['URL']:
+        pos_submitter = OrderSubmitter(POS['URL'], POS['SPOOL_DIRECTORY'], POS['QUEUE_SIZE'], POS['MAX_BATCH'],
+                                       POS['CONNECTIONS'], max_retries=POS['MAX_RETRIES'])
+        pos_submitter.start()
+
+    menu = load_menu(MENU['PATH'])
+    stations = [create_station(spec, i, menu, args.fps, args.display, pos_submitter, args.stream_port)
+                for i, spec in enumerate(args.station)]
+    scheduler = BatchScheduler(args.instances, args.processes, max_batch=len(stations), backend=args.detector)
+    menu_watcher = MenuWatcher(MENU['PATH'], MENU['RELOAD_INTERVAL'])
+    try:
+        KioskServer(stations, scheduler, menu_watcher).run(args.seconds)
+    finally:
+        if pos_submitter is not None:
+            pos_submitter.stop()
+            print(f"POS stats: {pos_submitter.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+import time
+import uuid
+
+import cv2
+
+from cart_manager import CartManager
+from gestures import GestureEngine
+from hand_tracking import draw_hand_landmarks
+from layout import (Action, LayoutButton, LayoutText, ScreenLayout, ADD, CANCEL_DELETE,
+                    CONFIRM_DELETE, DELETE, NAVIGATE, PAGE, QUIT, REDUCE)
+from menu_loader import format_price
+from overlay_cache import OverlayLayer, SpriteCache
+
+# Add items screen geometry: menu rows start below the header at MENU_TOP and
+# are MENU_ROW_HEIGHT apart; the navigation row needs NAV_HEIGHT below them.
+MENU_TOP = 100
+MENU_ROW_HEIGHT = 50
+NAV_HEIGHT = 70
+
+
+class OrderingSession:
+    """Screen, cart and selection state of one ordering session.
+
+    A session knows nothing about cameras, models or Tk: step() takes an
+    RGB frame and the hands seen in it, updates the state machine and
+    draws the UI onto the frame. clock() supplies the time used for the
+    selection cooldown and checkout timer, so sessions can be driven by
+    simulated time. menu is a menu_loader.CompiledMenu. on_order(order)
+    is called with each completed order before the cart is cleared.
+    Buttons are selected by dwelling on them or pinching, through a
+    gestures.GestureEngine.
+    """
+
+    def __init__(self, menu, clock=time.time, on_cart_change=None, on_quit=None, on_order=None,
+                 gestures=None):
+        self.menu = menu
+        self.cart = CartManager(menu)
+        self.cart.subscribe(self.cart_changed)
+        self.clock = clock
+        self.on_cart_change = on_cart_change
+        self.on_quit = on_quit
+        self.on_order = on_order
+        self.orders_completed = 0
+        # When the current customer put the first item in an empty cart
+        self.started_at = None
+
+        # Screen states
+        self.SCREENS = {
+            'HOME': 'home_screen',
+            'ADD_ITEMS': 'add_items_screen',
+            'VIEW_CART': 'view_cart_screen',
+            'CHECKOUT': 'checkout_screen',
+            'CONFIRM_DELETE': 'confirm_delete_screen'
+        }
+        self.current_screen = self.SCREENS['HOME']
+
+        # UI Elements
+        self.home_buttons = [
+            LayoutButton("Add Items", "Add Items", [50, 100, 350, 170], Action(NAVIGATE, self.SCREENS['ADD_ITEMS'])),
+            LayoutButton("View Cart", "View Cart", [50, 200, 350, 270], Action(NAVIGATE, self.SCREENS['VIEW_CART'])),
+            LayoutButton("Quit", "Quit", [50, 300, 350, 370], Action(QUIT, None))
+        ]
+        self.confirm_delete_buttons = [
+            LayoutButton("Yes", "Yes", [50, 300, 200, 370], Action(CONFIRM_DELETE, None)),
+            LayoutButton("No", "No", [250, 300, 400, 370], Action(CANCEL_DELETE, None))
+        ]
+
+        # Layout of the current screen, rebuilt on state changes
+        self.screen_layouts = {
+            self.SCREENS['HOME']: self.layout_home_screen,
+            self.SCREENS['ADD_ITEMS']: self.layout_add_items_screen,
+            self.SCREENS['VIEW_CART']: self.layout_view_cart_screen,
+            self.SCREENS['CHECKOUT']: self.layout_checkout_screen,
+            self.SCREENS['CONFIRM_DELETE']: self.layout_confirm_delete_screen
+        }
+        self.layout = ScreenLayout("")
+
+        # Page of the menu shown on the add items screen
+        self.menu_page = 0
+
+        # Dwell/pinch selection
+        self.gestures = gestures if gestures is not None else GestureEngine()
+
+        # Item to be deleted (for confirmation dialog)
+        self.item_to_delete = None
+
+        # Color scheme
+        self.COLORS = {
+            'PRIMARY': (46, 204, 113),  # Green
+            'SECONDARY': (52, 152, 219),  # Blue
+            'ACCENT': (231, 76, 60),  # Red
+            'BACKGROUND': (44, 62, 80),  # Dark Blue
+            'TEXT': (236, 240, 241),  # White
+            'HOVER': (39, 174, 96)  # Darker Green
+        }
+
+        # Cached UI overlay
+        self.sprite_cache = SpriteCache(self.COLORS['TEXT'], self.COLORS['HOVER'], rgb=True)
+        self.overlay = OverlayLayer(self.sprite_cache)
+
+    def cart_changed(self, event):
+        """Time the customer's session, and notify the owner that the cart contents changed."""
+        if not self.cart:
+            self.started_at = None
+        elif self.started_at is None:
+            self.started_at = self.clock()
+        if self.on_cart_change is not None:
+            self.on_cart_change()
+
+    def order(self):
+        """The current cart as an order: a unique id, item quantities, total in cents, time and session start."""
+        return {'order_id': uuid.uuid4().hex, 'items': dict(self.cart.items()),
+                'total': self.cart.total, 'time': self.clock(), 'started': self.started_at}
+
+    def set_menu(self, menu):
+        """Swap in a new compiled menu; call between frames.
+
+        Cart items the new menu no longer has are dropped, and the
+        remaining ones are priced from the new menu. The screen is laid
+        out again on the next frame.
+        """
+        self.menu = menu
+        for item in self.cart.set_menu(menu):
+            print(f"Removed {item} from the cart: it is no longer on the menu.")
+
+    def layout_home_screen(self, shape):
+        """Lay out the home screen."""
+        return ScreenLayout("Home Screen", self.home_buttons)
+
+    def menu_rows_per_page(self, shape):
+        """Number of menu rows that fit on the add items screen for a frame shape."""
+        return max(1, (shape[0] - MENU_TOP - NAV_HEIGHT) // MENU_ROW_HEIGHT)
+
+    def layout_add_items_screen(self, shape):
+        """Lay out the visible page of the add items screen.
+
+        Only the rows on the current page are laid out and drawn, so the
+        cost of the screen does not grow with the size of the menu.
+        """
+        buttons = []
+        texts = []
+        y_offset = MENU_TOP
+
+        rows = self.menu_rows_per_page(shape)
+        pages = max(1, -(-len(self.menu) // rows))
+        self.menu_page = min(self.menu_page, pages - 1)
+        start = self.menu_page * rows
+
+        for menu_item in self.menu.items[start:start + rows]:
+            item = menu_item.name
+            texts.append(LayoutText(f"{item}: {format_price(menu_item.price)}", (50, y_offset), 0.7))
+
+            # Add + button
+            buttons.append(LayoutButton(f"add_{item}", "+", [300, y_offset - 25, 350, y_offset + 5],
+                                        Action(ADD, item), self.COLORS['SECONDARY']))
+
+            # Display current quantity in cart
+            texts.append(LayoutText(f"x{self.cart.quantity(item)}", (370, y_offset), 0.7))
+
+            # Add - button
+            buttons.append(LayoutButton(f"reduce_{item}", "-", [400, y_offset - 25, 450, y_offset + 5],
+                                        Action(REDUCE, item), self.COLORS['ACCENT']))
+
+            y_offset += MENU_ROW_HEIGHT
+
+        # Keep the navigation row in place on every page of a long menu
+        if pages > 1:
+            y_offset = MENU_TOP + rows * MENU_ROW_HEIGHT
+            if self.menu_page > 0:
+                buttons.append(LayoutButton("prev_page", "<", [370, y_offset, 440, y_offset + NAV_HEIGHT],
+                                            Action(PAGE, -1), self.COLORS['SECONDARY']))
+            texts.append(LayoutText(f"{self.menu_page + 1}/{pages}", (455, y_offset + 45), 0.7))
+            if self.menu_page < pages - 1:
+                buttons.append(LayoutButton("next_page", ">", [540, y_offset, 610, y_offset + NAV_HEIGHT],
+                                            Action(PAGE, 1), self.COLORS['SECONDARY']))
+
+        # Back to Home button
+        buttons.append(LayoutButton("back_to_home", "Back to Home", [50, y_offset, 350, y_offset + NAV_HEIGHT],
+                                    Action(NAVIGATE, self.SCREENS['HOME']), self.COLORS['ACCENT']))
+        return ScreenLayout("Add Items", buttons, texts)
+
+    def layout_view_cart_screen(self, shape):
+        """Lay out the view cart screen."""
+        if not self.cart:
+            return ScreenLayout("View Cart", texts=[LayoutText("Your cart is empty!", (50, 200), 1)])
+
+        buttons = []
+        texts = []
+        y_offset = 100
+        for item, quantity, price in self.cart.lines():
+            texts.append(LayoutText(f"{item} x{quantity}: {format_price(price)}", (50, y_offset), 0.7))
+            buttons.append(LayoutButton(f"delete_{item}", "X", [350, y_offset - 25, 400, y_offset + 5],
+                                        Action(DELETE, item), self.COLORS['ACCENT']))
+            y_offset += 50
+
+        buttons.append(LayoutButton("checkout", "Checkout", [50, y_offset, 350, y_offset + 70],
+                                    Action(NAVIGATE, self.SCREENS['CHECKOUT']), self.COLORS['SECONDARY']))
+
+        height = shape[0]
+        buttons.append(LayoutButton("back_to_home", "Back to Home", [50, height - 100, 350, height - 30],
+                                    Action(NAVIGATE, self.SCREENS['HOME']), self.COLORS['ACCENT']))
+        return ScreenLayout("View Cart", buttons, texts)
+
+    def layout_confirm_delete_screen(self, shape):
+        """Lay out the confirm delete screen."""
+        if not self.item_to_delete:
+            return ScreenLayout("Confirm Delete")
+        return ScreenLayout("Confirm Delete", self.confirm_delete_buttons,
+                            [LayoutText(f"Delete {self.item_to_delete}?", (50, 200), 1),
+                             LayoutText("Hold two fingers on Yes to confirm", (50, 250), 0.7)])
+
+    def layout_checkout_screen(self, shape):
+        """Lay out the checkout screen."""
+        texts = []
+        y_offset = 200
+
+        # Order items and total
+        for item, quantity, price in self.cart.lines():
+            texts.append(LayoutText(f"{item} x{quantity}: {format_price(price)}", (50, y_offset), 0.7))
+            y_offset += 30
+        texts.append(LayoutText(f"Total: {format_price(self.cart.total)}", (50, y_offset), 0.7))
+        return ScreenLayout("Order Placed!", texts=texts)
+
+    def draw_layout(self, layer, layout):
+        """Draw a screen layout into the overlay layer."""
+        self.draw_header(layer, layout.title)
+        for text in layout.texts:
+            layer.put_text(text.text, text.org, text.scale, self.COLORS['TEXT'])
+        for button in layout.buttons:
+            self.draw_fancy_button(layer, button)
+
+    def draw_fancy_button(self, layer, button):
+        """Place a cached, pre-rendered button on the overlay layer."""
+        color = button.color if button.color is not None else self.COLORS['PRIMARY']
+        layer.place_button(button.id, button.text, button.rect, color)
+
+    def draw_header(self, layer, text):
+        """Draw a fancy header."""
+        layer.rectangle((0, 0), (layer.canvas.shape[1], 70), self.COLORS['SECONDARY'])
+        layer.put_text(text, (50, 45), 1, self.COLORS['TEXT'])
+
+    def refresh_overlay(self, shape):
+        """Re-layout and redraw the UI layer if the screen, cart, menu, menu page or frame size changed."""
+        key = (self.current_screen, self.cart.version, self.item_to_delete, self.menu, self.menu_page, shape)
+        if self.overlay.key == key:
+            return
+
+        self.layout = self.screen_layouts[self.current_screen](shape)
+        self.overlay.begin(key, shape)
+        self.draw_layout(self.overlay, self.layout)
+        self.overlay.finish()
+
+    def perform_action(self, action):
+        """Apply a button's action to the screen and cart state."""
+        if action.kind == NAVIGATE:
+            self.current_screen = action.target
+        elif action.kind == QUIT:
+            if self.on_quit is not None:
+                self.on_quit()
+        elif action.kind == ADD:
+            self.cart.add_item(action.target)
+        elif action.kind == REDUCE:
+            self.cart.remove_item(action.target)
+        elif action.kind == DELETE:
+            self.item_to_delete = action.target
+            self.current_screen = self.SCREENS['CONFIRM_DELETE']
+        elif action.kind == CONFIRM_DELETE:
+            if self.cart.delete_item(self.item_to_delete):
+                print(f"Deleted {self.item_to_delete} from the cart.")
+            self.current_screen = self.SCREENS['VIEW_CART']
+            self.item_to_delete = None
+        elif action.kind == CANCEL_DELETE:
+            self.current_screen = self.SCREENS['VIEW_CART']
+            self.item_to_delete = None
+        elif action.kind == PAGE:
+            # Clamped to the last page when the screen is laid out
+            self.menu_page = max(0, self.menu_page + action.target)
+
+    def update_screen_state(self):
+        """Apply the automatic transitions and timers of the current screen."""
+        if self.current_screen == self.SCREENS['CONFIRM_DELETE']:
+            if not self.item_to_delete:
+                # If no item is selected for deletion, return to the cart screen
+                self.current_screen = self.SCREENS['VIEW_CART']
+
+        elif self.current_screen == self.SCREENS['CHECKOUT']:
+            # Track the time when the checkout screen is first displayed
+            if not hasattr(self, 'checkout_start_time'):
+                self.checkout_start_time = self.clock()
+
+            # Transition back to the home screen after 5 seconds
+            if self.clock() - self.checkout_start_time >= 5:
+                self.orders_completed += 1
+                if self.on_order is not None and self.cart:
+                    self.on_order(self.order())
+                self.cart.clear()  # Clear the cart
+                self.menu_page = 0  # The next customer starts at the top of the menu
+                self.current_screen = self.SCREENS['HOME']  # Return to the home screen
+                del self.checkout_start_time  # Reset the timer
+
+    def accepts_selection(self, button):
+        """Whether the current pose may select a button: confirming a delete takes two fingers."""
+        if button.action.kind == CONFIRM_DELETE:
+            return self.gestures.pose is not None and self.gestures.pose.finger_count == 2
+        return True
+
+    def draw_dwell_progress(self, frame, pointer):
+        """Draw the dwell progress as an arc around the pointer."""
+        progress = self.gestures.selector.progress(self.clock())
+        if pointer is None or progress <= 0:
+            return
+        color = tuple(reversed(self.COLORS['PRIMARY']))
+        cv2.ellipse(frame, pointer, (18, 18), -90, 0, int(360 * progress), color, 4)
+
+    def step(self, frame, hands, latency=0.0):
+        """Handle selections and draw the current screen onto an RGB frame.
+
+        hands are (21, 3) landmark arrays in the frame's (mirrored) coordinates;
+        latency is the expected capture-to-display time of the frame in seconds.
+        """
+        for landmarks in hands:
+            draw_hand_landmarks(frame, landmarks, rgb=True)
+
+        # Bring the layout up to date, then turn this frame's gestures into a selection
+        self.refresh_overlay(frame.shape)
+        pose, button = self.gestures.update(hands, frame.shape, self.layout, self.clock(),
+                                            self.accepts_selection, latency)
+        if button is not None:
+            self.perform_action(button.action)
+        self.update_screen_state()
+
+        # Redraw the cached UI layer if the state changed, and composite it
+        self.refresh_overlay(frame.shape)
+        pointer = pose.pointer if pose is not None else None
+        hovered = self.layout.hit_test(pointer)
+        self.overlay.set_hover(hovered.id if hovered is not None else None)
+        self.overlay.composite(frame)
+        self.draw_dwell_progress(frame, pointer)
+
+        return frame
@@ -0,0 +1,45 @@
+import os
+import time
+
+
+def process_age():
+    """Seconds since this process was started, from /proc; None where that isn't available."""
+    try:
+        with open('/proc/self/stat') as file:
+            # starttime is field 22; fields 3 on follow the parenthesized command name
+            start_ticks = int(file.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as file:
+            uptime = float(file.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupTimeline:
+    """Times of startup milestones, in seconds since the process started.
+
+    mark(name) records only the first time a milestone is reached, so
+    per-frame code can mark freely. Where /proc gives the process start,
+    interpreter start-up and imports count towards every milestone;
+    elsewhere times are measured from the timeline's creation.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter() - (process_age() or 0.0)
+        self.marks = {}
+
+    def mark(self, name):
+        if name not in self.marks:
+            self.marks[name] = time.perf_counter() - self.origin
+
+    def reached(self, name):
+        return name in self.marks
+
+    def report(self):
+        """One line with every milestone reached so far, in the order reached."""
+        steps = sorted(self.marks.items(), key=lambda mark: mark[1])
+        return "Startup timeline: " + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in steps)
+
+    def stats(self):
+        """Milestone times in ms, for metrics export."""
+        return {f'startup_{name}_ms': seconds * 1000 for name, seconds in self.marks.items()}
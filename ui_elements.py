@@ -1,5 +1,6 @@
 from tkinter import Frame, Label, StringVar
 from config import COLORS
+from menu_loader import format_price
 
 class UIElements:
     def __init__(self, root, cart_manager):
@@ -38,4 +39,4 @@ class UIElements:
         """Update the cart display."""
         cart_text, total = self.cart_manager.get_cart_summary()
         self.cart_items_var.set(cart_text)
-        self.total_var.set(f"Total: ${total:.2f}")
+        self.total_var.set(f"Total: {format_price(total)}")